@@ -1,6 +1,6 @@
 from hisss.equilibria.nash import calculate_nash_equilibrium
 from hisss.game.export import to_battlesnake_json
-from hisss.game.battlesnake import DOWN, LEFT, RIGHT, UP, BattleSnakeGame
+from hisss.game.battlesnake import DOWN, LEFT, RIGHT, UP, BattleSnakeGame, encode_batch
 from hisss.game.config import (
     BattleSnakeConfig,
     duel_config,
@@ -15,6 +15,13 @@ from hisss.game.rewards import (
     KillBattleSnakeRewardConfig,
     StandardBattleSnakeRewardConfig,
 )
+from hisss.game.rollout import RolloutPolicy, Trajectory, play_rollouts, simulate
+from hisss.game.state_pool import StatePool
+from hisss.game.vec_env import BattleSnakeVecEnv
+from hisss.search.mcts import MCTS, MCTSAlgorithm
+from hisss.search.nash_search import NashSearchResult, nash_search
+from hisss.search.playouts import estimate_values
+from hisss.search.transposition import TranspositionTable
 
 __all__ = [
     "duel_config",
@@ -22,6 +29,7 @@ __all__ = [
     "restricted_standard_config",
     "restricted_duel_config",
     "BattleSnakeGame",
+    "BattleSnakeVecEnv",
     "BattleSnakeConfig",
     "encoding_layer_indices",
     "UP",
@@ -34,4 +42,16 @@ __all__ = [
     "BattleSnakeEncodingConfig",
     "calculate_nash_equilibrium",
     "to_battlesnake_json",
+    "encode_batch",
+    "RolloutPolicy",
+    "play_rollouts",
+    "simulate",
+    "Trajectory",
+    "TranspositionTable",
+    "estimate_values",
+    "MCTS",
+    "MCTSAlgorithm",
+    "nash_search",
+    "NashSearchResult",
+    "StatePool",
 ]
@@ -0,0 +1,110 @@
+//
+// Operations on batches of game states, which amortize the cost of a single python-c++ roundtrip
+//
+
+#ifndef BATTLESNAKECPP_BATCH_H
+#define BATTLESNAKECPP_BATCH_H
+
+#include "battlesnake.h"
+#include "encoding_cache.h"
+
+bool step_with_rewards(
+        GameState* state,
+        const int* actions,  // shape (num_snakes,), indexed by snake id
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* rewards,  // shape (num_snakes,)
+        int* applied_actions = nullptr  // shape (num_snakes,), actions after the draw prevention, -1 if not at turn
+);
+void step_many(
+        GameState** states,
+        int num_states,
+        const int* actions,  // shape (num_states, num_snakes), indexed by snake id
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* rewards,  // shape (num_states, num_snakes)
+        bool* dones  // shape (num_states,)
+);
+
+// Steps a copy of the state for every joint action. Dead snakes are the snakes eliminated by the step, eating is
+// detected by the growth of a snake. All outputs have shape (num_joint, num_snakes) except dones (num_joint,).
+void step_outcomes(
+        GameState* state,
+        int num_joint,
+        const int* actions,  // shape (num_joint, num_snakes), indexed by snake id
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* rewards,
+        bool* dones,
+        bool* died,
+        int* death_causes,
+        bool* ate_food,
+        bool* at_turn
+);
+
+// Writes a stepped copy of the state for every joint action into children. Copies are taken from the pool, or from
+// the heap if the pool is null or full. Applied actions are the actions after the draw prevention, -1 if not at turn.
+void expand_children(
+        GameState* state,
+        StatePool* pool,
+        int num_joint,
+        const int* actions,  // shape (num_joint, num_snakes), indexed by snake id
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        GameState** children,  // shape (num_joint,)
+        double* rewards,  // shape (num_joint, num_snakes)
+        bool* dones,  // shape (num_joint,)
+        int* applied_actions  // shape (num_joint, num_snakes)
+);
+
+int encode_many(
+        GameState** states,
+        int num_states,
+        float* arr,  // shape (capacity, obs_size), every row is overwritten before encoding
+        int capacity,
+        int obs_size,
+        int* state_ids,  // shape (capacity,), index of the state each row belongs to
+        int* player_ids,  // shape (capacity,), player each row is encoded for
+        bool include_current_food,
+        bool include_next_food,
+        bool include_board,
+        bool include_number_of_turns,
+        bool flatten_snakes,
+        bool include_snake_body_as_one_hot,
+        bool include_snake_body,
+        bool include_snake_head,
+        bool include_snake_tail,
+        bool include_snake_health,
+        bool include_snake_length,
+        bool centered,
+        bool include_dist_map,
+        bool include_area_control,
+        bool include_food_distance,
+        bool include_hazards,
+        bool include_tail_distance,
+        bool include_num_food_on_board,
+        float fixed_food_spawn_chance,
+        bool include_temperatures,
+        bool single_temperature,
+        const float* temperatures,
+        EncodingCache** caches = nullptr  // shape (num_states,), entries may be null to encode from scratch
+);
+
+// Writes every transformation of the encodings into out. A transformation maps the cells of the output to the cells
+// of the input (rotations and flips) and the channels of the output to the channels of the input (enemy permutations)
+void transform_encodings(
+        const float* arr,  // shape (num_rows, num_cells, z_dim)
+        int num_rows,
+        int num_cells,
+        int z_dim,
+        int num_transforms,
+        const int* cell_maps,  // shape (num_transforms, num_cells), input cell of every output cell
+        const int* channel_maps,  // shape (num_transforms, z_dim), input channel of every output channel
+        float* out  // shape (num_transforms, num_rows, num_cells, z_dim)
+);
+
+#endif //BATTLESNAKECPP_BATCH_H
@@ -10,12 +10,27 @@
 #include <unordered_map>
 #include <vector>
 #include <list>
+#include <cstdint>
+#include <cstddef>
+#include <iterator>
 
 using namespace std;
 using Coord = pair<int, int>;
 
 void set_seed_gym(int seed);
 
+struct StateRng{
+    // Small splitmix64 generator owned by every game state. It satisfies the UniformRandomBitGenerator
+    // requirements and is cheap to copy, such that clones continue with the identical random stream.
+    using result_type = uint32_t;
+    explicit StateRng(uint64_t seed = 0);
+    void seed(uint64_t seed);
+    static constexpr result_type min() { return 0; }
+    static constexpr result_type max() { return UINT32_MAX; }
+    result_type operator()();
+    uint64_t state;
+};
+
 enum DeathCause {
     DEATH_NONE = 0,
     DEATH_WALL = 1,
@@ -25,11 +40,85 @@ enum DeathCause {
     DEATH_HEAD = 5,
 };
 
+// Zobrist hashing: every feature value is mapped to a pseudo random 64-bit key and the hash of a state is the xor of
+// the keys of all its features. Hashes are updated incrementally whenever a feature changes.
+enum ZobristFeature {
+    ZOBRIST_BODY = 0,    // body segment of a snake on a cell
+    ZOBRIST_HEAD = 1,    // head of a snake on a cell
+    ZOBRIST_HEALTH = 2,
+    ZOBRIST_LENGTH = 3,
+    ZOBRIST_ALIVE = 4,
+    ZOBRIST_FOOD = 5,    // at least one food on a cell
+    ZOBRIST_HAZARD = 6,
+    ZOBRIST_PARITY = 7,  // odd turn
+};
+
+uint64_t zobrist_key(int feature, int snake_id, int a, int b);
+
+// Game states live in a single contiguous memory block: the GameState header is followed by the snake records,
+// the body ring buffers, the bitboards, the food arrays and the hazards. All internal references are stored as
+// byte offsets instead of pointers, such that a clone is a single allocation plus memcpy.
+
+template <typename T>
+struct Span{
+    // non-owning view on a contiguous array
+    T* data;
+    int n;
+    T* begin() const { return data; }
+    T* end() const { return data + n; }
+    int size() const { return n; }
+    bool empty() const { return n == 0; }
+    T& operator[](int i) const { return data[i]; }
+    T& at(int i) const { return data[i]; }
+    T& front() const { return data[0]; }
+    T& back() const { return data[n - 1]; }
+};
+
+struct Bitboard{
+    // non-owning view on a packed mask with one bit per cell (index y * w + x). Boards up to 11x11 fit into two
+    // 64-bit words, larger boards use as many words as needed
+    uint64_t* words;
+    int num_words;
+    bool test(int i) const { return (words[i >> 6] >> (i & 63)) & 1ULL; }
+    void set(int i) const { words[i >> 6] |= 1ULL << (i & 63); }
+    void reset(int i) const { words[i >> 6] &= ~(1ULL << (i & 63)); }
+    void clear() const;
+};
+
+inline int bitboard_words(int w, int h) { return (w * h + 63) / 64; }
+
+struct BodyView{
+    // non-owning view on the ring buffer of a snake body, index 0 is the head
+    struct Iterator{
+        using iterator_category = std::forward_iterator_tag;
+        using value_type = Coord;
+        using difference_type = std::ptrdiff_t;
+        using pointer = Coord*;
+        using reference = Coord&;
+        const BodyView* view;
+        int i;
+        Coord& operator*() const { return (*view)[i]; }
+        Coord* operator->() const { return &(*view)[i]; }
+        Iterator& operator++() { i++; return *this; }
+        Iterator operator++(int) { Iterator tmp = *this; i++; return tmp; }
+        bool operator==(const Iterator& other) const { return i == other.i; }
+        bool operator!=(const Iterator& other) const { return i != other.i; }
+    };
+    Coord* buf;
+    int cap;
+    int start;
+    int n;
+    Coord& operator[](int i) const { int idx = start + i; return buf[idx >= cap ? idx - cap : idx]; }
+    Coord& at(int i) const { return (*this)[i]; }
+    Coord& front() const { return buf[start]; }
+    Coord& back() const { return (*this)[n - 1]; }
+    int size() const { return n; }
+    bool empty() const { return n == 0; }
+    Iterator begin() const { return Iterator{this, 0}; }
+    Iterator end() const { return Iterator{this, n}; }
+};
+
 struct Snake{
-    Snake(int id, bool alive, int health, int length, int w, int h, int max_health, deque<Coord> spawn_pos);
-    Snake(const Snake& other);
-    ~Snake();
-    Snake& operator=(const Snake& other);
     int id;
     bool alive;
     int health;
@@ -38,43 +127,112 @@ struct Snake{
     int death_cause;   // DeathCause value, 0 if alive
     int death_turn;    // turn when eliminated, -1 if alive
     int killer_id;     // id of killing snake, -1 if none
-    std::deque<Coord> body;
-    std::vector<bool> board; //true if allocated by body
+    int body_start;    // ring buffer position of the head
+    int body_size;
+    int body_cap;
+    int board_words;
+    int64_t body_offset;  // byte offset of the body ring buffer relative to this record
+    int64_t board_offset;  // byte offset of the bitboard (set if allocated by body) relative to this record
+    uint64_t hash;  // Zobrist hash of body, health, length and alive status
+    BodyView body() { return BodyView{body_buf(), body_cap, body_start, body_size}; }
+    Coord* body_buf() { return reinterpret_cast<Coord*>(reinterpret_cast<char*>(this) + body_offset); }
+    Bitboard board() {
+        return Bitboard{reinterpret_cast<uint64_t*>(reinterpret_cast<char*>(this) + board_offset), board_words};
+    }
+    void push_head(Coord c);
+    void pop_tail();
+    uint64_t stats_key() const;  // key of health and length
+};
+
+struct SnakeRange{
+    // non-owning view on the snake records of a state, which yields pointers like a container of Snake*
+    struct Iterator{
+        Snake* p;
+        Snake* operator*() const { return p; }
+        Iterator& operator++() { p++; return *this; }
+        bool operator!=(const Iterator& other) const { return p != other.p; }
+    };
+    Snake* data;
+    int n;
+    Iterator begin() const { return Iterator{data}; }
+    Iterator end() const { return Iterator{data + n}; }
+    int size() const { return n; }
+    Snake* at(int i) const { return data + i; }
+    Snake* operator[](int i) const { return data + i; }
 };
 
+// records of step_undoable(), see battlesnake.cpp
+struct UndoStack;
+// allocator of state memory blocks, see state_pool.h
+struct StatePool;
+
 struct GameState{
-    GameState(int w, int h, int num_snakes, int min_food, int food_spawn_chance, int init_turns_played,
-              deque<deque<Coord>> snake_bodies, list<Coord> food_spawns, list<int> food_spawn_turn_values,
-              bool* snake_alive, int* snake_health, int* snake_len, int* max_health,
-              bool wrapped, bool royale, int shrink_n_turns, int hazard_damage, vector<bool> init_hazards);
-    GameState(const GameState& other);
-    ~GameState();
-    GameState& operator=(const GameState& other);
     int turn;
     int w;
     int h;
     int num_snakes;
     int min_food;
     int food_spawn_chance;
-    list<Coord> food;
-    list<int> food_spawn_turns;
-    deque<Snake*> snakes;
+    int num_food;
+    int food_cap;
     bool wrapped;
     bool royale;
     int shrink_n_turns;
     int hazard_damage;
-    vector<bool> hazards;
+    bool all_actions_legal;
+    bool draw_prevention;  // see prevent_draw() in battlesnake.cpp
+    int board_words;
+    StateRng rng;
+    int64_t num_bytes;  // size of the whole memory block
+    int64_t snakes_offset;
+    int64_t occupied_offset;
+    int64_t food_board_offset;
+    int64_t food_offset;
+    int64_t food_turns_offset;
+    int64_t hazards_offset;
+    UndoStack* undo_stack;  // owned by this state and never shared with clones, nullptr if unused
+    uint64_t hash;  // Zobrist hash of food, hazards and turn parity, see state_hash()
+    StatePool* pool;  // pool owning the memory block, nullptr if allocated on the heap. Clones use the same pool
+    Snake* snake(int id) { return reinterpret_cast<Snake*>(base() + snakes_offset) + id; }
+    SnakeRange snakes() { return SnakeRange{snake(0), num_snakes}; }
+    Span<Coord> food() { return Span<Coord>{reinterpret_cast<Coord*>(base() + food_offset), num_food}; }
+    Span<int> food_spawn_turns() { return Span<int>{reinterpret_cast<int*>(base() + food_turns_offset), num_food}; }
+    uint8_t* hazards() { return reinterpret_cast<uint8_t*>(base() + hazards_offset); }
+    // union of the boards of all living snakes, see update_occupied()
+    Bitboard occupied() { return Bitboard{reinterpret_cast<uint64_t*>(base() + occupied_offset), board_words}; }
+    // cells containing at least one food
+    Bitboard food_board() { return Bitboard{reinterpret_cast<uint64_t*>(base() + food_board_offset), board_words}; }
+    char* base() { return reinterpret_cast<char*>(this); }
+    void add_food(Coord c, int spawn_turn);
+    void insert_food(int idx, Coord c, int spawn_turn);
+    void remove_food(int idx);
+    void update_occupied();
+    void set_hazard(int idx, bool value);
 };
 
+GameState* allocate_state(int w, int h, int num_snakes, int body_cap, int food_cap);
 GameState* init(int w, int h, int num_snakes, int min_food, int food_spawn_chance, int init_turns_played,
                 bool spawn_snakes_randomly, int* snake_body_lengths, int max_body_length, int* snake_bodies,
                 int num_init_food, int* food_spawns, int* food_spawn_turn_values,
                 bool* snake_alive, int* snake_health, int* snake_len,
-                int* max_health, bool wrapped, bool royale, int shrink_n_turns, int hazard_damage, bool* init_hazards);
+                int* max_health, bool wrapped, bool royale, int shrink_n_turns, int hazard_damage, bool* init_hazards,
+                bool all_actions_legal, bool draw_prevention);
 GameState* clone(GameState* state);
+GameState* clone_into(GameState* state, StatePool* pool);
 void step(GameState* state, int* actions);
+void step_undoable(GameState* state, int* actions);
+void prevent_draw(GameState* state, int* actions);
+bool undo(GameState* state);
+int undo_depth(GameState* state);
+void undo_clear(GameState* state);
+uint64_t state_hash(GameState* state);
+void recompute_hash(GameState* state);
 void close(GameState* state);
 void legal_actions(GameState* state, int snake_id, int* actions);
+void set_state_seed(GameState* state, uint64_t seed);
+int players_at_turn(GameState* state, bool* at_turn);
+int legal_action_mask(GameState* state, bool* mask);  // mask has shape (num_snakes, 4)
+bool is_terminal(GameState* state, int num_at_turn);
 
 
 
@@ -12,12 +12,10 @@
 #define DOWN 2
 #define LEFT 3
 
-void set_seed_utils(int seed);
-
 //initialization
-deque<Coord> spawn_randomly(int w, int num_snakes);
+deque<Coord> spawn_randomly(int w, int num_snakes, StateRng& rng);
 deque<deque<Coord>> spawn_on_pos(const int* pos, const int* snake_body_lengths, int num_snakes, int max_body_length);
-list<Coord> initialize_food(int w, int num_snakes, const vector<Coord>& snake_spawns);
+list<Coord> initialize_food(int w, int num_snakes, const vector<Coord>& snake_spawns, StateRng& rng);
 list<Coord> food_on_pos(int* pos, int num_food);
 
 //moving
@@ -31,6 +29,7 @@ vector<int> human_repr(GameState* state);
 void draw_to_arr(GameState* state, char* arr);
 
 //State
+struct PlayerEncodingCache;
 void construct_custom_encoding(
     GameState* state,
     float* arr,
@@ -56,7 +55,8 @@ void construct_custom_encoding(
     float fixed_food_spawn_chance,
     bool include_temperatures,
     bool single_temperature,
-    const float* temperatures
+    const float* temperatures,
+    PlayerEncodingCache* cache = nullptr  // previous encoding of the player, which is held in arr and updated in place
 );
 bool equals(GameState* state1, GameState* state2);
 
@@ -83,6 +83,24 @@ void area_control(
     float food_in_hazard_weight
 );
 void hazards(GameState* state, bool* arr);
+// Fills all state arrays in a single call. Bodies are padded with -1 up to max_body_len and the elimination info is
+// (cause, turn, killer) per snake. Writes the required (max_body_len, num_food) to sizes and returns false without
+// touching the arrays if one of the capacities is too small.
+bool state_arrays(
+    GameState* state,
+    int max_body_len,
+    int max_food,
+    int* sizes,  // shape (2,)
+    int* bodies,  // shape (num_snakes, max_body_len, 2)
+    int* body_lengths,  // shape (num_snakes,)
+    int* health,  // shape (num_snakes,)
+    int* length,  // shape (num_snakes,)
+    bool* alive_arr,  // shape (num_snakes,)
+    int* food,  // shape (max_food, 2)
+    int* food_spawn_turns,  // shape (max_food,)
+    bool* hazard_arr,  // shape (w * h,)
+    int* elimination  // shape (num_snakes, 3)
+);
 void char_game_matrix(GameState* state, char* matrix);
 
 #endif //BATTLESNAKECPP_BATTLESNAKE_HELPER_H
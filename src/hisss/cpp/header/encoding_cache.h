@@ -0,0 +1,34 @@
+//
+// Encodings of the players of a game, which are updated in place between turns instead of being rebuilt
+//
+
+#ifndef BATTLESNAKECPP_ENCODING_CACHE_H
+#define BATTLESNAKECPP_ENCODING_CACHE_H
+
+#include <cstdint>
+#include <vector>
+
+#include "battlesnake.h"
+
+struct PlayerEncodingCache{
+    vector<float> arr;  // shape (obs_size,), previous encoding of the player
+    vector<int> written;  // cells of the sparse layers (food, bodies, heads, ...), reset before the next encoding
+    vector<int> hazard_written;  // cells of the hazard layer, only reset if the hazards or offsets change
+    vector<float> layer_values;  // value of every layer that is filled with a constant, NaN otherwise
+    vector<uint8_t> hazards;  // hazards of the encoded hazard layer
+    bool valid;  // whether arr holds an encoding, which may be of a different state. Otherwise arr is zero
+    int x_off;  // offsets of the board and hazard layers
+    int y_off;
+    Coord head;  // head of the distance map
+};
+
+struct EncodingCache{
+    vector<PlayerEncodingCache> players;
+};
+
+EncodingCache* encoding_cache_create(int num_snakes);
+void encoding_cache_close(EncodingCache* cache);
+// Prepares the cache of a player for encodings of the given shape and returns the buffer that holds the encoding
+float* encoding_cache_buffer(EncodingCache* cache, int player, int obs_size);
+
+#endif //BATTLESNAKECPP_ENCODING_CACHE_H
@@ -0,0 +1,119 @@
+//
+// Simultaneous-move Monte Carlo tree search with decoupled selection at every node
+//
+
+#ifndef BATTLESNAKECPP_MCTS_H
+#define BATTLESNAKECPP_MCTS_H
+
+#include <cstdint>
+#include <unordered_map>
+#include <vector>
+
+#include "battlesnake.h"
+#include "state_pool.h"
+
+using namespace std;
+
+enum MctsAlgorithm {
+    MCTS_DUCT = 0,  // decoupled UCT, every player maximizes its own UCB score
+    MCTS_EXP3 = 1,  // every player runs Exp3 on importance-weighted returns
+    MCTS_REGRET_MATCHING = 2,  // every player runs regret matching on importance-weighted returns
+};
+
+// A node stores the players at turn in a range of player slots. Slot i holds the id of the player and its legal
+// actions at index 4 * i of slot_actions. The statistics of action j of slot i live at index 4 * i + j of the action
+// arenas of the tree. Children are looked up by node index and joint action index.
+struct MctsNode{
+    int num_at_turn;
+    int slots_begin;
+    int num_joint;  // number of joint actions, 0 in terminal nodes
+    int visits;
+    bool terminal;
+    bool has_priors;  // selection of decoupled UCT uses the priors of an evaluator (PUCT)
+    bool pending;  // new leaf, which waits for the evaluation of its batch
+};
+
+// Nodes and decisions from the root to a leaf. Steps are the joint actions, such that there is one node more than
+// steps. Decisions of the players at turn are stored in order of the path, starting at slots[step].
+struct MctsPath{
+    vector<int> nodes;
+    vector<int> slots;
+    vector<int> actions;  // action slot per player slot
+    vector<double> probs;  // probability the action was chosen with
+    vector<double> rewards;  // shape (num_steps, num_snakes)
+};
+
+// a new leaf of a batch, which is evaluated outside of the search
+struct MctsPending{
+    MctsPath path;
+    GameState* state;
+};
+
+// The root state is copied, such that the tree is independent of the game it was created from. Since every state
+// carries its own random stream, the successor of a joint action is deterministic and iterations replay their path
+// on a scratch copy of the root instead of storing a state per node.
+struct MctsTree{
+    GameState* root;
+    StatePool* scratch_pool;
+    int algorithm;
+    double exploration;  // UCB constant of DUCT, uniform exploration rate of Exp3 and regret matching
+    double value_min;  // bounds of the returns, used to normalize them to [0, 1]
+    double value_max;
+    int rollout_policy;  // -1 evaluates new leaves with zero instead of a rollout
+    int rollout_max_turns;
+    int reward_type;
+    double living_reward;
+    double terminal_reward;
+    StateRng rng;
+    int64_t num_iterations;
+    vector<MctsNode> nodes;  // nodes[0] is the root
+    unordered_map<uint64_t, int> children;  // key is node index * 2^32 + joint action index
+    vector<int> slot_players;
+    vector<int> slot_num_actions;
+    vector<int> slot_actions;
+    vector<int> action_visits;
+    vector<double> action_value_sums;  // returns from the view of the player choosing the action
+    vector<double> action_aux;  // reward estimates of Exp3, cumulative regrets of regret matching
+    vector<double> strategy_sums;  // cumulative selection probabilities of Exp3 and regret matching
+    vector<double> action_priors;  // normalized over the legal actions of a slot
+    vector<double> value_sums;  // shape (num_nodes, num_snakes)
+    StatePool* leaf_pool;  // memory of the pending leaves
+    vector<MctsPending> pending;
+    int virtual_loss;  // of the pending leaves
+};
+
+MctsTree* mcts_create(
+        GameState* root,
+        int algorithm,
+        double exploration,
+        double value_min,
+        double value_max,
+        int rollout_policy,
+        int rollout_max_turns,  // negative values play rollouts until the game is terminal
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        uint64_t seed
+);
+void mcts_close(MctsTree* tree);
+// runs iterations until one of the budgets is exhausted, non-positive budgets are ignored. Returns the number of
+// iterations of this call.
+int mcts_search(MctsTree* tree, int max_iterations, double max_seconds);
+// Selects paths until max_leaves new leaves are pending or a path ends in a leaf that is already pending. Every
+// decision on the path of a pending leaf counts as virtual_loss visits with the minimum value, which steers the
+// selection of the next paths away from it. Paths that end in a terminal node are backed up immediately and counted in
+// num_completed. Returns the number of pending leaves.
+int mcts_collect_leaves(MctsTree* tree, int max_leaves, int virtual_loss, int* num_completed);
+// states has shape (num_pending,), the states stay owned by the tree
+void mcts_pending_states(MctsTree* tree, GameState** states);
+// Backs up the pending leaves with values of shape (num_pending, num_snakes) and stores the priors of shape
+// (num_pending, num_snakes, 4) in the leaves. Rows of players not at turn are ignored.
+void mcts_apply_evaluations(MctsTree* tree, const double* values, const double* priors);
+// removes all pending leaves and their virtual loss without an evaluation
+void mcts_discard_pending(MctsTree* tree);
+// policies has shape (num_snakes, 4), rows of players not at turn in the root are zero
+void mcts_root_policies(MctsTree* tree, double* policies);
+// values has shape (num_snakes,), mean return of every player in the root
+void mcts_root_values(MctsTree* tree, double* values);
+
+#endif //BATTLESNAKECPP_MCTS_H
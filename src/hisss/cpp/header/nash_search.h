@@ -0,0 +1,50 @@
+//
+// Depth-limited simultaneous-move search, which solves the joint action matrix of every node for a Nash equilibrium
+//
+
+#ifndef BATTLESNAKECPP_NASH_SEARCH_H
+#define BATTLESNAKECPP_NASH_SEARCH_H
+
+#include <cstdint>
+
+#include "battlesnake.h"
+#include "state_pool.h"
+
+struct NashSearch{
+    bool prune;  // alpha-beta style pruning, only valid for two-player zero-sum rewards
+    double value_min;  // bounds of the return of player 0, used as initial cell bounds when pruning
+    double value_max;
+    int leaf_policy;  // rollout policy of the leaf evaluation, -1 evaluates leaves with zero
+    int num_leaf_rollouts;
+    int leaf_max_turns;
+    int reward_type;
+    double living_reward;
+    double terminal_reward;
+    StateRng rng;
+    StatePool* pool;  // memory of the successor states
+    int64_t num_nodes;
+    int64_t num_pruned;  // number of actions removed as dominated
+    int64_t num_nash_failures;  // number of nodes where the solver failed and uniform policies are used
+};
+
+// Writes the values of all players (num_snakes,) and the root policies (num_snakes, 4) of a search of the given
+// depth in joint actions. Stats are (num_nodes, num_pruned, num_nash_failures).
+void nash_search(
+        GameState* root,
+        int depth,
+        bool prune,
+        double value_min,
+        double value_max,
+        int leaf_policy,
+        int num_leaf_rollouts,
+        int leaf_max_turns,  // negative values play leaf rollouts until the game is terminal
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        uint64_t seed,
+        double* values,
+        double* policies,
+        int64_t* stats
+);
+
+#endif //BATTLESNAKECPP_NASH_SEARCH_H
@@ -0,0 +1,13 @@
+//
+// Minimal worker pool for running independent jobs on several threads
+//
+
+#ifndef BATTLESNAKECPP_PARALLEL_H
+#define BATTLESNAKECPP_PARALLEL_H
+
+#include <functional>
+
+int resolve_num_threads(int num_threads, int num_jobs);
+void parallel_for(int num_jobs, int num_threads, const std::function<void(int)>& job);
+
+#endif //BATTLESNAKECPP_PARALLEL_H
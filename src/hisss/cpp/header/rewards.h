@@ -0,0 +1,25 @@
+//
+// Native counterparts of the reward functions in hisss/game/rewards.py
+//
+
+#ifndef BATTLESNAKECPP_REWARDS_H
+#define BATTLESNAKECPP_REWARDS_H
+
+enum RewardType {
+    REWARD_STANDARD = 0,
+    REWARD_KILL = 1,
+    REWARD_COOP = 2,
+};
+
+// rewards has shape (num_players,), at_turn and at_turn_last flag the players at turn after and before the step
+void compute_rewards(
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        int num_players,
+        const bool* at_turn,
+        const bool* at_turn_last,
+        double* rewards
+);
+
+#endif //BATTLESNAKECPP_REWARDS_H
@@ -0,0 +1,83 @@
+//
+// Playing games until the end with simple rollout policies, optionally on several threads
+//
+
+#ifndef BATTLESNAKECPP_ROLLOUT_H
+#define BATTLESNAKECPP_ROLLOUT_H
+
+#include "battlesnake.h"
+
+enum RolloutPolicy {
+    ROLLOUT_UNIFORM = 0,  // uniform over the legal actions of a player
+    ROLLOUT_SAFE = 1,  // uniform over actions without immediate death, all actions if there is none
+    ROLLOUT_TABLE = 2,  // given action probabilities per turn, restricted to the legal actions of a player
+};
+
+void sample_rollout_actions(GameState* state, int policy, StateRng& rng, int* actions);
+void rollout(
+        GameState* state,
+        int policy,
+        int max_turns,  // negative values play until the game is terminal
+        StateRng& rng,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* cum_rewards,  // shape (num_snakes,)
+        int* turns_played,
+        bool* done
+);
+void rollout_many(
+        GameState** states,
+        int num_states,
+        int policy,
+        int max_turns,
+        int num_threads,
+        const uint64_t* seeds,  // shape (num_states,), seeds of the policy generators
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* cum_rewards,  // shape (num_states, num_snakes)
+        int* turns_played,  // shape (num_states,)
+        bool* dones  // shape (num_states,)
+);
+// Plays a single game and records a row per turn in the output arrays of shape (max_turns, num_snakes). Actions of
+// players that were not at turn are -1, the remaining arrays describe the state after the turn. The probabilities of
+// ROLLOUT_TABLE have shape (num_prob_turns, num_snakes, 4), the last row is repeated for later turns.
+// Returns the number of turns played.
+int simulate(
+        GameState* state,
+        int policy,
+        const double* action_probs,
+        int num_prob_turns,
+        int max_turns,
+        StateRng& rng,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        int* actions,
+        double* rewards,
+        bool* alive,
+        int* lengths,
+        int* healths,
+        int* death_causes,
+        bool* done
+);
+// Plays independent rollouts from copies of the root state and writes the mean return of every player and its
+// standard error. If resample_chance is set, every copy draws its own chance events (food spawns), otherwise all
+// copies continue with the random stream of the root.
+void estimate_values(
+        GameState* root,
+        int num_playouts,
+        int policy,
+        int max_turns,  // negative values play until the game is terminal
+        int num_threads,
+        const uint64_t* seeds,  // shape (num_playouts,)
+        bool resample_chance,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* means,  // shape (num_snakes,)
+        double* std_errors  // shape (num_snakes,)
+);
+
+#endif //BATTLESNAKECPP_ROLLOUT_H
@@ -0,0 +1,24 @@
+//
+// Compact binary snapshots of game states
+//
+
+#ifndef BATTLESNAKECPP_SNAPSHOT_H
+#define BATTLESNAKECPP_SNAPSHOT_H
+
+#include <cstdint>
+
+#include "battlesnake.h"
+
+// A snapshot is a flat array of int32 values, which does not depend on the memory layout of the GameState struct:
+// a header (magic number, version, total size, dimensions and rules), one record per snake (stats, body coordinates
+// and board words), the food (position and spawn turn) and the hazards as bitmask words. Increment the version
+// whenever the layout changes.
+const int32_t SNAPSHOT_MAGIC = 0x53534948;  // "HISS"
+const int32_t SNAPSHOT_VERSION = 2;
+
+int snapshot_size(GameState* state);
+void state_to_snapshot(GameState* state, int32_t* buf);
+// returns nullptr if the buffer is not a valid snapshot
+GameState* state_from_snapshot(const int32_t* buf, int n);
+
+#endif //BATTLESNAKECPP_SNAPSHOT_H
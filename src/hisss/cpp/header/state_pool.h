@@ -0,0 +1,36 @@
+//
+// Recycling allocator for the memory blocks of game states
+//
+
+#ifndef BATTLESNAKECPP_STATE_POOL_H
+#define BATTLESNAKECPP_STATE_POOL_H
+
+#include <cstdint>
+#include <mutex>
+#include <vector>
+
+#include "battlesnake.h"
+
+using namespace std;
+
+// Fixed-size slots for game states of one board size and player count. Slots are carved from chunks that are only
+// freed together with the pool, released slots are kept on a free list. If the pool is full, pool_acquire returns
+// nullptr and the caller falls back to the heap.
+struct StatePool{
+    int64_t slot_size;
+    int capacity;  // maximum number of slots
+    int num_slots;  // number of slots carved from the chunks so far
+    int num_in_use;
+    int peak_in_use;
+    int64_t num_overflows;  // number of requests that did not fit into the pool
+    vector<char*> chunks;
+    vector<GameState*> free_list;
+    mutex m;
+};
+
+StatePool* pool_create(int64_t slot_size, int capacity, int num_preallocated);
+void pool_close(StatePool* pool);
+GameState* pool_acquire(StatePool* pool, int64_t num_bytes);
+void pool_release(StatePool* pool, GameState* state);
+
+#endif //BATTLESNAKECPP_STATE_POOL_H
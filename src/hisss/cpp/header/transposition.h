@@ -0,0 +1,58 @@
+//
+// Fixed-size transposition table keyed by the Zobrist hash of a game state
+//
+
+#ifndef BATTLESNAKECPP_TRANSPOSITION_H
+#define BATTLESNAKECPP_TRANSPOSITION_H
+
+#include <atomic>
+#include <cstdint>
+#include <mutex>
+#include <vector>
+
+using namespace std;
+
+// Every bucket consists of two slots. The first slot prefers deep entries of the current generation, the second
+// slot is always replaced. All entry data is stored in flat arrays (one row per slot), such that the arrays can be
+// read directly from python. Writers lock the stripe of the bucket.
+struct TranspositionTable{
+    int num_buckets;
+    int num_players;
+    int num_actions;
+    int generation;
+    vector<uint64_t> keys;
+    vector<int> depths;  // -1 marks an empty slot
+    vector<int> generations;
+    vector<int> visits;
+    vector<double> values;  // shape (num_slots, num_players)
+    vector<double> policies;  // shape (num_slots, num_players, num_actions)
+    vector<mutex> stripes;
+    atomic<int64_t> num_hits;
+    atomic<int64_t> num_misses;
+};
+
+TranspositionTable* tt_create(int num_buckets, int num_players, int num_actions, int num_stripes);
+void tt_close(TranspositionTable* tt);
+void tt_clear(TranspositionTable* tt);
+void tt_new_generation(TranspositionTable* tt);
+int tt_num_slots(TranspositionTable* tt);
+// returns the slot of the key or -1. If found, the entry is copied into the non-null output arrays
+int tt_probe(
+        TranspositionTable* tt,
+        uint64_t key,
+        double* values,  // shape (num_players,)
+        double* policy,  // shape (num_players, num_actions)
+        int* depth,
+        int* visits
+);
+// returns the slot the entry was written to or -1 if a deeper entry of the same key was kept
+int tt_store(
+        TranspositionTable* tt,
+        uint64_t key,
+        int depth,
+        int visits,
+        const double* values,  // shape (num_players,)
+        const double* policy  // shape (num_players, num_actions), may be nullptr
+);
+
+#endif //BATTLESNAKECPP_TRANSPOSITION_H
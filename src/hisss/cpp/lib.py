@@ -61,6 +61,8 @@ class CPPLibrary:
             ct.c_int,
             ct.c_int,
             ct.POINTER(ct.c_bool),
+            ct.c_bool,
+            ct.c_bool,
         ]
         self.lib.init_cpp.restype = ct.POINTER(Struct)
         self.lib.close_cpp.argtypes = [ct.POINTER(Struct)]
@@ -68,8 +70,79 @@ class CPPLibrary:
             ct.POINTER(Struct),
             ct.c_char_p,
         ]
+        self.lib.custom_encode_many_cpp.argtypes = [
+            ct.POINTER(ct.POINTER(Struct)),
+            ct.c_int,
+            np.ctypeslib.ndpointer(dtype=ct.c_float, flags="C_CONTIGUOUS"),
+            ct.c_int,
+            ct.c_int,
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=1, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=1, flags="C_CONTIGUOUS"),
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_bool,
+            ct.c_float,
+            ct.c_bool,
+            ct.c_bool,
+            ct.POINTER(ct.c_float),
+            # encoding caches, None encodes from scratch
+            ct.POINTER(ct.POINTER(Struct)),
+        ]
+        self.lib.custom_encode_many_cpp.restype = ct.c_int
+        self.lib.transform_encodings_cpp.argtypes = [
+            np.ctypeslib.ndpointer(dtype=ct.c_float, flags="C_CONTIGUOUS"),
+            ct.c_int,  # number of rows
+            ct.c_int,  # number of cells
+            ct.c_int,  # number of channels
+            ct.c_int,  # number of transformations
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_float, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.encoding_cache_create_cpp.argtypes = [ct.c_int]
+        self.lib.encoding_cache_create_cpp.restype = ct.POINTER(Struct)
+        self.lib.encoding_cache_close_cpp.argtypes = [ct.POINTER(Struct)]
         self.lib.clone_cpp.argtypes = [ct.POINTER(Struct)]
         self.lib.clone_cpp.restype = ct.POINTER(Struct)
+        self.lib.clone_into_cpp.argtypes = [ct.POINTER(Struct), ct.POINTER(Struct)]
+        self.lib.clone_into_cpp.restype = ct.POINTER(Struct)
+        self.lib.snapshot_size_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.snapshot_size_cpp.restype = ct.c_int
+        self.lib.to_snapshot_cpp.argtypes = [
+            ct.POINTER(Struct),
+            np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.from_snapshot_cpp.argtypes = [
+            np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"),
+            ct.c_int,
+        ]
+        self.lib.from_snapshot_cpp.restype = ct.POINTER(Struct)
+        self.lib.state_num_bytes_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.state_num_bytes_cpp.restype = ct.c_int64
+        self.lib.state_in_pool_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.state_in_pool_cpp.restype = ct.c_bool
+        self.lib.pool_create_cpp.argtypes = [ct.c_int64, ct.c_int, ct.c_int]
+        self.lib.pool_create_cpp.restype = ct.POINTER(Struct)
+        self.lib.pool_close_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.pool_stats_cpp.argtypes = [
+            ct.POINTER(Struct),
+            np.ctypeslib.ndpointer(dtype=np.int64, ndim=1, flags="C_CONTIGUOUS"),
+        ]
         self.lib.actions_cpp.argtypes = [
             ct.POINTER(Struct),
             ct.c_int,
@@ -77,15 +150,184 @@ class CPPLibrary:
                 dtype=ct.c_int, ndim=1, shape=(4,), flags="C_CONTIGUOUS"
             ),
         ]
+        self.lib.legal_action_mask_cpp.argtypes = [
+            ct.POINTER(Struct),
+            np.ctypeslib.ndpointer(dtype=ct.c_bool, ndim=2, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.legal_action_mask_cpp.restype = ct.c_int
         self.lib.equals_cpp.argtypes = [
             ct.POINTER(Struct),
             ct.POINTER(Struct),
         ]
         self.lib.equals_cpp.restype = ct.c_bool
+        self.lib.state_hash_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.state_hash_cpp.restype = ct.c_uint64
+        self.lib.prevent_draw_cpp.argtypes = [
+            ct.POINTER(Struct),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=1, flags="C_CONTIGUOUS"),
+        ]
         self.lib.step_cpp.argtypes = [
             ct.POINTER(Struct),
             ct.POINTER(ct.c_int),
         ]
+        self.lib.step_undoable_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.POINTER(ct.c_int),
+        ]
+        self.lib.undo_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.undo_cpp.restype = ct.c_bool
+        self.lib.undo_depth_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.undo_depth_cpp.restype = ct.c_int
+        self.lib.undo_clear_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.step_many_cpp.argtypes = [
+            ct.POINTER(ct.POINTER(Struct)),
+            ct.c_int,
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            ct.c_int,
+            ct.c_double,
+            ct.c_double,
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=bool, ndim=1, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.step_outcomes_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_int,  # number of joint actions
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            ct.c_int,  # reward type
+            ct.c_double,
+            ct.c_double,
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=bool, ndim=1, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=bool, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=bool, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=bool, ndim=2, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.expand_children_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.POINTER(Struct),  # pool, None allocates on the heap
+            ct.c_int,  # number of joint actions
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            ct.c_int,  # reward type
+            ct.c_double,
+            ct.c_double,
+            ct.POINTER(ct.POINTER(Struct)),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=bool, ndim=1, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.rollout_many_cpp.argtypes = [
+            ct.POINTER(ct.POINTER(Struct)),
+            ct.c_int,
+            ct.c_int,
+            ct.c_int,
+            ct.c_int,
+            np.ctypeslib.ndpointer(dtype=np.uint64, ndim=1, flags="C_CONTIGUOUS"),
+            ct.c_int,
+            ct.c_double,
+            ct.c_double,
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=1, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=bool, ndim=1, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.estimate_values_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_int,  # number of playouts
+            ct.c_int,  # policy
+            ct.c_int,  # max turns
+            ct.c_int,  # number of threads
+            np.ctypeslib.ndpointer(dtype=np.uint64, ndim=1, flags="C_CONTIGUOUS"),
+            ct.c_bool,  # resample chance
+            ct.c_int,  # reward type
+            ct.c_double,
+            ct.c_double,
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=1, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=1, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.simulate_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_int,  # policy
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=3, flags="C_CONTIGUOUS"),
+            ct.c_int,  # number of probability turns
+            ct.c_int,  # max turns
+            ct.c_uint64,  # seed
+            ct.c_int,  # reward type
+            ct.c_double,
+            ct.c_double,
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=bool, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_int, ndim=2, flags="C_CONTIGUOUS"),
+            ct.POINTER(ct.c_bool),
+        ]
+        self.lib.simulate_cpp.restype = ct.c_int
+        # nash search
+        self.lib.nash_search_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_int,  # depth
+            ct.c_bool,  # prune
+            ct.c_double,  # value min
+            ct.c_double,  # value max
+            ct.c_int,  # leaf policy
+            ct.c_int,  # number of leaf rollouts
+            ct.c_int,  # leaf max turns
+            ct.c_int,  # reward type
+            ct.c_double,
+            ct.c_double,
+            ct.c_uint64,  # seed
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=1, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=np.int64, ndim=1, flags="C_CONTIGUOUS"),
+        ]
+        # monte carlo tree search
+        self.lib.mcts_create_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_int,  # algorithm
+            ct.c_double,  # exploration
+            ct.c_double,  # value min
+            ct.c_double,  # value max
+            ct.c_int,  # rollout policy
+            ct.c_int,  # rollout max turns
+            ct.c_int,  # reward type
+            ct.c_double,
+            ct.c_double,
+            ct.c_uint64,  # seed
+        ]
+        self.lib.mcts_create_cpp.restype = ct.POINTER(Struct)
+        self.lib.mcts_close_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.mcts_search_cpp.argtypes = [ct.POINTER(Struct), ct.c_int, ct.c_double]
+        self.lib.mcts_search_cpp.restype = ct.c_int
+        self.lib.mcts_collect_leaves_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_int,  # maximum number of leaves
+            ct.c_int,  # virtual loss
+            ct.POINTER(ct.c_int),  # number of completed iterations
+        ]
+        self.lib.mcts_collect_leaves_cpp.restype = ct.c_int
+        self.lib.mcts_pending_states_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.POINTER(ct.POINTER(Struct)),
+        ]
+        self.lib.mcts_apply_evaluations_cpp.argtypes = [
+            ct.POINTER(Struct),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=3, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.mcts_discard_pending_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.mcts_root_policies_cpp.argtypes = [
+            ct.POINTER(Struct),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.mcts_root_values_cpp.argtypes = [
+            ct.POINTER(Struct),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=1, flags="C_CONTIGUOUS"),
+        ]
+        self.lib.mcts_num_nodes_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.mcts_num_nodes_cpp.restype = ct.c_int
+        self.lib.mcts_num_iterations_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.mcts_num_iterations_cpp.restype = ct.c_int64
         self.lib.custom_encode_cpp.argtypes = [
             ct.POINTER(Struct),
             ct.POINTER(ct.c_float),
@@ -165,6 +407,22 @@ class CPPLibrary:
             ct.POINTER(Struct),
             ct.POINTER(ct.c_bool),
         ]
+        self.lib.state_arrays_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_int,  # max body length
+            ct.c_int,  # max food
+            np.ctypeslib.ndpointer(dtype=ct.c_int, flags="C_CONTIGUOUS"),  # sizes
+            np.ctypeslib.ndpointer(dtype=ct.c_int, flags="C_CONTIGUOUS"),  # bodies
+            np.ctypeslib.ndpointer(dtype=ct.c_int, flags="C_CONTIGUOUS"),  # body lens
+            np.ctypeslib.ndpointer(dtype=ct.c_int, flags="C_CONTIGUOUS"),  # health
+            np.ctypeslib.ndpointer(dtype=ct.c_int, flags="C_CONTIGUOUS"),  # length
+            np.ctypeslib.ndpointer(dtype=ct.c_bool, flags="C_CONTIGUOUS"),  # alive
+            np.ctypeslib.ndpointer(dtype=ct.c_int, flags="C_CONTIGUOUS"),  # food
+            np.ctypeslib.ndpointer(dtype=ct.c_int, flags="C_CONTIGUOUS"),  # food turns
+            np.ctypeslib.ndpointer(dtype=ct.c_bool, flags="C_CONTIGUOUS"),  # hazards
+            np.ctypeslib.ndpointer(dtype=ct.c_int, flags="C_CONTIGUOUS"),  # elimination
+        ]
+        self.lib.state_arrays_cpp.restype = ct.c_bool
         self.lib.snake_elim_cause_cpp.argtypes = [ct.POINTER(Struct), ct.c_int]
         self.lib.snake_elim_cause_cpp.restype = ct.c_int
         self.lib.snake_elim_killer_cpp.argtypes = [ct.POINTER(Struct), ct.c_int]
@@ -193,6 +451,50 @@ class CPPLibrary:
         self.lib.set_seed.argtypes = [
             ct.c_int,
         ]
+        self.lib.set_state_seed_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_uint64,
+        ]
+        # transposition table
+        self.lib.tt_create_cpp.argtypes = [ct.c_int, ct.c_int, ct.c_int, ct.c_int]
+        self.lib.tt_create_cpp.restype = ct.POINTER(Struct)
+        self.lib.tt_close_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_clear_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_new_generation_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_num_slots_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_num_slots_cpp.restype = ct.c_int
+        self.lib.tt_probe_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_uint64,
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=1, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=2, flags="C_CONTIGUOUS"),
+            ct.POINTER(ct.c_int),
+            ct.POINTER(ct.c_int),
+        ]
+        self.lib.tt_probe_cpp.restype = ct.c_int
+        self.lib.tt_store_cpp.argtypes = [
+            ct.POINTER(Struct),
+            ct.c_uint64,
+            ct.c_int,
+            ct.c_int,
+            np.ctypeslib.ndpointer(dtype=ct.c_double, ndim=1, flags="C_CONTIGUOUS"),
+            ct.POINTER(ct.c_double),
+        ]
+        self.lib.tt_store_cpp.restype = ct.c_int
+        self.lib.tt_num_hits_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_num_hits_cpp.restype = ct.c_int64
+        self.lib.tt_num_misses_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_num_misses_cpp.restype = ct.c_int64
+        self.lib.tt_keys_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_keys_cpp.restype = ct.POINTER(ct.c_uint64)
+        self.lib.tt_depths_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_depths_cpp.restype = ct.POINTER(ct.c_int)
+        self.lib.tt_visits_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_visits_cpp.restype = ct.POINTER(ct.c_int)
+        self.lib.tt_values_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_values_cpp.restype = ct.POINTER(ct.c_double)
+        self.lib.tt_policies_cpp.argtypes = [ct.POINTER(Struct)]
+        self.lib.tt_policies_cpp.restype = ct.POINTER(ct.c_double)
 
         self.lib.char_game_matrix_cpp.argtypes = [
             ct.POINTER(Struct),
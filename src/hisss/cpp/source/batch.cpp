@@ -0,0 +1,249 @@
+//
+// Operations on batches of game states, which amortize the cost of a single python-c++ roundtrip
+//
+
+#include <cstring>
+#include <vector>
+
+#include "../header/batch.h"
+#include "../header/rewards.h"
+#include "../header/battlesnake_helper.h"
+#include "../header/state_pool.h"
+#include "../header/encoding_cache.h"
+
+using namespace std;
+
+bool step_with_rewards(
+        GameState* state,
+        const int* actions,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* rewards,
+        int* applied_actions
+){
+    // returns whether the state is terminal after the step. Terminal states are not stepped again.
+    int num_snakes = state->num_snakes;
+    for (int p = 0; p < num_snakes; p++) rewards[p] = 0.0;
+    // vector<bool> is bit-packed, so we need char buffers to get a bool*
+    vector<char> at_turn_last(num_snakes, 0);
+    vector<char> at_turn(num_snakes, 0);
+    bool* at_turn_last_p = reinterpret_cast<bool*>(at_turn_last.data());
+    bool* at_turn_p = reinterpret_cast<bool*>(at_turn.data());
+    int num_at_turn_last = players_at_turn(state, at_turn_last_p);
+    if (is_terminal(state, num_at_turn_last)) return true;
+    // players not at turn always perform the default action
+    vector<int> cur_actions(num_snakes);
+    for (int p = 0; p < num_snakes; p++){
+        cur_actions[p] = at_turn_last_p[p] ? actions[p] : 0;
+    }
+    step(state, cur_actions.data());
+    if (applied_actions != nullptr){
+        for (int p = 0; p < num_snakes; p++) applied_actions[p] = at_turn_last_p[p] ? cur_actions[p] : -1;
+    }
+    int num_at_turn = players_at_turn(state, at_turn_p);
+    compute_rewards(reward_type, living_reward, terminal_reward, num_snakes, at_turn_p, at_turn_last_p, rewards);
+    return is_terminal(state, num_at_turn);
+}
+
+void step_many(
+        GameState** states,
+        int num_states,
+        const int* actions,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* rewards,
+        bool* dones
+){
+    for (int i = 0; i < num_states; i++){
+        int num_snakes = states[i]->num_snakes;
+        dones[i] = step_with_rewards(states[i], actions + i * num_snakes, reward_type, living_reward,
+                                     terminal_reward, rewards + i * num_snakes);
+    }
+}
+
+void step_outcomes(
+        GameState* state,
+        int num_joint,
+        const int* actions,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* rewards,
+        bool* dones,
+        bool* died,
+        int* death_causes,
+        bool* ate_food,
+        bool* at_turn
+){
+    int num_snakes = state->num_snakes;
+    vector<char> alive_before(num_snakes);
+    vector<int> length_before(num_snakes);
+    for (Snake* s: state->snakes()){
+        alive_before[s->id] = s->alive;
+        length_before[s->id] = s->length;
+    }
+    // a single slot is recycled for all successors
+    StatePool* pool = pool_create(state->num_bytes, 1, 1);
+    for (int i = 0; i < num_joint; i++){
+        int offset = i * num_snakes;
+        GameState* child = clone_into(state, pool);
+        dones[i] = step_with_rewards(child, actions + offset, reward_type, living_reward, terminal_reward,
+                                     rewards + offset);
+        for (Snake* s: child->snakes()){
+            died[offset + s->id] = alive_before[s->id] and not s->alive;
+            death_causes[offset + s->id] = died[offset + s->id] ? s->death_cause : 0;
+            ate_food[offset + s->id] = s->length > length_before[s->id];
+        }
+        players_at_turn(child, at_turn + offset);
+        close(child);
+    }
+    pool_close(pool);
+}
+
+void expand_children(
+        GameState* state,
+        StatePool* pool,
+        int num_joint,
+        const int* actions,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        GameState** children,
+        double* rewards,
+        bool* dones,
+        int* applied_actions
+){
+    int num_snakes = state->num_snakes;
+    for (int i = 0; i < num_joint; i++){
+        int offset = i * num_snakes;
+        children[i] = clone_into(state, pool);
+        dones[i] = step_with_rewards(children[i], actions + offset, reward_type, living_reward, terminal_reward,
+                                     rewards + offset, applied_actions + offset);
+    }
+}
+
+int encode_many(
+        GameState** states,
+        int num_states,
+        float* arr,
+        int capacity,
+        int obs_size,
+        int* state_ids,
+        int* player_ids,
+        bool include_current_food,
+        bool include_next_food,
+        bool include_board,
+        bool include_number_of_turns,
+        bool flatten_snakes,
+        bool include_snake_body_as_one_hot,
+        bool include_snake_body,
+        bool include_snake_head,
+        bool include_snake_tail,
+        bool include_snake_health,
+        bool include_snake_length,
+        bool centered,
+        bool include_dist_map,
+        bool include_area_control,
+        bool include_food_distance,
+        bool include_hazards,
+        bool include_tail_distance,
+        bool include_num_food_on_board,
+        float fixed_food_spawn_chance,
+        bool include_temperatures,
+        bool single_temperature,
+        const float* temperatures,
+        EncodingCache** caches
+){
+    // first pass: collect all (state, player) pairs and make sure they fit into the buffer
+    int num_rows = 0;
+    for (int i = 0; i < num_states; i++){
+        GameState* state = states[i];
+        vector<char> at_turn(state->num_snakes);
+        players_at_turn(state, reinterpret_cast<bool*>(at_turn.data()));
+        for (int p = 0; p < state->num_snakes; p++){
+            if (not at_turn[p]) continue;
+            if (num_rows >= capacity) return -1;
+            state_ids[num_rows] = i;
+            player_ids[num_rows] = p;
+            num_rows++;
+        }
+    }
+    // second pass: encode directly into the caller buffer. The encoder only writes non-zero entries. States with a
+    // cache update the previous encoding of the player and copy it into the buffer
+    for (int row = 0; row < num_rows; row++){
+        float* row_arr = arr + (long) row * obs_size;
+        EncodingCache* cache = caches == nullptr ? nullptr : caches[state_ids[row]];
+        float* target = row_arr;
+        if (cache == nullptr){
+            memset(row_arr, 0, obs_size * sizeof(float));
+        } else {
+            target = encoding_cache_buffer(cache, player_ids[row], obs_size);
+        }
+        construct_custom_encoding(
+                states[state_ids[row]],
+                target,
+                include_current_food,
+                include_next_food,
+                include_board,
+                include_number_of_turns,
+                flatten_snakes,
+                player_ids[row],
+                include_snake_body_as_one_hot,
+                include_snake_body,
+                include_snake_head,
+                include_snake_tail,
+                include_snake_health,
+                include_snake_length,
+                centered,
+                include_dist_map,
+                include_area_control,
+                include_food_distance,
+                include_hazards,
+                include_tail_distance,
+                include_num_food_on_board,
+                fixed_food_spawn_chance,
+                include_temperatures,
+                single_temperature,
+                temperatures,
+                cache == nullptr ? nullptr : &cache->players[player_ids[row]]
+        );
+        if (cache != nullptr) memcpy(row_arr, target, obs_size * sizeof(float));
+    }
+    return num_rows;
+}
+
+void transform_encodings(
+        const float* arr,
+        int num_rows,
+        int num_cells,
+        int z_dim,
+        int num_transforms,
+        const int* cell_maps,
+        const int* channel_maps,
+        float* out
+){
+    for (int t = 0; t < num_transforms; t++){
+        const int* cell_map = cell_maps + (long) t * num_cells;
+        const int* channel_map = channel_maps + (long) t * z_dim;
+        // the enemy permutations move blocks of consecutive channels, which are copied at once
+        vector<int> run_starts;
+        for (int c = 0; c < z_dim; c++){
+            if (c == 0 or channel_map[c] != channel_map[c - 1] + 1) run_starts.push_back(c);
+        }
+        run_starts.push_back(z_dim);
+        for (int row = 0; row < num_rows; row++){
+            const float* row_arr = arr + (long) row * num_cells * z_dim;
+            float* out_arr = out + ((long) t * num_rows + row) * num_cells * z_dim;
+            for (int cell = 0; cell < num_cells; cell++){
+                const float* src = row_arr + (long) cell_map[cell] * z_dim;
+                float* dst = out_arr + (long) cell * z_dim;
+                for (int r = 0; r + 1 < (int) run_starts.size(); r++){
+                    int start = run_starts[r];
+                    memcpy(dst + start, src + channel_map[start], (run_starts[r + 1] - start) * sizeof(float));
+                }
+            }
+        }
+    }
+}
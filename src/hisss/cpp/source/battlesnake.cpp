@@ -3,12 +3,16 @@
 //
 #include <utility>
 #include <random>
+#include <cstdlib>
+#include <cstring>
 
 #include "../header/battlesnake.h"
 #include "../header/battlesnake_helper.h"
+#include "../header/state_pool.h"
 
 using namespace std;
 
+// only used to draw the seeds of newly initialized game states, every state then owns its own generator
 random_device rd_utils_gym;
 mt19937 gen_utils_gym(rd_utils_gym());
 
@@ -16,169 +20,188 @@ void set_seed_gym(int seed){
     gen_utils_gym.seed(seed);
 }
 
-Snake::Snake(
-        int id,
-        bool alive,
-        int health,
-        int length,
-        int w,
-        int h,
-        int max_health,
-        deque<Coord> spawn_pos
-):
-        id(id),
-        alive(alive),
-        health(health),
-        length(length),
-        max_health(max_health),
-        death_cause(DEATH_NONE),
-        death_turn(-1),
-        killer_id(-1),
-        body(std::move(spawn_pos)),
-        board(w*h, false)
-{
-    for (Coord& c: body){
-        board[c.second * w + c.first] = true;
-    }
-}
-
-Snake::Snake(const Snake& other):
-    body(other.body),
-    board(other.board)
-{
-    id = other.id;
-    alive = other.alive;
-    health = other.health;
-    length = other.length;
-    max_health = other.max_health;
-    death_cause = other.death_cause;
-    death_turn = other.death_turn;
-    killer_id = other.killer_id;
-}
-
-Snake::~Snake(){
-    body.clear();
-    board.clear();
-}
-
-Snake& Snake::operator=(const Snake& other){
-    id = other.id;
-    alive = other.alive;
-    health = other.health;
-    length = other.length;
-    max_health = other.max_health;
-    death_cause = other.death_cause;
-    death_turn = other.death_turn;
-    killer_id = other.killer_id;
-    body.clear();
-    body = other.body;
-    board.clear();
-    board = other.board;
-    return *this;
-}
-
-GameState::GameState(
-        int w,
-        int h,
-        int num_snakes,
-        int min_food,
-        int food_spawn_chance,
-        int init_turns_played,
-        deque<deque<Coord>> snake_bodies,
-        list<Coord> food_spawns,
-        list<int> food_spawn_turn_values,
-        bool* snake_alive,
-        int* snake_health,
-        int* snake_len,
-        int* max_health,
-        bool wrapped,
-        bool royale,
-        int shrink_n_turns,
-        int hazard_damage,
-        vector<bool> init_hazards
-):
-        turn(init_turns_played),
-        w(w),
-        h(h),
-        num_snakes(num_snakes),
-        min_food(min_food),
-        food_spawn_chance(food_spawn_chance),
-        food(std::move(food_spawns)),
-        food_spawn_turns(std::move(food_spawn_turn_values)),
-        wrapped(wrapped),
-        royale(royale),
-        shrink_n_turns(shrink_n_turns),
-        hazard_damage(hazard_damage),
-        hazards(std::move(init_hazards))
-{
-    //init snakes
+StateRng::StateRng(uint64_t seed): state(seed) {}
+
+void StateRng::seed(uint64_t seed){
+    state = seed;
+}
+
+StateRng::result_type StateRng::operator()(){
+    uint64_t z = (state += 0x9E3779B97F4A7C15ULL);
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    z = z ^ (z >> 31);
+    return (result_type) (z >> 32);
+}
+
+void Bitboard::clear() const {
+    for (int i = 0; i < num_words; i++) words[i] = 0;
+}
+
+uint64_t zobrist_key(int feature, int snake_id, int a, int b){
+    // splitmix64 finalizer of the packed feature, which is a bijection and therefore maps distinct packings to
+    // distinct keys
+    uint64_t z = ((uint64_t) (uint8_t) feature << 56) ^ ((uint64_t) (uint8_t) (snake_id + 1) << 48)
+            ^ ((uint64_t) ((uint32_t) a & 0xFFFFFF) << 24) ^ (uint64_t) ((uint32_t) b & 0xFFFFFF);
+    z += 0x9E3779B97F4A7C15ULL;
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    return z ^ (z >> 31);
+}
+
+void Snake::push_head(Coord c){
+    if (body_size > 0){
+        Coord old_head = body_buf()[body_start];
+        hash ^= zobrist_key(ZOBRIST_HEAD, id, old_head.first, old_head.second);
+    }
+    body_start = body_start == 0 ? body_cap - 1 : body_start - 1;
+    body_buf()[body_start] = c;
+    body_size++;
+    hash ^= zobrist_key(ZOBRIST_BODY, id, c.first, c.second) ^ zobrist_key(ZOBRIST_HEAD, id, c.first, c.second);
+}
+
+void Snake::pop_tail(){
+    Coord tail = body().back();
+    hash ^= zobrist_key(ZOBRIST_BODY, id, tail.first, tail.second);
+    body_size--;
+}
+
+uint64_t Snake::stats_key() const {
+    return zobrist_key(ZOBRIST_HEALTH, id, health, 0) ^ zobrist_key(ZOBRIST_LENGTH, id, length, 0);
+}
+
+void GameState::add_food(Coord c, int spawn_turn){
+    reinterpret_cast<Coord*>(base() + food_offset)[num_food] = c;
+    reinterpret_cast<int*>(base() + food_turns_offset)[num_food] = spawn_turn;
+    num_food++;
+    if (not food_board().test(c.second * w + c.first)) hash ^= zobrist_key(ZOBRIST_FOOD, -1, c.first, c.second);
+    food_board().set(c.second * w + c.first);
+}
+
+void GameState::insert_food(int idx, Coord c, int spawn_turn){
+    Coord* food_arr = reinterpret_cast<Coord*>(base() + food_offset);
+    int* turn_arr = reinterpret_cast<int*>(base() + food_turns_offset);
+    for (int i = num_food; i > idx; i--){
+        food_arr[i] = food_arr[i-1];
+        turn_arr[i] = turn_arr[i-1];
+    }
+    food_arr[idx] = c;
+    turn_arr[idx] = spawn_turn;
+    num_food++;
+    if (not food_board().test(c.second * w + c.first)) hash ^= zobrist_key(ZOBRIST_FOOD, -1, c.first, c.second);
+    food_board().set(c.second * w + c.first);
+}
+
+void GameState::remove_food(int idx){
+    // shift the remaining food to keep the spawn order
+    Coord* food_arr = reinterpret_cast<Coord*>(base() + food_offset);
+    int* turn_arr = reinterpret_cast<int*>(base() + food_turns_offset);
+    Coord removed = food_arr[idx];
+    for (int i = idx; i < num_food - 1; i++){
+        food_arr[i] = food_arr[i+1];
+        turn_arr[i] = turn_arr[i+1];
+    }
+    num_food--;
+    // the cell is only free if no duplicate food remains on it
+    for (Coord f: food()){
+        if (f == removed) return;
+    }
+    food_board().reset(removed.second * w + removed.first);
+    hash ^= zobrist_key(ZOBRIST_FOOD, -1, removed.first, removed.second);
+}
+
+void GameState::set_hazard(int idx, bool value){
+    if ((bool) hazards()[idx] == value) return;
+    hazards()[idx] = value;
+    hash ^= zobrist_key(ZOBRIST_HAZARD, -1, idx % w, idx / w);
+}
+
+void GameState::update_occupied(){
+    Bitboard occ = occupied();
+    occ.clear();
+    for (Snake* s: snakes()){
+        if (not s->alive) continue;
+        Bitboard b = s->board();
+        for (int i = 0; i < board_words; i++) occ.words[i] |= b.words[i];
+    }
+}
+
+// Delta of a single step_undoable() call. Snake records, boards and food are stored in the flat arrays of the
+// UndoStack, such that no allocations happen once the stack has grown to the search depth.
+struct SnakeUndo{
+    Snake record;  // record of a snake that was alive before the step
+    Coord tail;    // tail before the step, its ring buffer slot may be overwritten by deeper steps
+};
+
+struct FoodUndo{
+    int idx;
+    Coord pos;
+    int spawn_turn;
+};
+
+struct UndoFrame{
+    int turn;
+    StateRng rng;
+    uint64_t hash;
+    int snakes_begin;
+    int food_begin;
+    int hazards_begin;
+    int num_food_placed;
+};
+
+struct UndoStack{
+    vector<UndoFrame> frames;
+    vector<SnakeUndo> snakes;
+    vector<uint64_t> boards;  // board words of the recorded snakes
+    vector<FoodUndo> food;  // eaten food in order of removal
+    vector<int> hazards;  // cells that became hazards
+};
+
+int64_t aligned(int64_t num_bytes){
+    return (num_bytes + 7) / 8 * 8;
+}
+
+GameState* allocate_state(int w, int h, int num_snakes, int body_cap, int food_cap){
+    // compute the layout of the memory block
+    int64_t snakes_offset = aligned(sizeof(GameState));
+    int64_t bodies_offset = snakes_offset + aligned((int64_t) num_snakes * sizeof(Snake));
+    int64_t body_bytes = aligned((int64_t) body_cap * sizeof(Coord));
+    int64_t boards_offset = bodies_offset + num_snakes * body_bytes;
+    int board_words = bitboard_words(w, h);
+    int64_t board_bytes = (int64_t) board_words * sizeof(uint64_t);
+    int64_t occupied_offset = boards_offset + num_snakes * board_bytes;
+    int64_t food_board_offset = occupied_offset + board_bytes;
+    int64_t food_offset = food_board_offset + board_bytes;
+    int64_t food_turns_offset = food_offset + aligned((int64_t) food_cap * sizeof(Coord));
+    int64_t hazards_offset = food_turns_offset + aligned((int64_t) food_cap * sizeof(int));
+    int64_t num_bytes = hazards_offset + aligned(w * h);
+    // zero initialized memory block
+    auto* state = static_cast<GameState*>(calloc(1, num_bytes));
+    state->w = w;
+    state->h = h;
+    state->num_snakes = num_snakes;
+    state->food_cap = food_cap;
+    state->board_words = board_words;
+    state->num_bytes = num_bytes;
+    state->snakes_offset = snakes_offset;
+    state->occupied_offset = occupied_offset;
+    state->food_board_offset = food_board_offset;
+    state->food_offset = food_offset;
+    state->food_turns_offset = food_turns_offset;
+    state->hazards_offset = hazards_offset;
     for (int i = 0; i < num_snakes; i++){
-        auto* s = new Snake(i, snake_alive[i], snake_health[i], snake_len[i], w, h, max_health[i], snake_bodies[i]);
-        snakes.push_back(s);
-    }
-}
-
-GameState::GameState(const GameState& other):
-    food(other.food),
-    food_spawn_turns(other.food_spawn_turns),
-    hazards(other.hazards)
-{
-    turn = other.turn;
-    w = other.w;
-    h = other.h;
-    num_snakes = other.num_snakes;
-    min_food = other.min_food;
-    food_spawn_chance = other.food_spawn_chance;
-    for (auto& sp: other.snakes){
-        auto* s = new Snake(*sp);
-        snakes.push_back(s);
-    }
-    wrapped = other.wrapped;
-    royale = other.royale;
-    shrink_n_turns = other.shrink_n_turns;
-    hazard_damage = other.hazard_damage;
-}
-
-GameState::~GameState(){
-    food.clear();
-    food_spawn_turns.clear();
-    while(not snakes.empty()){
-        Snake* s = snakes.front();
-        delete s;
-        snakes.pop_front();
-    }
-    snakes.clear();
-    hazards.clear();
-}
-
-GameState& GameState::operator=(const GameState& other){
-    turn = other.turn;
-    w = other.w;
-    h = other.h;
-    num_snakes = other.num_snakes;
-    min_food = other.min_food;
-    food_spawn_chance = other.food_spawn_chance;
-    food.clear();
-    food = other.food;
-    food_spawn_turns.clear();
-    food_spawn_turns = other.food_spawn_turns;
-    deque<Snake*> temp_q;
-    for (Snake* s : other.snakes){
-        auto* temp_s = new Snake(*s);
-        temp_q.push_back(temp_s);
-    }
-    while(not snakes.empty()){
-        Snake* s = snakes.front();
-        delete s;
-        snakes.pop_front();
-    }
-    snakes.clear();
-    snakes = temp_q;
-    wrapped = other.wrapped;
-    shrink_n_turns = other.shrink_n_turns;
-    hazard_damage = other.hazard_damage;
-    hazards = other.hazards;
-    return *this;
+        Snake* s = state->snake(i);
+        int64_t snake_pos = snakes_offset + (int64_t) i * sizeof(Snake);
+        s->id = i;
+        s->death_cause = DEATH_NONE;
+        s->death_turn = -1;
+        s->killer_id = -1;
+        s->body_cap = body_cap;
+        s->board_words = board_words;
+        s->body_offset = bodies_offset + i * body_bytes - snake_pos;
+        s->board_offset = boards_offset + i * board_bytes - snake_pos;
+    }
+    return state;
 }
 
 GameState* init(
@@ -203,12 +226,17 @@ GameState* init(
         bool royale,
         int shrink_n_turns,
         int hazard_damage,
-        bool* init_hazards
+        bool* init_hazards,
+        bool all_actions_legal,
+        bool draw_prevention
 ){
+    // random stream of the new state, which is also used for the random spawns below
+    uint64_t seed = ((uint64_t) gen_utils_gym() << 32) | (uint64_t) gen_utils_gym();
+    StateRng rng(seed);
     // snake spawns
     deque<deque<Coord>> snake_qs;
     if (spawn_snakes_randomly){
-        deque<Coord> heads = spawn_randomly(w, num_snakes);
+        deque<Coord> heads = spawn_randomly(w, num_snakes, rng);
         for (int i = 0; i < num_snakes; i++){
             deque<Coord> q;
             q.push_back(heads[i]);
@@ -227,7 +255,7 @@ GameState* init(
         for (int i = 0; i < num_snakes; i++){
             snake_heads.push_back(snake_qs[i].front());
         }
-        food_list = initialize_food(w, num_snakes, snake_heads);
+        food_list = initialize_food(w, num_snakes, snake_heads, rng);
         for (size_t i = 0; i < food_list.size(); i++)
             food_spawn_turns_list.push_back(init_turns_played);
     } else {
@@ -240,62 +268,123 @@ GameState* init(
                 food_spawn_turns_list.push_back(init_turns_played);
         }
     }
+    // a living body covers every cell at most once, apart from stacked initial segments. One more slot is
+    // needed for the new head before deaths are resolved
+    int max_init_len = 0;
+    for (auto& q: snake_qs){
+        if ((int) q.size() > max_init_len) max_init_len = (int) q.size();
+    }
+    int body_cap = w * h + max_init_len + 1;
+    int food_cap = w * h + (int) food_list.size();
+    GameState* state_p = allocate_state(w, h, num_snakes, body_cap, food_cap);
+    state_p->turn = init_turns_played;
+    state_p->min_food = min_food;
+    state_p->food_spawn_chance = food_spawn_chance;
+    state_p->wrapped = wrapped;
+    state_p->royale = royale;
+    state_p->shrink_n_turns = shrink_n_turns;
+    state_p->hazard_damage = hazard_damage;
+    state_p->all_actions_legal = all_actions_legal;
+    state_p->draw_prevention = draw_prevention;
+    state_p->rng = rng;
+    //snakes
+    for (int i = 0; i < num_snakes; i++){
+        Snake* s = state_p->snake(i);
+        s->alive = snake_alive[i];
+        s->health = snake_health[i];
+        s->length = snake_len[i];
+        s->max_health = max_health[i];
+        for (auto it = snake_qs[i].rbegin(); it != snake_qs[i].rend(); ++it){
+            s->push_head(*it);
+            s->board().set(it->second * w + it->first);
+        }
+        s->hash ^= s->stats_key();
+        if (s->alive) s->hash ^= zobrist_key(ZOBRIST_ALIVE, s->id, 0, 0);
+    }
+    if (init_turns_played % 2 != 0) state_p->hash ^= zobrist_key(ZOBRIST_PARITY, -1, 0, 0);
+    //food
+    auto turn_it = food_spawn_turns_list.begin();
+    for (Coord f: food_list){
+        state_p->add_food(f, *turn_it);
+        ++turn_it;
+    }
     //hazards
-    vector<bool> init_hazard_vec(w*h, false);
     for (int i = 0; i < w*h; i++){
-        init_hazard_vec[i] = init_hazards[i];
+        state_p->set_hazard(i, init_hazards[i]);
     }
-
-    auto* state_p = new GameState(w, h, num_snakes, min_food, food_spawn_chance, init_turns_played,
-                                  snake_qs, food_list, food_spawn_turns_list,
-                                  snake_alive, snake_health, snake_len, max_health, wrapped,
-                                  royale, shrink_n_turns, hazard_damage, init_hazard_vec);
+    state_p->update_occupied();
     return state_p;
 }
 
 
-GameState* clone(GameState* state){
-    auto* copy = new GameState(*state);
+GameState* clone_into(GameState* state, StatePool* pool){
+    // falls back to the heap if there is no pool or the pool is full
+    GameState* copy = pool == nullptr ? nullptr : pool_acquire(pool, state->num_bytes);
+    if (copy == nullptr){
+        copy = static_cast<GameState*>(malloc(state->num_bytes));
+        pool = nullptr;
+    }
+    memcpy(copy, state, state->num_bytes);
+    copy->undo_stack = nullptr;
+    copy->pool = pool;
     return copy;
 }
 
+GameState* clone(GameState* state){
+    return clone_into(state, state->pool);
+}
+
 void close(GameState* state){
-    delete state;
+    if (state == nullptr) return;
+    delete state->undo_stack;
+    if (state->pool != nullptr){
+        pool_release(state->pool, state);
+    } else {
+        free(state);
+    }
+}
+
+void set_state_seed(GameState* state, uint64_t seed){
+    state->rng.seed(seed);
 }
 
-list<Coord> move_snakes(GameState* state, const int* actions){
-    list<Coord> food_to_delete;
+void move_snakes(GameState* state, const int* actions, vector<Coord>& food_to_delete){
+    food_to_delete.clear();
     //iterate through live snakes
-    for (Snake* s : state->snakes){
+    for (Snake* s : state->snakes()){
         if(not s->alive) continue;
         //move new head
-        Coord old_pos = s->body.front();
+        Coord old_pos = s->body().front();
         Coord new_pos = new_position(old_pos, actions[s->id], state);
-        s->body.push_front(new_pos);
+        uint64_t old_stats = s->stats_key();
+        s->push_head(new_pos);
 
         //remove tail if no extension happening due to
         //1. no start of game, 2. no food consumed
-        if (s->length < (int) s->body.size()){
-            Coord tail = s->body.back();
-            s->board[tail.second * state->w + tail.first] = false;
-            s->body.pop_back();
+        if (s->length < s->body_size){
+            Coord tail = s->body().back();
+            s->board().reset(tail.second * state->w + tail.first);
+            s->pop_tail();
         }
         //decrease health (normal and hazard damage)
         s->health--;
-        if (state->royale and state->hazards[new_pos.second * state->w + new_pos.first]){
+        if (state->royale and in_bounds(state, new_pos)
+                and state->hazards()[new_pos.second * state->w + new_pos.first]){
             s->health -= state->hazard_damage;
         }
         if (s->health < 0) s->health = 0;
         //food consumption
-        for (Coord f: state->food){
-            if (f == new_pos){
-                s->health = s->max_health;
-                s->length++;
-                food_to_delete.push_back(f);
+        if (in_bounds(state, new_pos) and state->food_board().test(new_pos.second * state->w + new_pos.first)){
+            for (Coord f: state->food()){
+                if (f == new_pos){
+                    s->health = s->max_health;
+                    s->length++;
+                    food_to_delete.push_back(f);
+                }
             }
         }
+        s->hash ^= old_stats ^ s->stats_key();
     }
-    return food_to_delete;
 }
 
 struct DeathRecord {
@@ -304,47 +393,54 @@ struct DeathRecord {
     int killer_id; // -1 if no killer
 };
 
-list<DeathRecord> calculate_deaths(GameState* state){
-    list<DeathRecord> deaths;
+void calculate_deaths(GameState* state, vector<DeathRecord>& deaths){
+    // expects the occupancy of the living snakes to be up-to-date after the move
+    deaths.clear();
     //calculate deaths
-    for (auto s : state->snakes){
+    for (auto s : state->snakes()){
         if (!s->alive) continue;  // What is dead may never die
-        Coord head = s->body.front();
+        Coord head = s->body().front();
         // 1. death by out of bounds
         if (not in_bounds(state, head)) {
             deaths.push_back({s->id, DEATH_WALL, -1});
             continue;
         }
+        int head_idx = head.second * state->w + head.first;
         // 2. death by starvation
         if (s->health <= 0) {
             deaths.push_back({s->id, DEATH_STARVATION, -1});
             continue;
         }
         // 3. self collision
-        if (s->board[head.second * state->w + head.first]){
+        if (s->board().test(head_idx)){
             deaths.push_back({s->id, DEATH_SELF, -1});
             continue;
         }
-        // 4. collision with other snake
-        for (auto other : state->snakes) {
+        // 4. collision with other snake. Only a set bit in the union of all bodies requires a look at the others
+        bool body_hit = state->occupied().test(head_idx);
+        for (auto other : state->snakes()) {
             if(other->id == s->id) continue;  //we do not want to check own body again
             if(not other->alive) continue;  // What is dead may also never kill
             // plain body collision with other snake
-            if(other->board[head.second * state->w + head.first]){
+            if(body_hit and other->board().test(head_idx)){
                 deaths.push_back({s->id, DEATH_BODY, other->id});
                 break;
             }
             //check if heads meet in the middle and current snake lost to other
-            if(head == other->body.front() and s->length <= other->length){
+            if(head == other->body().front() and s->length <= other->length){
                 deaths.push_back({s->id, DEATH_HEAD, other->id});
                 break;
             }
         }
     }
-    return deaths;
 }
 
-void maybe_update_hazards(GameState* state){
+void add_hazard(GameState* state, int idx, UndoStack* undo){
+    if (undo != nullptr and not state->hazards()[idx]) undo->hazards.push_back(idx);
+    state->set_hazard(idx, true);
+}
+
+void maybe_update_hazards(GameState* state, UndoStack* undo){
     if (not state->royale) return;
     if (state->turn < state->shrink_n_turns) return;
     if (state->turn % state->shrink_n_turns != 0) return;
@@ -355,7 +451,7 @@ void maybe_update_hazards(GameState* state){
     int max_y = -1;
     for (int x = 0; x < state->w; x++){
         for (int y = 0; y < state->h; y++){
-            if (not state->hazards[y * state->w + x]){
+            if (not state->hazards()[y * state->w + x]){
                 if (x > max_x) max_x = x;
                 if (x < min_x) min_x = x;
                 if (y > max_y) max_y = y;
@@ -364,75 +460,244 @@ void maybe_update_hazards(GameState* state){
         }
     }
     //determine direction for shrinking and do it
-    int rng = abs((int) gen_utils_gym()) % 4;
+    int rng = (int) (state->rng() % 4);
+    // the board is already covered, the boundaries would index outside of the hazards
+    if (max_x < 0) return;
     if (rng == 0){
         for (int y = 0; y < state->h; y++){
-            state->hazards[y * state->w + min_x] = true;
+            add_hazard(state, y * state->w + min_x, undo);
         }
     } else if (rng == 1){
         for (int y = 0; y < state->h; y++){
-            state->hazards[y * state->w + max_x] = true;
+            add_hazard(state, y * state->w + max_x, undo);
         }
     } else if (rng == 2){
         for (int x = 0; x < state->w; x++){
-            state->hazards[min_y * state->w + x] = true;
+            add_hazard(state, min_y * state->w + x, undo);
         }
     } else {
         for (int x = 0; x < state->w; x++){
-            state->hazards[max_y * state->w + x] = true;
+            add_hazard(state, max_y * state->w + x, undo);
         }
     }
 }
 
-void step(GameState* state, int* actions){
+void step_impl(GameState* state, int* actions, UndoStack* undo){
     /**
      * actions have to be ordered by the id of the snakes
      * See https://docs.battlesnake.com/guides/game/rules
+     * If undo is not nullptr, the changes of the step are recorded in a new frame
      */
+    // scratch buffers are reused across steps to avoid allocations
+    static thread_local vector<Coord> food_to_delete;
+    static thread_local vector<DeathRecord> deaths;
+    if (undo != nullptr){
+        UndoFrame frame;
+        frame.turn = state->turn;
+        frame.rng = state->rng;
+        frame.hash = state->hash;
+        frame.snakes_begin = (int) undo->snakes.size();
+        frame.food_begin = (int) undo->food.size();
+        frame.hazards_begin = (int) undo->hazards.size();
+        frame.num_food_placed = 0;
+        undo->frames.push_back(frame);
+        // dead snakes are never modified by a step
+        for (Snake* s : state->snakes()){
+            if (not s->alive) continue;
+            undo->snakes.push_back({*s, s->body().back()});
+            Bitboard b = s->board();
+            undo->boards.insert(undo->boards.end(), b.words, b.words + b.num_words);
+        }
+    }
     //move snakes and apply damage
-    list<Coord> food_to_delete = move_snakes(state, actions);
-    // remove food from board (keep food_spawn_turns in sync)
+    move_snakes(state, actions, food_to_delete);
+    // remove food from board (keeps food_spawn_turns in sync)
     for (Coord f: food_to_delete){
-        auto fit = state->food.begin();
-        auto tit = state->food_spawn_turns.begin();
-        while (fit != state->food.end()) {
-            if (*fit == f) {
-                state->food.erase(fit);
-                state->food_spawn_turns.erase(tit);
+        Span<Coord> food = state->food();
+        for (int i = 0; i < food.size(); i++){
+            if (food[i] == f){
+                if (undo != nullptr) undo->food.push_back({i, f, state->food_spawn_turns()[i]});
+                state->remove_food(i);
                 break;
             }
-            ++fit;
-            ++tit;
         }
     }
     //place new food
+    int num_food_before = state->num_food;
     place_food_randomly(state);
+    if (undo != nullptr) undo->frames.back().num_food_placed = state->num_food - num_food_before;
     //calculate deaths
-    list<DeathRecord> deaths = calculate_deaths(state);
+    state->update_occupied();
+    calculate_deaths(state, deaths);
     //kill snakes
     for (const DeathRecord& d : deaths){
-        Snake* s = state->snakes.at(d.snake_id);
+        Snake* s = state->snake(d.snake_id);
         s->alive = false;
+        s->hash ^= zobrist_key(ZOBRIST_ALIVE, s->id, 0, 0);
         s->death_cause = d.cause;
         s->death_turn = state->turn;
         s->killer_id = d.killer_id;
     }
     //draw new heads of live snakes
-    for (auto &s : state->snakes){
+    for (Snake* s : state->snakes()){
         if (s->alive){
-            Coord head = s->body.front();
-            s->board[head.second * state->w + head.first] = true;
+            Coord head = s->body().front();
+            s->board().set(head.second * state->w + head.first);
         }
     }
+    state->update_occupied();
     //increase turn counter
     state->turn += 1;
+    state->hash ^= zobrist_key(ZOBRIST_PARITY, -1, 0, 0);
     //draw new hazards
-    maybe_update_hazards(state);
+    maybe_update_hazards(state, undo);
+}
+
+bool snake_at_turn(GameState* state, int snake_id){
+    Snake* s = state->snake(snake_id);
+    if (not s->alive) return false;
+    if (state->all_actions_legal) return true;
+    int legal[4];
+    legal_actions(state, snake_id, legal);
+    return legal[0] or legal[1] or legal[2] or legal[3];
+}
+
+void prevent_draw(GameState* state, int* actions){
+    /**
+     * If the last two snakes at turn would both be eliminated, one of them is chosen uniformly and yields by
+     * replacing its action with a random action that does not eliminate it. The other snake keeps its action, such
+     * that the win chances of both snakes do not change in repeated games. Actions are modified in place and the
+     * choices are drawn from the random stream of the state.
+     */
+    int players[2];
+    int num_at_turn = 0;
+    for (Snake* s: state->snakes()){
+        if (not snake_at_turn(state, s->id)) continue;
+        if (num_at_turn == 2) return;
+        players[num_at_turn++] = s->id;
+    }
+    if (num_at_turn != 2) return;
+    GameState* trial = clone(state);
+    step_impl(trial, actions, nullptr);
+    bool is_draw = not snake_at_turn(trial, players[0]) and not snake_at_turn(trial, players[1]);
+    close(trial);
+    if (not is_draw) return;
+    int yield_player = players[state->rng() % 2];
+    int original = actions[yield_player];
+    int legal[4] = {1, 1, 1, 1};
+    if (not state->all_actions_legal) legal_actions(state, yield_player, legal);
+    int alternatives[4];
+    int num_alternatives = 0;
+    for (int a = 0; a < 4; a++){
+        if (a == original or not legal[a]) continue;
+        actions[yield_player] = a;
+        trial = clone(state);
+        step_impl(trial, actions, nullptr);
+        if (snake_at_turn(trial, yield_player)) alternatives[num_alternatives++] = a;
+        close(trial);
+    }
+    actions[yield_player] = num_alternatives > 0 ? alternatives[state->rng() % num_alternatives] : original;
+}
+
+void undo_clear(GameState* state){
+    // frames are discarded, but the capacity of the stack is kept for later calls of step_undoable
+    UndoStack* undo = state->undo_stack;
+    if (undo == nullptr) return;
+    undo->frames.clear();
+    undo->snakes.clear();
+    undo->boards.clear();
+    undo->food.clear();
+    undo->hazards.clear();
+}
+
+void step(GameState* state, int* actions){
+    // a regular step invalidates all frames recorded before
+    undo_clear(state);
+    if (state->draw_prevention) prevent_draw(state, actions);
+    step_impl(state, actions, nullptr);
+}
+
+void step_undoable(GameState* state, int* actions){
+    if (state->undo_stack == nullptr) state->undo_stack = new UndoStack();
+    // the random stream is restored to its state before the choices of the draw prevention
+    StateRng rng = state->rng;
+    if (state->draw_prevention) prevent_draw(state, actions);
+    step_impl(state, actions, state->undo_stack);
+    state->undo_stack->frames.back().rng = rng;
+}
+
+bool undo(GameState* state){
+    UndoStack* undo = state->undo_stack;
+    if (undo == nullptr or undo->frames.empty()) return false;
+    UndoFrame frame = undo->frames.back();
+    undo->frames.pop_back();
+    // hazards
+    for (int i = frame.hazards_begin; i < (int) undo->hazards.size(); i++){
+        state->set_hazard(undo->hazards[i], false);
+    }
+    undo->hazards.resize(frame.hazards_begin);
+    // food, placed food was appended at the end and eaten food is inserted again in reverse order
+    for (int i = 0; i < frame.num_food_placed; i++){
+        state->remove_food(state->num_food - 1);
+    }
+    for (int i = (int) undo->food.size() - 1; i >= frame.food_begin; i--){
+        const FoodUndo& f = undo->food[i];
+        state->insert_food(f.idx, f.pos, f.spawn_turn);
+    }
+    undo->food.resize(frame.food_begin);
+    // snakes
+    int num_words = state->board_words;
+    for (int i = frame.snakes_begin; i < (int) undo->snakes.size(); i++){
+        const SnakeUndo& entry = undo->snakes[i];
+        Snake* s = state->snake(entry.record.id);
+        *s = entry.record;
+        s->body().back() = entry.tail;
+        const uint64_t* words = undo->boards.data() + (int64_t) i * num_words;
+        memcpy(s->board().words, words, num_words * sizeof(uint64_t));
+    }
+    undo->snakes.resize(frame.snakes_begin);
+    undo->boards.resize((int64_t) frame.snakes_begin * num_words);
+    state->update_occupied();
+    state->turn = frame.turn;
+    state->rng = frame.rng;
+    state->hash = frame.hash;
+    return true;
+}
+
+uint64_t state_hash(GameState* state){
+    uint64_t result = state->hash;
+    for (Snake* s: state->snakes()) result ^= s->hash;
+    return result;
 }
 
+void recompute_hash(GameState* state){
+    // hash of all features from scratch, which equals the incrementally maintained hash
+    state->hash = state->turn % 2 != 0 ? zobrist_key(ZOBRIST_PARITY, -1, 0, 0) : 0;
+    for (int y = 0; y < state->h; y++){
+        for (int x = 0; x < state->w; x++){
+            int idx = y * state->w + x;
+            if (state->food_board().test(idx)) state->hash ^= zobrist_key(ZOBRIST_FOOD, -1, x, y);
+            if (state->hazards()[idx]) state->hash ^= zobrist_key(ZOBRIST_HAZARD, -1, x, y);
+        }
+    }
+    for (Snake* s: state->snakes()){
+        s->hash = s->stats_key();
+        if (s->alive) s->hash ^= zobrist_key(ZOBRIST_ALIVE, s->id, 0, 0);
+        for (Coord c: s->body()) s->hash ^= zobrist_key(ZOBRIST_BODY, s->id, c.first, c.second);
+        if (s->body_size > 0){
+            Coord head = s->body().front();
+            s->hash ^= zobrist_key(ZOBRIST_HEAD, s->id, head.first, head.second);
+        }
+    }
+}
+
+int undo_depth(GameState* state){
+    if (state->undo_stack == nullptr) return 0;
+    return (int) state->undo_stack->frames.size();
+}
 
 void legal_actions(GameState* state, int snake_id, int* actions){
-    Coord head = state->snakes.at(snake_id)->body.front();
+    Coord head = state->snake(snake_id)->body().front();
     for(int i = 0; i < 4; i++){
         Coord new_head = new_position(head, i, state);
         //check for out of bounds
@@ -440,13 +705,16 @@ void legal_actions(GameState* state, int snake_id, int* actions){
             actions[i] = 0;
             continue;
         }
-        //body collisions
+        int idx = new_head.second * state->w + new_head.first;
+        //body collisions, only a set bit in the union of all bodies requires a look at the single snakes
         bool collision = false;
-        for (auto &s : state->snakes){
+        bool body_hit = state->occupied().test(idx);
+        for (Snake* s : state->snakes()){
+            if(not body_hit) break;
             if(not s->alive) continue;
-            if(s->board[new_head.second * state->w + new_head.first]){
+            if(s->board().test(idx)){
                 //check if tail would move out of the way next round
-                if(s->body.back() != new_head or s->length > (int)(s->body.size())){
+                if(s->body().back() != new_head or s->length > s->body_size){
                     actions[i] = 0;
                     collision = true;
                     break;
@@ -454,21 +722,15 @@ void legal_actions(GameState* state, int snake_id, int* actions){
             }
         }
         //check if you would die out of health
-        bool is_food = false;
-        for (Coord f: state->food){  // if there is food, you cannot die out of health
-            if (f == new_head){
-                is_food = true;
-                break;
-            }
-        }
+        bool is_food = state->food_board().test(idx);  // if there is food, you cannot die out of health
         //if the snake has only one health and does not consume food, it dies
-        int cur_health = state->snakes.at(snake_id)->health;
+        int cur_health = state->snake(snake_id)->health;
         if (not is_food and cur_health == 1){
             actions[i] = 0;
             continue;
         }
         //if there is a hazard, check for death by damage
-        if (not is_food and state->hazards[new_head.second * state->w + new_head.first]
+        if (not is_food and state->hazards()[idx]
                 and cur_health <= state->hazard_damage + 1){
             actions[i] = 0;
             continue;
@@ -479,3 +741,44 @@ void legal_actions(GameState* state, int snake_id, int* actions){
     }
 }
 
+
+
+int players_at_turn(GameState* state, bool* at_turn){
+    // a snake is at turn if it is alive and has at least one legal action
+    int num_at_turn = 0;
+    int actions[4];
+    for (Snake* s: state->snakes()){
+        bool cur_at_turn = s->alive;
+        if (cur_at_turn and not state->all_actions_legal){
+            legal_actions(state, s->id, actions);
+            cur_at_turn = actions[0] or actions[1] or actions[2] or actions[3];
+        }
+        at_turn[s->id] = cur_at_turn;
+        num_at_turn += cur_at_turn;
+    }
+    return num_at_turn;
+}
+
+int legal_action_mask(GameState* state, bool* mask){
+    // rows of dead snakes are false, returns the number of snakes at turn
+    int num_at_turn = 0;
+    int actions[4];
+    for (Snake* s: state->snakes()){
+        bool* row = mask + 4 * s->id;
+        bool cur_at_turn = false;
+        for (int a = 0; a < 4; a++) actions[a] = s->alive;
+        if (s->alive and not state->all_actions_legal) legal_actions(state, s->id, actions);
+        for (int a = 0; a < 4; a++){
+            row[a] = actions[a];
+            cur_at_turn = cur_at_turn or row[a];
+        }
+        num_at_turn += cur_at_turn;
+    }
+    return num_at_turn;
+}
+
+bool is_terminal(GameState* state, int num_at_turn){
+    // a game has ended if no / only the last player alive is at turn
+    if (state->num_snakes == 1) return num_at_turn == 0;
+    return num_at_turn <= 1;
+}
@@ -4,19 +4,15 @@
 
 #include "../header/battlesnake.h"
 #include "../header/battlesnake_helper.h"
+#include "../header/encoding_cache.h"
 
 #include <random>
 #include <algorithm>
 #include <cstdlib>
+#include <cstring>
+#include <limits>
 
-random_device rd_utils;
-mt19937 gen_utils(rd_utils());
-
-void set_seed_utils(int seed){
-    gen_utils.seed(seed);
-}
-
-deque<Coord> spawn_randomly(int w, int num_snakes){
+deque<Coord> spawn_randomly(int w, int num_snakes, StateRng& rng){
     //mn, md, mx := 1, (b.Width-1)/2, b.Width-2
     int mx = w - 2;
     int md = (w - 1) / 2;
@@ -51,11 +47,11 @@ deque<Coord> spawn_randomly(int w, int num_snakes){
         available_spawns_side.emplace_back(mx, md);
     }
 
-    std::shuffle(available_spawns_corner.begin(), available_spawns_corner.end(), gen_utils);
-    std::shuffle(available_spawns_side.begin(), available_spawns_side.end(), gen_utils);
+    std::shuffle(available_spawns_corner.begin(), available_spawns_corner.end(), rng);
+    std::shuffle(available_spawns_side.begin(), available_spawns_side.end(), rng);
 
     //decide to fill corner or sides first
-    unsigned random = abs((int)gen_utils());
+    unsigned random = rng();
     bool corner_first = random % 2;
     int counter = 0;
     deque<Coord> result;
@@ -99,7 +95,7 @@ deque<deque<Coord>> spawn_on_pos(const int* pos, const int* snake_body_lengths,
 }
 
 
-list<Coord> initialize_food(int w, int num_snakes, const vector<Coord>& snake_spawns){
+list<Coord> initialize_food(int w, int num_snakes, const vector<Coord>& snake_spawns, StateRng& rng){
     list<Coord> food;
     //one food is always in the middle
     int mid = (w - 1) / 2;
@@ -157,7 +153,7 @@ list<Coord> initialize_food(int w, int num_snakes, const vector<Coord>& snake_sp
         }
         if (!valid_coords.empty()){
             // choose one random valid position
-            unsigned index = abs((int)gen_utils()) % valid_coords.size();
+            unsigned index = rng() % valid_coords.size();
             food.push_back(valid_coords[index]);
         }
     }
@@ -199,21 +195,21 @@ bool in_bounds(GameState* state, Coord pos){
 
 vector<int> possible_food_spawns(GameState* state){
     vector<int> food_spawns(state->w*state->h, true);
-    for(auto& s: state->snakes){
+    for (Snake* s: state->snakes()){
         if(not s->alive) continue;
         //food cannot spawn on top of body, except tail after it moved
-        for(auto c: s->body){
+        for(auto c: s->body()){
             if(in_bounds(state, c)){
                 food_spawns[c.second * state->w + c.first] = false;
             }
         }
         //include tail if it stays in place after move
-        if(s->length > (int)s->body.size()){
-            Coord tail = s->body.back();
+        if(s->length > (int)s->body().size()){
+            Coord tail = s->body().back();
             food_spawns[tail.second * state->w + tail.first] = false;
         }
         //food cannot spawn directly in front of snake
-        Coord head = s->body.front();
+        Coord head = s->body().front();
         for(int a = 0; a < 4; a++){
             Coord new_pos = new_position(head, a, state);
             if(in_bounds(state, new_pos)){
@@ -222,7 +218,7 @@ vector<int> possible_food_spawns(GameState* state){
         }
     }
     //food cannot spawn on top of existing food
-    for(auto c: state->food){
+    for(auto c: state->food()){
         food_spawns[c.second * state->w + c.first] = false;
     }
     return food_spawns;
@@ -230,14 +226,14 @@ vector<int> possible_food_spawns(GameState* state){
 
 
 void place_food_randomly(GameState* state) {
-    int num_food = (int) (state->food.size());
+    int num_food = (int) (state->num_food);
     int n_to_place = 0;
     //place the minimum amount of food
     if (num_food < state->min_food){
         n_to_place = state->min_food - num_food;
     }
     //randomly decide if to add another food
-    if (((int) (abs((int)gen_utils()) % 100)) < state->food_spawn_chance){
+    if ((int) (state->rng() % 100) < state->food_spawn_chance){
         n_to_place++;
     }
     //all possible positions
@@ -254,7 +250,7 @@ void place_food_randomly(GameState* state) {
     if(num_food_spawns == 0) return;
     for (int i = 0; i < n_to_place; i++){
         // get random food spawn
-        int rng = (int)(abs((int)gen_utils()) % num_food_spawns);
+        int rng = (int) (state->rng() % num_food_spawns);
         int counter = 0;
         for(int j = 0; j < (int)food_spawns.size(); j++){
             if(food_spawns[j]){
@@ -262,8 +258,7 @@ void place_food_randomly(GameState* state) {
                     // convert index to Coord
                     int x = j % state->w;
                     int y = j / state->w;
-                    state->food.emplace_back(x, y);
-                    state->food_spawn_turns.push_back(state->turn + 1);
+                    state->add_food(Coord(x, y), state->turn + 1);
                     food_spawns[j] = 0;
                     num_food_spawns--;
                     break;
@@ -280,23 +275,23 @@ void place_food_randomly(GameState* state) {
 vector<int> human_repr(GameState* state){
     vector<int> board(state->w * state->h, 0);
     //snake bodies marked with amount of time to live
-    for (auto& s: state->snakes){
+    for (Snake* s: state->snakes()){
         if (not s->alive) continue;
-        int n = (int) s->body.size();
+        int n = (int) s->body().size();
         for(int i = 1; i < n; i++){
-            Coord c = s->body[i];
+            Coord c = s->body()[i];
             board[c.second * state->w + c.first] = s->length-i;
         }
         //mark head separately with -1
-        board[s->body.front().second * state->w + s->body.front().first] = -1;
+        board[s->body().front().second * state->w + s->body().front().first] = -1;
     }
     //food marked with -2
-    for (Coord c: state->food){
+    for (Coord c: state->food()){
         board[c.second * state->w + c.first] = -2;
     }
     //hazards marked with -3
     for (int i = 0; i < state->w * state->h; i++){
-        if (board[i] == 0 and state->hazards[i]){
+        if (board[i] == 0 and state->hazards()[i]){
             board[i] = -3;
         }
     }
@@ -352,6 +347,12 @@ bool in_encoding_bounds(
 }
 
 
+void set_cell(float* arr, int idx, float value, vector<int>* written){
+    arr[idx] = value;
+    if (written != nullptr) written->push_back(idx);
+}
+
+
 //this should only be called if encoding is centered and wrapped mode used
 void all_tilings(
         float* arr,
@@ -362,41 +363,42 @@ void all_tilings(
         int z,
         int x_dim,
         int y_dim,
-        int z_dim
+        int z_dim,
+        vector<int>* written
 ){
     //iterate all tilings, center:
-    arr[arr_idx(x, y, z, y_dim, z_dim)] = value;
+    set_cell(arr, arr_idx(x, y, z, y_dim, z_dim), value, written);
     //left
     if (in_encoding_bounds(x - state->w, y, x_dim, y_dim)){
-        arr[arr_idx(x - state->w, y, z, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x - state->w, y, z, y_dim, z_dim), value, written);
     }
     //right
     if (in_encoding_bounds(x + state->w, y, x_dim, y_dim)){
-        arr[arr_idx(x + state->w, y, z, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x + state->w, y, z, y_dim, z_dim), value, written);
     }
     //up
     if (in_encoding_bounds(x, y + state->h, x_dim, y_dim)){
-        arr[arr_idx(x, y + state->h, z, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x, y + state->h, z, y_dim, z_dim), value, written);
     }
     //down
     if (in_encoding_bounds(x, y - state->h, x_dim, y_dim)){
-        arr[arr_idx(x, y - state->h, z, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x, y - state->h, z, y_dim, z_dim), value, written);
     }
     //left up
     if (in_encoding_bounds(x - state->w, y + state->h, x_dim, y_dim)){
-        arr[arr_idx(x - state->w, y + state->h, z, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x - state->w, y + state->h, z, y_dim, z_dim), value, written);
     }
     //left down
     if (in_encoding_bounds(x - state->w, y - state->h, x_dim, y_dim)){
-        arr[arr_idx(x - state->w, y - state->h, z, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x - state->w, y - state->h, z, y_dim, z_dim), value, written);
     }
     //right up
     if (in_encoding_bounds(x + state->w, y + state->h, x_dim, y_dim)){
-        arr[arr_idx(x + state->w, y + state->h, z, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x + state->w, y + state->h, z, y_dim, z_dim), value, written);
     }
     //right down
     if (in_encoding_bounds(x - state->w, y - state->h, x_dim, y_dim)){
-        arr[arr_idx(x - state->w, y - state->h, z, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x - state->w, y - state->h, z, y_dim, z_dim), value, written);
     }
 }
 
@@ -427,12 +429,13 @@ void write_arr(
         int z_dim,
         int layer_id,
         bool wrapped,
-        bool centered
+        bool centered,
+        vector<int>* written = nullptr  // records the written cells if not null
 ){
     if (not wrapped or not centered) {
-        arr[arr_idx(x, y, layer_id, y_dim, z_dim)] = value;
+        set_cell(arr, arr_idx(x, y, layer_id, y_dim, z_dim), value, written);
     } else {
-        all_tilings(arr, state, value, x, y, layer_id, x_dim, y_dim, z_dim);
+        all_tilings(arr, state, value, x, y, layer_id, x_dim, y_dim, z_dim, written);
     }
 }
 
@@ -448,12 +451,59 @@ void fill_body(
         bool wrapped,
         bool centered,
         int x_off,
-        int y_off
+        int y_off,
+        vector<int>* written = nullptr
 ){
-    Snake* sp = state->snakes.at(snake_id);
-    for (auto p: sp->body) {
+    Snake* sp = state->snake(snake_id);
+    for (auto p: sp->body()) {
         if (not in_bounds(state, p)) continue;
-        write_arr(state, arr, value, p.first+x_off, p.second+y_off, x_dim, y_dim, z_dim, layer_id, wrapped, centered);
+        write_arr(state, arr, value, p.first+x_off, p.second+y_off, x_dim, y_dim, z_dim, layer_id, wrapped, centered,
+                  written);
+    }
+}
+
+// Fills a layer with a constant value. The cache skips the fill if the layer already holds the value
+void fill_layer_cached(
+        float* arr,
+        float value,
+        int x_dim,
+        int y_dim,
+        int z_dim,
+        int layer_id,
+        PlayerEncodingCache* cache
+){
+    if (cache != nullptr){
+        if (cache->layer_values[layer_id] == value) return;
+        cache->layer_values[layer_id] = value;
+    }
+    fill_layer(arr, value, x_dim, y_dim, z_dim, layer_id);
+}
+
+// Board layer of a cache with a valid previous encoding. The playable rectangle only moves with the offsets, so
+// only the cells that left or entered the rectangle are changed.
+void move_board_layer(
+        GameState* state,
+        float* arr,
+        int old_x_off,
+        int old_y_off,
+        int x_off,
+        int y_off,
+        int x_dim,
+        int y_dim,
+        int z_dim,
+        int layer_id
+){
+    for (int x = 0; x < x_dim; x++){
+        int old_lo = old_y_off, old_hi = old_y_off + state->h;
+        if (x < old_x_off or x >= old_x_off + state->w) old_hi = old_lo;  // column outside of the old rectangle
+        int lo = y_off, hi = y_off + state->h;
+        if (x < x_off or x >= x_off + state->w) hi = lo;
+        // old cells outside of the new interval become blocked
+        for (int y = old_lo; y < min(old_hi, lo); y++) arr[arr_idx(x, y, layer_id, y_dim, z_dim)] = -1.0;
+        for (int y = max(old_lo, hi); y < old_hi; y++) arr[arr_idx(x, y, layer_id, y_dim, z_dim)] = -1.0;
+        // new cells outside of the old interval become playable
+        for (int y = lo; y < min(hi, old_lo); y++) arr[arr_idx(x, y, layer_id, y_dim, z_dim)] = 1.0;
+        for (int y = max(lo, old_hi); y < hi; y++) arr[arr_idx(x, y, layer_id, y_dim, z_dim)] = 1.0;
     }
 }
 
@@ -482,7 +532,8 @@ void construct_custom_encoding(
         float fixed_food_spawn_chance,
         bool include_temperatures,
         bool single_temperature,
-        const float* temperatures
+        const float* temperatures,
+        PlayerEncodingCache* cache
 ) {
     // arr[x*y_dim*z_dim + y*z_dim + z] = value; <- convert 3d coordinate to flattened index
     // Calculate the dimensions of the state
@@ -516,7 +567,7 @@ void construct_custom_encoding(
     int x_off;
     int y_off;
     if (centered){
-        Coord pos = state->snakes.at(player_snake)->body.front();
+        Coord pos = state->snake(player_snake)->body().front();
         x_off = state->w - pos.first - 1;
         y_off = state->h - pos.second - 1;
     } else {
@@ -527,6 +578,17 @@ void construct_custom_encoding(
             y_off = 0;
         }
     }
+    // the cache holds the previous encoding in arr. Sparse cells are reset, constant and static layers are only
+    // written if they changed
+    vector<int>* written = nullptr;
+    if (cache != nullptr){
+        if (not cache->valid) cache->layer_values.assign(z_dim, numeric_limits<float>::quiet_NaN());
+        for (int idx: cache->written) arr[idx] = 0.0;
+        cache->written.clear();
+        written = &cache->written;
+    }
+    bool static_valid = cache != nullptr and cache->valid;
+    bool offsets_moved = not static_valid or cache->x_off != x_off or cache->y_off != y_off;
     //precompute area control for all snakes
     auto* area_control_arr = (float*) calloc(state->num_snakes, sizeof(float));
     int* food_distance_arr = (int*) calloc(state->num_snakes, sizeof(int));
@@ -539,7 +601,7 @@ void construct_custom_encoding(
     }
     //precompute max length
     int max_length = 0;
-    for (Snake* s: state->snakes){
+    for (Snake* s: state->snakes()){
         if (s->length > max_length) max_length = s->length;
     }
 
@@ -547,8 +609,9 @@ void construct_custom_encoding(
     int layer_id = 0;
     // Food layer
     if (include_current_food) {
-        for (auto p: state->food){
-            write_arr(state, arr, 1.0, p.first+x_off, p.second+y_off, x_dim, y_dim, z_dim, layer_id, wrapped, centered);
+        for (auto p: state->food()){
+            write_arr(state, arr, 1.0, p.first+x_off, p.second+y_off, x_dim, y_dim, z_dim, layer_id, wrapped, centered,
+                      written);
         }
         layer_id++;
     }
@@ -570,14 +633,20 @@ void construct_custom_encoding(
         for(int x = 0; x < state->w; x++){
             for(int y = 0; y < state->h; y++){
                 if(food_spawns[y * state->w + x]){
-                    write_arr(state, arr, prob, x+x_off, y+y_off, x_dim, y_dim, z_dim, layer_id, wrapped, centered);
+                    write_arr(state, arr, prob, x+x_off, y+y_off, x_dim, y_dim, z_dim, layer_id, wrapped, centered,
+                              written);
                 }
             }
         }
         layer_id++;
     }
     // Board layer
-    if (include_board) {
+    if (include_board and static_valid) {
+        if (offsets_moved){
+            move_board_layer(state, arr, cache->x_off, cache->y_off, x_off, y_off, x_dim, y_dim, z_dim, layer_id);
+        }
+        layer_id++;
+    } else if (include_board) {
         for (int x = 0; x < x_dim; x++){
             for (int y = 0; y < y_dim; y++){
                 if (x >= x_off and y >= y_off and x < x_off+state->w and y < y_off+state->h){
@@ -594,41 +663,62 @@ void construct_custom_encoding(
     // Number of turns layer
     if (include_number_of_turns) {
         auto value = (float) (state->turn / 100.0);
-        fill_layer(arr, value, x_dim, y_dim, z_dim, layer_id);
+        fill_layer_cached(arr, value, x_dim, y_dim, z_dim, layer_id, cache);
         layer_id++;
     }
     //distance map layer
     if (include_dist_map) {
         auto max_dist = (float) (state->w + state->h - 2);
-        Coord head = state->snakes.at(player_snake)->body.front();
-        for(int x = 0; x < x_dim; x++){
-            for(int y = 0; y < y_dim; y++){
-                auto dist = (float) (std::abs(x - x_off - head.first) + std::abs(y - y_off - head.second));
-                arr[arr_idx(x, y, layer_id, y_dim, z_dim)] = dist / max_dist;
+        Coord head = state->snake(player_snake)->body().front();
+        // the centered distance map does not depend on the position of the head
+        if (not static_valid or (not centered and cache->head != head)){
+            for(int x = 0; x < x_dim; x++){
+                for(int y = 0; y < y_dim; y++){
+                    auto dist = (float) (std::abs(x - x_off - head.first) + std::abs(y - y_off - head.second));
+                    arr[arr_idx(x, y, layer_id, y_dim, z_dim)] = dist / max_dist;
+                }
             }
         }
+        if (cache != nullptr) cache->head = head;
         layer_id++;
     }
     //hazard layer
-    if (include_hazards){
+    if (include_hazards and cache == nullptr){
         for(int x = 0; x < state->w; x++){
             for(int y = 0; y < state->h; y++){
-                float value = (float) (state->hazards[y * state->w + x]);
+                float value = (float) (state->hazards()[y * state->w + x]);
                 write_arr(state, arr, value, x+x_off, y+y_off, x_dim, y_dim, z_dim, layer_id, wrapped, centered);
             }
         }
         layer_id++;
+    } else if (include_hazards){
+        // hazards only change in the shrink turns of royale mode
+        int num_cells = state->w * state->h;
+        if (offsets_moved or memcmp(cache->hazards.data(), state->hazards(), num_cells) != 0){
+            for (int idx: cache->hazard_written) arr[idx] = 0.0;
+            cache->hazard_written.clear();
+            for(int x = 0; x < state->w; x++){
+                for(int y = 0; y < state->h; y++){
+                    float value = (float) (state->hazards()[y * state->w + x]);
+                    if (value == 0) continue;
+                    write_arr(state, arr, value, x+x_off, y+y_off, x_dim, y_dim, z_dim, layer_id, wrapped, centered,
+                              &cache->hazard_written);
+                }
+            }
+            cache->hazards.assign(state->hazards(), state->hazards() + num_cells);
+        }
+        layer_id++;
     }
     //number of food on board layer
     if (include_num_food_on_board){
-        auto num_food =  (float) (((float) state->food.size()) / 10.0);
-        fill_layer(arr, num_food, x_dim, y_dim, z_dim, layer_id);
+        auto num_food =  (float) (((float) state->num_food) / 10.0);
+        fill_layer_cached(arr, num_food, x_dim, y_dim, z_dim, layer_id, cache);
         layer_id++;
     }
     // temperature layer (if single temperature provided)
     if (include_temperatures and single_temperature){
         float single_temp = temperatures[0] / (float) 10.0;
-        fill_layer(arr, single_temp, x_dim, y_dim, z_dim, layer_id);
+        fill_layer_cached(arr, single_temp, x_dim, y_dim, z_dim, layer_id, cache);
         layer_id++;
     }
     // Snake layers
@@ -637,50 +727,57 @@ void construct_custom_encoding(
         // Skip the player snake since we already added it in the first iteration
         if (s == player_snake and not first_iteration) continue;
         // process enemy snakes
-        Snake* snake = state->snakes.at(s);
+        Snake* snake = state->snake(s);
         if(not snake->alive) {
-            if (not flatten_snakes) layer_id += enemy_snake_layers;
+            if (not flatten_snakes){
+                // constant layers of the cache may still hold the values of the snake
+                for (int l = 0; cache != nullptr and l < enemy_snake_layers; l++){
+                    fill_layer_cached(arr, 0.0, x_dim, y_dim, z_dim, layer_id + l, cache);
+                }
+                layer_id += enemy_snake_layers;
+            }
             continue;
         }
         // Snake body layer
         if (include_snake_body) {
             auto body_counter = (float) snake->length;
             float decrement = 1.0;
-            for(auto p: snake->body){
+            for(auto p: snake->body()){
                 if (not in_bounds(state, p)) continue;
                 auto value = (float) (body_counter / 10.0);
                 write_arr(state, arr, value, p.first+x_off, p.second+y_off, x_dim, y_dim, z_dim, layer_id,
-                          wrapped, centered);
+                          wrapped, centered, written);
                 body_counter -= decrement;
             }
             layer_id++;
         }
         //snake body one hot
         if (include_snake_body_as_one_hot) {
-            fill_body(state, arr, s, 1.0, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off);
+            fill_body(state, arr, s, 1.0, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off, written);
             layer_id++;
         }
         // Snake head layer
         if (include_snake_head) {
-            Coord head = snake->body.front();
+            Coord head = snake->body().front();
             write_arr(state, arr, 1.0, head.first+x_off, head.second+y_off, x_dim, y_dim, z_dim, layer_id,
-                      wrapped, centered);
+                      wrapped, centered, written);
             layer_id++;
         }
         // Snake tail layer
         if (include_snake_tail) {
-            Coord tail = snake->body.back();
+            Coord tail = snake->body().back();
             write_arr(state, arr, 1.0, tail.first+x_off, tail.second+y_off, x_dim, y_dim, z_dim, layer_id,
-                      wrapped, centered);
+                      wrapped, centered, written);
             layer_id++;
         }
         //health
         if (include_snake_health){
             auto value = (float) (snake->health / 100.0);
             if (not flatten_snakes or s == player_snake){
-                fill_layer(arr, value, x_dim, y_dim, z_dim, layer_id);
+                fill_layer_cached(arr, value, x_dim, y_dim, z_dim, layer_id, cache);
             } else {
-                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off);
+                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off,
+                          written);
             }
             layer_id++;
         }
@@ -688,9 +785,10 @@ void construct_custom_encoding(
         if (include_snake_length){
             auto value = (float) ((snake->length - max_length) / 5.0);
             if (not flatten_snakes or s == player_snake){
-                fill_layer(arr, value, x_dim, y_dim, z_dim, layer_id);
+                fill_layer_cached(arr, value, x_dim, y_dim, z_dim, layer_id, cache);
             } else {
-                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off);
+                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off,
+                          written);
             }
             layer_id++;
         }
@@ -698,9 +796,10 @@ void construct_custom_encoding(
         if (include_area_control){
             auto value = (float) (((float) area_control_arr[s]) / ((float) state->w * (float) state->h));
             if (not flatten_snakes or s == player_snake){
-                fill_layer(arr, value, x_dim, y_dim, z_dim, layer_id);
+                fill_layer_cached(arr, value, x_dim, y_dim, z_dim, layer_id, cache);
             } else {
-                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off);
+                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off,
+                          written);
             }
             layer_id++;
         }
@@ -708,9 +807,10 @@ void construct_custom_encoding(
         if (include_food_distance){
             auto value = (float) (((float) food_distance_arr[s]) / ((float) state->w + (float) state->h));
             if (not flatten_snakes or s == player_snake){
-                fill_layer(arr, value, x_dim, y_dim, z_dim, layer_id);
+                fill_layer_cached(arr, value, x_dim, y_dim, z_dim, layer_id, cache);
             } else {
-                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off);
+                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off,
+                          written);
             }
             layer_id++;
         }
@@ -718,9 +818,10 @@ void construct_custom_encoding(
         if (include_tail_distance){
             auto value = (float) (((float) tail_distance_arr[s]) / ((float) state->w + (float) state->h));
             if (not flatten_snakes or s == player_snake){
-                fill_layer(arr, value, x_dim, y_dim, z_dim, layer_id);
+                fill_layer_cached(arr, value, x_dim, y_dim, z_dim, layer_id, cache);
             } else {
-                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off);
+                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off,
+                          written);
             }
             layer_id++;
         }
@@ -728,9 +829,10 @@ void construct_custom_encoding(
         if (include_temperatures and not single_temperature and s != player_snake){
             float value = temperatures[s] / (float) 10.0;
             if (flatten_snakes){
-                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off);
+                fill_body(state, arr, s, value, x_dim, y_dim, z_dim, layer_id, wrapped, centered, x_off, y_off,
+                          written);
             } else {
-                fill_layer(arr, value, x_dim, y_dim, z_dim, layer_id);
+                fill_layer_cached(arr, value, x_dim, y_dim, z_dim, layer_id, cache);
             }
             layer_id++;
         }
@@ -743,6 +845,11 @@ void construct_custom_encoding(
             layer_id -= enemy_snake_layers;
         }
     }
+    if (cache != nullptr){
+        cache->valid = true;
+        cache->x_off = x_off;
+        cache->y_off = y_off;
+    }
     //free memory
     free(area_control_arr);
     free(food_distance_arr);
@@ -754,70 +861,58 @@ void construct_custom_encoding(
 
 bool equals(GameState* state1, GameState* state2){
 //    if (state1 == state2) return true;
-    if (state1->turn != state2->turn) return false;
     if (state1->w != state2->w) return false;
     if (state1->h != state2->h) return false;
     if (state1->num_snakes != state2->num_snakes) return false;
+    // equal states always have equal hashes, which rules out most unequal states without looking at the bodies
+    if (state_hash(state1) != state_hash(state2)) return false;
+    if (state1->turn != state2->turn) return false;
     if (state1->min_food != state2->min_food) return false;
     if (state1->food_spawn_chance != state2->food_spawn_chance) return false;
-    if (state1->food.size() != state2->food.size()) return false;
+    if (state1->num_food != state2->num_food) return false;
     // check if food is equal. Can be in different order
-    for (Coord c1: state1->food){
-        bool exists = false;
-        for (Coord c2: state2->food){
-            if (c1 == c2){
-                exists = true;
-                break;
-            }
-        }
-        if (not exists) return false;
-    }
-    for (Coord c2: state2->food){
-        bool exists = false;
-        for (Coord c1: state1->food){
-            if (c1 == c2){
-                exists = true;
-                break;
-            }
-        }
-        if (not exists) return false;
+    Bitboard food1 = state1->food_board();
+    Bitboard food2 = state2->food_board();
+    for (int i = 0; i < food1.num_words; i++){
+        if (food1.words[i] != food2.words[i]) return false;
     }
+    if (memcmp(state1->hazards(), state2->hazards(), state1->w * state1->h) != 0) return false;
     // check if snakes are equal
-    if (state1->snakes.size() != state2->snakes.size()) return false;
-    for (const auto s1: state1->snakes){
-        Snake* s2 = state2->snakes.at(s1->id);
+    if (state1->snakes().size() != state2->snakes().size()) return false;
+    for (const auto s1: state1->snakes()){
+        Snake* s2 = state2->snake(s1->id);
         if (s1->alive != s2->alive) return false;
         if (s1->length != s2->length) return false;
         if (s1->health != s2->health) return false;
-        if (s1->body.size() != s2->body.size()) return false;
+        if (s1->body().size() != s2->body().size()) return false;
         // bodies are in order
-        for(int i = 0; i < (int)s1->body.size(); i++){
-            if(s1->body.at(i) != s2->body.at(i)) return false;
+        for(int i = 0; i < (int)s1->body().size(); i++){
+            if(s1->body().at(i) != s2->body().at(i)) return false;
         }
     }
     return true;
 }
 
 void alive(GameState* state, bool* arr){
-    for(const auto& s: state->snakes){
+    for(const auto& s: state->snakes()){
         arr[s->id] = s->alive;
     }
 }
 
 void snake_length(GameState* state, int* arr){
-    for(const auto& s: state->snakes){
+    for(const auto& s: state->snakes()){
         arr[s->id] = s->length;
     }
 }
 
 int snake_body_length(GameState* state, int player){
-    return (int) state->snakes.at(player)->body.size();
+    return (int) state->snake(player)->body().size();
 }
 
 void snake_pos(GameState* state, int player, int* arr){
-    Snake* s = state->snakes.at(player);
+    Snake* s = state->snake(player);
     int i = 0;
-    for (auto c: s->body){
+    for (auto c: s->body()){
         arr[i] = c.first;
         arr[i+1] = c.second;
         i += 2;
@@ -825,12 +920,12 @@ void snake_pos(GameState* state, int player, int* arr){
 }
 
 int num_food(GameState* state){
-    return (int) state->food.size();
+    return (int) state->num_food;
 }
 
 void food_pos(GameState* state, int* arr){
     int i = 0;
-    for (auto c: state->food){
+    for (auto c: state->food()){
         arr[i] = c.first;
         arr[i+1] = c.second;
         i += 2;
@@ -839,7 +934,7 @@ void food_pos(GameState* state, int* arr){
 
 void food_spawn_turns_fn(GameState* state, int* arr){
     int i = 0;
-    for (auto t : state->food_spawn_turns)
+    for (auto t : state->food_spawn_turns())
         arr[i++] = t;
 }
 
@@ -848,7 +943,7 @@ int turns_played(GameState* state){
 }
 
 void snake_health(GameState* state, int* arr){
-    for(const auto& s: state->snakes){
+    for(const auto& s: state->snakes()){
         arr[s->id] = s->health;
     }
 }
@@ -882,21 +977,22 @@ void area_control(
     deque<int> length_offset;  //amount of tiles the tail expands
     //initialization
     int alive_snake_count = 0;
-    for(int i = 0; i < (int)(state->snakes.size()); i++){
-        Snake* s = state->snakes.at(i);
+    for(int i = 0; i < (int)(state->snakes().size()); i++){
+        Snake* s = state->snake(i);
         if (!s->alive) continue;
         //initial frontier
         deque<Coord> init_frontier;
-        init_frontier.push_back(s->body.front());
+        init_frontier.push_back(s->body().front());
         frontiers.push_back(init_frontier);
         //initial body
-        deque<Coord> init_body(s->body);
+        BodyView body = s->body();
+        deque<Coord> init_body(body.begin(), body.end());
         bodies.push_back(init_body);
-        for(Coord c: s->body){
+        for(Coord c: s->body()){
             body_map[c.second * state->w + c.first] = 1;
         }
         //offset
-        int offset = s->length - (int)s->body.size();
+        int offset = s->length - (int)s->body().size();
         length_offset.push_back(offset);
         //save id
         snake_ids[alive_snake_count] = i;
@@ -953,8 +1049,8 @@ void area_control(
                             // this field was already claimed this round by us. No need to claim again
                             continue;
                         }
-                        int other_length = state->snakes.at(other_id)->length;
-                        int our_length = state->snakes.at(snake_ids[i])->length;
+                        int other_length = state->snake(other_id)->length;
+                        int our_length = state->snake(snake_ids[i])->length;
                         // check which snake is longer
                         if (other_length > our_length){
                             continue;  // we lost and cannot claim this field
@@ -990,7 +1086,7 @@ void area_control(
                 frontiers[inverse_snake_ids[snake_id]].push_back(cur_pos);
                 // maybe update food position if we did not already find a better food
                 if (food_dist_arr[snake_id] > counter){
-                    for (Coord f: state->food){
+                    for (Coord f: state->food()){
                         if (f == cur_pos){
                             food_dist_arr[snake_id] = counter;
                             reached_food[snake_id] = true;
@@ -999,7 +1095,7 @@ void area_control(
                 }
                 // maybe update tail distance if we did not already find a better path
                 if (tail_dist_arr[snake_id] > counter){
-                    if (state->snakes.at(snake_id)->body.back() == cur_pos){
+                    if (state->snake(snake_id)->body().back() == cur_pos){
                         tail_dist_arr[snake_id] = counter;
                         reached_tail[snake_id] = true;
                     }
@@ -1020,10 +1116,10 @@ void area_control(
             if (val >= 0 and val < state->num_snakes){
                 //food
                 bool continue_flag = false;
-                for (Coord f: state->food) {
+                for (Coord f: state->food()) {
                     if (f.first == x and f.second == y) {
                         //food in hazards
-                        if (state->hazards[y * state->w + x]){
+                        if (state->hazards()[y * state->w + x]){
                             area_arr[val] += food_in_hazard_weight;
                             continue_flag = true;
                             break;
@@ -1036,7 +1132,7 @@ void area_control(
                 }
                 if (continue_flag) continue;
                 //hazards
-                if (state->hazards[y * state->w + x]){
+                if (state->hazards()[y * state->w + x]){
                     area_arr[val] += hazard_weight;
                     continue;
                 }
@@ -1049,15 +1145,63 @@ void area_control(
 
 void hazards(GameState* state, bool* arr){
     for (int i = 0; i < state->w * state->h; i++){
-        arr[i] = state->hazards[i];
+        arr[i] = state->hazards()[i];
+    }
+}
+
+bool state_arrays(
+    GameState* state,
+    int max_body_len,
+    int max_food,
+    int* sizes,
+    int* bodies,
+    int* body_lengths,
+    int* health,
+    int* length,
+    bool* alive_arr,
+    int* food,
+    int* food_spawn_turns,
+    bool* hazard_arr,
+    int* elimination
+){
+    int required_body_len = 0;
+    for (Snake* s: state->snakes()){
+        if (s->body_size > required_body_len) required_body_len = s->body_size;
     }
+    sizes[0] = required_body_len;
+    sizes[1] = state->num_food;
+    if (required_body_len > max_body_len or state->num_food > max_food) return false;
+    for (Snake* s: state->snakes()){
+        int* cur_body = bodies + 2 * s->id * max_body_len;
+        int i = 0;
+        for (Coord c: s->body()){
+            cur_body[i] = c.first;
+            cur_body[i + 1] = c.second;
+            i += 2;
+        }
+        for (; i < 2 * max_body_len; i++) cur_body[i] = -1;
+        body_lengths[s->id] = s->body_size;
+        health[s->id] = s->health;
+        length[s->id] = s->length;
+        alive_arr[s->id] = s->alive;
+        elimination[3 * s->id] = s->death_cause;
+        elimination[3 * s->id + 1] = s->death_turn;
+        elimination[3 * s->id + 2] = s->killer_id;
+    }
+    for (int f = 0; f < state->num_food; f++){
+        food[2 * f] = state->food()[f].first;
+        food[2 * f + 1] = state->food()[f].second;
+        food_spawn_turns[f] = state->food_spawn_turns()[f];
+    }
+    hazards(state, hazard_arr);
+    return true;
 }
 
 void char_game_matrix(GameState* state, char* matrix){
     char snake_counter = 2;
-    for(const auto& s: state->snakes){
+    for(const auto& s: state->snakes()){
         if (not s->alive) continue;
-        deque<Coord> cur_body = s->body;
+        BodyView cur_body = s->body();
         for (Coord c: cur_body){
             matrix[c.second * state->w + c.first] = 1;
         }
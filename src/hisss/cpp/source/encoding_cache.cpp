@@ -0,0 +1,29 @@
+//
+// Encodings of the players of a game, which are updated in place between turns instead of being rebuilt
+//
+
+#include "../header/encoding_cache.h"
+
+EncodingCache* encoding_cache_create(int num_snakes){
+    auto* cache = new EncodingCache();
+    cache->players.resize(num_snakes);
+    for (PlayerEncodingCache& player: cache->players) player.valid = false;
+    return cache;
+}
+
+void encoding_cache_close(EncodingCache* cache){
+    delete cache;
+}
+
+float* encoding_cache_buffer(EncodingCache* cache, int player, int obs_size){
+    PlayerEncodingCache& entry = cache->players[player];
+    if ((int) entry.arr.size() != obs_size){
+        // a different encoding shape invalidates all layers
+        entry.arr.assign(obs_size, 0.0);
+        entry.written.clear();
+        entry.hazard_written.clear();
+        entry.hazards.clear();
+        entry.valid = false;
+    }
+    return entry.arr.data();
+}
@@ -6,6 +6,14 @@
 #include "../header/battlesnake.h"
 #include "../header/battlesnake_helper.h"
 #include "../header/nash.h"
+#include "../header/batch.h"
+#include "../header/rollout.h"
+#include "../header/transposition.h"
+#include "../header/state_pool.h"
+#include "../header/snapshot.h"
+#include "../header/mcts.h"
+#include "../header/nash_search.h"
+#include "../header/encoding_cache.h"
 
 #if defined(_WIN32) || defined(_MSC_VER)
     #define HISSS_EXPORT __declspec(dllexport)
@@ -39,7 +47,9 @@ extern "C" {
         bool royale,
         int shrink_n_turns,
         int hazard_damage,
-        bool* init_hazards
+        bool* init_hazards,
+        bool all_actions_legal,
+        bool draw_prevention
     ){
         return init(
             w,
@@ -63,12 +73,196 @@ extern "C" {
             royale,
             shrink_n_turns,
             hazard_damage,
-            init_hazards
+            init_hazards,
+            all_actions_legal,
+            draw_prevention
         );
     }
     HISSS_EXPORT void step_cpp(GameState* state, int* actions){
         step(state, actions);
     }
+    HISSS_EXPORT void prevent_draw_cpp(GameState* state, int* actions){
+        prevent_draw(state, actions);
+    }
+    HISSS_EXPORT void step_undoable_cpp(GameState* state, int* actions){
+        step_undoable(state, actions);
+    }
+    HISSS_EXPORT bool undo_cpp(GameState* state){
+        return undo(state);
+    }
+    HISSS_EXPORT int undo_depth_cpp(GameState* state){
+        return undo_depth(state);
+    }
+    HISSS_EXPORT void undo_clear_cpp(GameState* state){
+        undo_clear(state);
+    }
+    HISSS_EXPORT void step_outcomes_cpp(
+            GameState* state,
+            int num_joint,
+            int* actions,
+            int reward_type,
+            double living_reward,
+            double terminal_reward,
+            double* rewards,
+            bool* dones,
+            bool* died,
+            int* death_causes,
+            bool* ate_food,
+            bool* at_turn
+    ){
+        step_outcomes(state, num_joint, actions, reward_type, living_reward, terminal_reward, rewards, dones, died,
+                      death_causes, ate_food, at_turn);
+    }
+    HISSS_EXPORT void expand_children_cpp(
+            GameState* state,
+            StatePool* pool,
+            int num_joint,
+            int* actions,
+            int reward_type,
+            double living_reward,
+            double terminal_reward,
+            GameState** children,
+            double* rewards,
+            bool* dones,
+            int* applied_actions
+    ){
+        expand_children(state, pool, num_joint, actions, reward_type, living_reward, terminal_reward, children,
+                        rewards, dones, applied_actions);
+    }
+    HISSS_EXPORT void step_many_cpp(
+            GameState** states,
+            int num_states,
+            const int* actions,
+            int reward_type,
+            double living_reward,
+            double terminal_reward,
+            double* rewards,
+            bool* dones
+    ){
+        step_many(states, num_states, actions, reward_type, living_reward, terminal_reward, rewards, dones);
+    }
+    HISSS_EXPORT void rollout_many_cpp(
+            GameState** states,
+            int num_states,
+            int policy,
+            int max_turns,
+            int num_threads,
+            const uint64_t* seeds,
+            int reward_type,
+            double living_reward,
+            double terminal_reward,
+            double* cum_rewards,
+            int* turns_played,
+            bool* dones
+    ){
+        rollout_many(states, num_states, policy, max_turns, num_threads, seeds, reward_type, living_reward,
+                     terminal_reward, cum_rewards, turns_played, dones);
+    }
+    HISSS_EXPORT void estimate_values_cpp(
+            GameState* root,
+            int num_playouts,
+            int policy,
+            int max_turns,
+            int num_threads,
+            const uint64_t* seeds,
+            bool resample_chance,
+            int reward_type,
+            double living_reward,
+            double terminal_reward,
+            double* means,
+            double* std_errors
+    ){
+        estimate_values(root, num_playouts, policy, max_turns, num_threads, seeds, resample_chance, reward_type,
+                        living_reward, terminal_reward, means, std_errors);
+    }
+    HISSS_EXPORT int simulate_cpp(
+            GameState* state,
+            int policy,
+            const double* action_probs,
+            int num_prob_turns,
+            int max_turns,
+            uint64_t seed,
+            int reward_type,
+            double living_reward,
+            double terminal_reward,
+            int* actions,
+            double* rewards,
+            bool* alive,
+            int* lengths,
+            int* healths,
+            int* death_causes,
+            bool* done
+    ){
+        StateRng rng(seed);
+        return simulate(state, policy, action_probs, num_prob_turns, max_turns, rng, reward_type, living_reward,
+                        terminal_reward, actions, rewards, alive, lengths, healths, death_causes, done);
+    }
+    HISSS_EXPORT void nash_search_cpp(
+            GameState* root,
+            int depth,
+            bool prune,
+            double value_min,
+            double value_max,
+            int leaf_policy,
+            int num_leaf_rollouts,
+            int leaf_max_turns,
+            int reward_type,
+            double living_reward,
+            double terminal_reward,
+            uint64_t seed,
+            double* values,
+            double* policies,
+            int64_t* stats
+    ){
+        nash_search(root, depth, prune, value_min, value_max, leaf_policy, num_leaf_rollouts, leaf_max_turns,
+                    reward_type, living_reward, terminal_reward, seed, values, policies, stats);
+    }
+    HISSS_EXPORT MctsTree* mcts_create_cpp(
+            GameState* root,
+            int algorithm,
+            double exploration,
+            double value_min,
+            double value_max,
+            int rollout_policy,
+            int rollout_max_turns,
+            int reward_type,
+            double living_reward,
+            double terminal_reward,
+            uint64_t seed
+    ){
+        return mcts_create(root, algorithm, exploration, value_min, value_max, rollout_policy, rollout_max_turns,
+                           reward_type, living_reward, terminal_reward, seed);
+    }
+    HISSS_EXPORT void mcts_close_cpp(MctsTree* tree){
+        mcts_close(tree);
+    }
+    HISSS_EXPORT int mcts_search_cpp(MctsTree* tree, int max_iterations, double max_seconds){
+        return mcts_search(tree, max_iterations, max_seconds);
+    }
+    HISSS_EXPORT int mcts_collect_leaves_cpp(MctsTree* tree, int max_leaves, int virtual_loss, int* num_completed){
+        return mcts_collect_leaves(tree, max_leaves, virtual_loss, num_completed);
+    }
+    HISSS_EXPORT void mcts_pending_states_cpp(MctsTree* tree, GameState** states){
+        mcts_pending_states(tree, states);
+    }
+    HISSS_EXPORT void mcts_apply_evaluations_cpp(MctsTree* tree, double* values, double* priors){
+        mcts_apply_evaluations(tree, values, priors);
+    }
+    HISSS_EXPORT void mcts_discard_pending_cpp(MctsTree* tree){
+        mcts_discard_pending(tree);
+    }
+    HISSS_EXPORT void mcts_root_policies_cpp(MctsTree* tree, double* policies){
+        mcts_root_policies(tree, policies);
+    }
+    HISSS_EXPORT void mcts_root_values_cpp(MctsTree* tree, double* values){
+        mcts_root_values(tree, values);
+    }
+    HISSS_EXPORT int mcts_num_nodes_cpp(MctsTree* tree){
+        return (int) tree->nodes.size();
+    }
+    HISSS_EXPORT int64_t mcts_num_iterations_cpp(MctsTree* tree){
+        return tree->num_iterations;
+    }
     HISSS_EXPORT void str_cpp(GameState* state, char* arr){
         draw_to_arr(state, arr);
     }
@@ -127,6 +321,89 @@ extern "C" {
                 temperatures
             );
     }
+    HISSS_EXPORT int custom_encode_many_cpp(
+            GameState** states,
+            int num_states,
+            float* arr,
+            int capacity,
+            int obs_size,
+            int* state_ids,
+            int* player_ids,
+            bool include_current_food,
+            bool include_next_food,
+            bool include_board,
+            bool include_number_of_turns,
+            bool flatten_snakes,
+            bool include_snake_body_as_one_hot,
+            bool include_snake_body,
+            bool include_snake_head,
+            bool include_snake_tail,
+            bool include_snake_health,
+            bool include_snake_length,
+            bool centered,
+            bool include_distance_map,
+            bool include_area_control,
+            bool include_food_distance,
+            bool include_hazards,
+            bool include_tail_distance,
+            bool include_num_food_on_board,
+            float fixed_food_spawn_chance,
+            bool include_temperatures,
+            bool single_temperature,
+            const float* temperatures,
+            EncodingCache** caches
+    ){
+        return encode_many(
+                states,
+                num_states,
+                arr,
+                capacity,
+                obs_size,
+                state_ids,
+                player_ids,
+                include_current_food,
+                include_next_food,
+                include_board,
+                include_number_of_turns,
+                flatten_snakes,
+                include_snake_body_as_one_hot,
+                include_snake_body,
+                include_snake_head,
+                include_snake_tail,
+                include_snake_health,
+                include_snake_length,
+                centered,
+                include_distance_map,
+                include_area_control,
+                include_food_distance,
+                include_hazards,
+                include_tail_distance,
+                include_num_food_on_board,
+                fixed_food_spawn_chance,
+                include_temperatures,
+                single_temperature,
+                temperatures,
+                caches
+        );
+    }
+    HISSS_EXPORT void transform_encodings_cpp(
+            const float* arr,
+            int num_rows,
+            int num_cells,
+            int z_dim,
+            int num_transforms,
+            const int* cell_maps,
+            const int* channel_maps,
+            float* out
+    ){
+        transform_encodings(arr, num_rows, num_cells, z_dim, num_transforms, cell_maps, channel_maps, out);
+    }
+    HISSS_EXPORT EncodingCache* encoding_cache_create_cpp(int num_snakes){
+        return encoding_cache_create(num_snakes);
+    }
+    HISSS_EXPORT void encoding_cache_close_cpp(EncodingCache* cache){
+        encoding_cache_close(cache);
+    }
 
     HISSS_EXPORT GameState* clone_cpp(GameState* state){
         return clone(state);
@@ -134,12 +411,52 @@ extern "C" {
     HISSS_EXPORT void close_cpp(GameState* state){
         close(state);
     }
+    HISSS_EXPORT GameState* clone_into_cpp(GameState* state, StatePool* pool){
+        return clone_into(state, pool);
+    }
+    HISSS_EXPORT int snapshot_size_cpp(GameState* state){
+        return snapshot_size(state);
+    }
+    HISSS_EXPORT void to_snapshot_cpp(GameState* state, int32_t* buf){
+        state_to_snapshot(state, buf);
+    }
+    HISSS_EXPORT GameState* from_snapshot_cpp(const int32_t* buf, int n){
+        return state_from_snapshot(buf, n);
+    }
+    HISSS_EXPORT int64_t state_num_bytes_cpp(GameState* state){
+        return state->num_bytes;
+    }
+    HISSS_EXPORT bool state_in_pool_cpp(GameState* state){
+        return state->pool != nullptr;
+    }
+    HISSS_EXPORT StatePool* pool_create_cpp(int64_t slot_size, int capacity, int num_preallocated){
+        return pool_create(slot_size, capacity, num_preallocated);
+    }
+    HISSS_EXPORT void pool_close_cpp(StatePool* pool){
+        pool_close(pool);
+    }
+    HISSS_EXPORT void pool_stats_cpp(StatePool* pool, int64_t* stats){
+        // capacity, number of carved slots, slots in use, peak usage, overflows and bytes per slot
+        lock_guard<mutex> lock(pool->m);
+        stats[0] = pool->capacity;
+        stats[1] = pool->num_slots;
+        stats[2] = pool->num_in_use;
+        stats[3] = pool->peak_in_use;
+        stats[4] = pool->num_overflows;
+        stats[5] = pool->slot_size;
+    }
     HISSS_EXPORT void actions_cpp(GameState* state, int snake_id, int* actions){
         legal_actions(state, snake_id, actions);
     }
+    HISSS_EXPORT int legal_action_mask_cpp(GameState* state, bool* mask){
+        return legal_action_mask(state, mask);
+    }
     HISSS_EXPORT bool equals_cpp(GameState* state1, GameState* state2){
         return equals(state1, state2);
     }
+    HISSS_EXPORT uint64_t state_hash_cpp(GameState* state){
+        return state_hash(state);
+    }
     HISSS_EXPORT void alive_cpp(GameState* state, bool* arr){
         alive(state, arr);
     }
@@ -229,25 +546,49 @@ extern "C" {
         }
     }
 
+    HISSS_EXPORT bool state_arrays_cpp(
+            GameState* state,
+            int max_body_len,
+            int max_food,
+            int* sizes,
+            int* bodies,
+            int* body_lengths,
+            int* health,
+            int* length,
+            bool* alive_arr,
+            int* food,
+            int* food_spawn_turns,
+            bool* hazard_arr,
+            int* elimination
+    ){
+        return state_arrays(
+            state, max_body_len, max_food, sizes, bodies, body_lengths, health, length, alive_arr, food,
+            food_spawn_turns, hazard_arr, elimination
+        );
+    }
     HISSS_EXPORT int snake_elim_cause_cpp(GameState* state, int snake_id) {
-        return state->snakes.at(snake_id)->death_cause;
+        return state->snake(snake_id)->death_cause;
     }
     HISSS_EXPORT int snake_elim_killer_cpp(GameState* state, int snake_id) {
-        return state->snakes.at(snake_id)->killer_id;
+        return state->snake(snake_id)->killer_id;
     }
     HISSS_EXPORT int snake_elim_turn_cpp(GameState* state, int snake_id) {
-        return state->snakes.at(snake_id)->death_turn;
+        return state->snake(snake_id)->death_turn;
     }
     HISSS_EXPORT void set_elim_info_cpp(GameState* state, int snake_id, int cause, int killer_id, int death_turn) {
-        Snake* s = state->snakes.at(snake_id);
+        Snake* s = state->snake(snake_id);
         s->death_cause = cause;
         s->killer_id = killer_id;
         s->death_turn = death_turn;
     }
 
     HISSS_EXPORT void set_seed(int seed) {
+        // seeds the generator that draws the random streams of newly initialized game states
         set_seed_gym(seed);
-        set_seed_utils(seed);
+    }
+
+    HISSS_EXPORT void set_state_seed_cpp(GameState* state, uint64_t seed) {
+        set_state_seed(state, seed);
     }
 
     HISSS_EXPORT void char_game_matrix_cpp(
@@ -257,5 +598,63 @@ extern "C" {
        char_game_matrix(state, matrix);
     }
 
+    HISSS_EXPORT TranspositionTable* tt_create_cpp(int num_buckets, int num_players, int num_actions, int num_stripes){
+        return tt_create(num_buckets, num_players, num_actions, num_stripes);
+    }
+    HISSS_EXPORT void tt_close_cpp(TranspositionTable* tt){
+        tt_close(tt);
+    }
+    HISSS_EXPORT void tt_clear_cpp(TranspositionTable* tt){
+        tt_clear(tt);
+    }
+    HISSS_EXPORT void tt_new_generation_cpp(TranspositionTable* tt){
+        tt_new_generation(tt);
+    }
+    HISSS_EXPORT int tt_num_slots_cpp(TranspositionTable* tt){
+        return tt_num_slots(tt);
+    }
+    HISSS_EXPORT int tt_probe_cpp(
+            TranspositionTable* tt,
+            uint64_t key,
+            double* values,
+            double* policy,
+            int* depth,
+            int* visits
+    ){
+        return tt_probe(tt, key, values, policy, depth, visits);
+    }
+    HISSS_EXPORT int tt_store_cpp(
+            TranspositionTable* tt,
+            uint64_t key,
+            int depth,
+            int visits,
+            const double* values,
+            const double* policy
+    ){
+        return tt_store(tt, key, depth, visits, values, policy);
+    }
+    HISSS_EXPORT int64_t tt_num_hits_cpp(TranspositionTable* tt){
+        return tt->num_hits;
+    }
+    HISSS_EXPORT int64_t tt_num_misses_cpp(TranspositionTable* tt){
+        return tt->num_misses;
+    }
+    // pointers to the entry arrays, which python wraps as numpy views
+    HISSS_EXPORT uint64_t* tt_keys_cpp(TranspositionTable* tt){
+        return tt->keys.data();
+    }
+    HISSS_EXPORT int* tt_depths_cpp(TranspositionTable* tt){
+        return tt->depths.data();
+    }
+    HISSS_EXPORT int* tt_visits_cpp(TranspositionTable* tt){
+        return tt->visits.data();
+    }
+    HISSS_EXPORT double* tt_values_cpp(TranspositionTable* tt){
+        return tt->values.data();
+    }
+    HISSS_EXPORT double* tt_policies_cpp(TranspositionTable* tt){
+        return tt->policies.data();
+    }
+
 }
 
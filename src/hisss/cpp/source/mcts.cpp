@@ -0,0 +1,426 @@
+//
+// Simultaneous-move Monte Carlo tree search with decoupled selection at every node
+//
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+
+#include "../header/mcts.h"
+#include "../header/batch.h"
+#include "../header/rollout.h"
+
+int add_node(MctsTree* tree, GameState* state, bool terminal){
+    int num_snakes = state->num_snakes;
+    MctsNode node{};
+    node.slots_begin = (int) tree->slot_players.size();
+    node.terminal = terminal;
+    node.visits = 0;
+    if (not terminal){
+        vector<char> at_turn(num_snakes, 0);
+        players_at_turn(state, reinterpret_cast<bool*>(at_turn.data()));
+        int legal[4] = {1, 1, 1, 1};
+        node.num_joint = 1;
+        for (int p = 0; p < num_snakes; p++){
+            if (not at_turn[p]) continue;
+            if (not state->all_actions_legal) legal_actions(state, p, legal);
+            int num_actions = 0;
+            for (int a = 0; a < 4; a++){
+                if (not legal[a]) continue;
+                tree->slot_actions.push_back(a);
+                num_actions++;
+            }
+            for (int a = num_actions; a < 4; a++) tree->slot_actions.push_back(-1);
+            for (int a = 0; a < 4; a++) tree->action_priors.push_back(a < num_actions ? 1.0 / num_actions : 0.0);
+            tree->slot_players.push_back(p);
+            tree->slot_num_actions.push_back(num_actions);
+            node.num_at_turn++;
+            node.num_joint *= num_actions;
+        }
+    }
+    int num_stats = 4 * node.num_at_turn;
+    tree->action_visits.insert(tree->action_visits.end(), num_stats, 0);
+    tree->action_value_sums.insert(tree->action_value_sums.end(), num_stats, 0.0);
+    tree->action_aux.insert(tree->action_aux.end(), num_stats, 0.0);
+    tree->strategy_sums.insert(tree->strategy_sums.end(), num_stats, 0.0);
+    tree->value_sums.insert(tree->value_sums.end(), num_snakes, 0.0);
+    tree->nodes.push_back(node);
+    return (int) tree->nodes.size() - 1;
+}
+
+MctsTree* mcts_create(
+        GameState* root,
+        int algorithm,
+        double exploration,
+        double value_min,
+        double value_max,
+        int rollout_policy,
+        int rollout_max_turns,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        uint64_t seed
+){
+    auto* tree = new MctsTree();
+    tree->root = clone_into(root, nullptr);
+    tree->scratch_pool = pool_create(root->num_bytes, 1, 1);
+    tree->leaf_pool = pool_create(root->num_bytes, 256, 0);
+    tree->virtual_loss = 0;
+    tree->algorithm = algorithm;
+    tree->exploration = exploration;
+    tree->value_min = value_min;
+    tree->value_max = value_max;
+    tree->rollout_policy = rollout_policy;
+    tree->rollout_max_turns = rollout_max_turns;
+    tree->reward_type = reward_type;
+    tree->living_reward = living_reward;
+    tree->terminal_reward = terminal_reward;
+    tree->rng.seed(seed);
+    tree->num_iterations = 0;
+    vector<char> at_turn(root->num_snakes, 0);
+    bool terminal = is_terminal(tree->root, players_at_turn(tree->root, reinterpret_cast<bool*>(at_turn.data())));
+    add_node(tree, tree->root, terminal);
+    return tree;
+}
+
+void mcts_close(MctsTree* tree){
+    for (MctsPending& leaf: tree->pending) close(leaf.state);
+    close(tree->root);
+    pool_close(tree->scratch_pool);
+    pool_close(tree->leaf_pool);
+    delete tree;
+}
+
+double uniform_double(StateRng& rng){
+    return (double) rng() / ((double) StateRng::max() + 1.0);
+}
+
+int sample_from(const double* probs, int num_actions, StateRng& rng){
+    double r = uniform_double(rng);
+    for (int a = 0; a < num_actions; a++){
+        r -= probs[a];
+        if (r < 0.0) return a;
+    }
+    return num_actions - 1;
+}
+
+// selection probabilities of Exp3 and regret matching, mixed with uniform exploration
+void mixed_strategy(MctsTree* tree, int stats, int num_actions, double* probs){
+    double gamma = tree->exploration;
+    if (tree->algorithm == MCTS_EXP3){
+        double eta = gamma / num_actions;
+        double max_estimate = tree->action_aux[stats];
+        for (int a = 1; a < num_actions; a++) max_estimate = max(max_estimate, tree->action_aux[stats + a]);
+        double weight_sum = 0.0;
+        for (int a = 0; a < num_actions; a++){
+            probs[a] = exp(eta * (tree->action_aux[stats + a] - max_estimate));
+            weight_sum += probs[a];
+        }
+        for (int a = 0; a < num_actions; a++) probs[a] /= weight_sum;
+    } else {
+        double positive_sum = 0.0;
+        for (int a = 0; a < num_actions; a++) positive_sum += max(tree->action_aux[stats + a], 0.0);
+        for (int a = 0; a < num_actions; a++){
+            probs[a] = positive_sum > 0.0 ? max(tree->action_aux[stats + a], 0.0) / positive_sum : 1.0 / num_actions;
+        }
+    }
+    for (int a = 0; a < num_actions; a++) probs[a] = (1.0 - gamma) * probs[a] + gamma / num_actions;
+}
+
+// returns the action slot of the player in the given slot and writes the probability it was chosen with
+int select_action(MctsTree* tree, const MctsNode& node, int slot, double* chosen_prob){
+    int num_actions = tree->slot_num_actions[slot];
+    int stats = 4 * slot;
+    *chosen_prob = 1.0;
+    if (tree->algorithm == MCTS_DUCT and node.has_priors){
+        // PUCT, unvisited actions are valued in the middle of the value range
+        double value_range = tree->value_max - tree->value_min;
+        double sqrt_visits = sqrt((double) max(node.visits, 1));
+        int best = 0;
+        double best_score = -INFINITY;
+        for (int a = 0; a < num_actions; a++){
+            int n = tree->action_visits[stats + a];
+            double q = n > 0 ? (tree->action_value_sums[stats + a] / n - tree->value_min) / value_range : 0.5;
+            double score = q + tree->exploration * tree->action_priors[stats + a] * sqrt_visits / (1 + n);
+            if (score > best_score){
+                best_score = score;
+                best = a;
+            }
+        }
+        return best;
+    }
+    if (tree->algorithm == MCTS_DUCT){
+        // unvisited actions are tried first in random order
+        int unvisited[4];
+        int num_unvisited = 0;
+        for (int a = 0; a < num_actions; a++){
+            if (tree->action_visits[stats + a] == 0) unvisited[num_unvisited++] = a;
+        }
+        if (num_unvisited > 0) return unvisited[tree->rng() % num_unvisited];
+        double value_range = tree->value_max - tree->value_min;
+        double log_visits = log((double) node.visits);
+        int best = 0;
+        double best_score = -INFINITY;
+        for (int a = 0; a < num_actions; a++){
+            int n = tree->action_visits[stats + a];
+            double q = (tree->action_value_sums[stats + a] / n - tree->value_min) / value_range;
+            double score = q + tree->exploration * sqrt(log_visits / n);
+            if (score > best_score){
+                best_score = score;
+                best = a;
+            }
+        }
+        return best;
+    }
+    double probs[4];
+    mixed_strategy(tree, stats, num_actions, probs);
+    for (int a = 0; a < num_actions; a++) tree->strategy_sums[stats + a] += probs[a];
+    int action = sample_from(probs, num_actions, tree->rng);
+    *chosen_prob = probs[action];
+    return action;
+}
+
+void update_action(MctsTree* tree, int slot, int action, double chosen_prob, double value){
+    int num_actions = tree->slot_num_actions[slot];
+    int stats = 4 * slot;
+    tree->action_visits[stats + action]++;
+    tree->action_value_sums[stats + action] += value;
+    double x = (value - tree->value_min) / (tree->value_max - tree->value_min);
+    x = min(max(x, 0.0), 1.0);
+    if (tree->algorithm == MCTS_EXP3){
+        tree->action_aux[stats + action] += x / chosen_prob;
+    } else if (tree->algorithm == MCTS_REGRET_MATCHING){
+        for (int a = 0; a < num_actions; a++){
+            double estimate = a == action ? x / chosen_prob : 0.0;
+            tree->action_aux[stats + a] += estimate - x;
+        }
+    }
+}
+
+enum MctsSelectResult {
+    MCTS_SELECT_TERMINAL = 0,  // the path ends in a terminal node, the value of the leaf is zero
+    MCTS_SELECT_NEW_LEAF = 1,  // the path ends in a new leaf, which needs an evaluation
+    MCTS_SELECT_PENDING = 2,  // the path ends in a leaf that is already pending
+};
+
+// adds sign * virtual_loss visits with the minimum value to all decisions of the path
+void add_virtual_loss(MctsTree* tree, const MctsPath& path, int virtual_loss, int sign){
+    if (virtual_loss == 0) return;
+    int num_steps = (int) path.nodes.size() - 1;
+    for (int step = 0; step < num_steps; step++){
+        MctsNode& node = tree->nodes[path.nodes[step]];
+        node.visits += sign * virtual_loss;
+        for (int i = 0; i < node.num_at_turn; i++){
+            int stats = 4 * (node.slots_begin + i) + path.actions[path.slots[step] + i];
+            tree->action_visits[stats] += sign * virtual_loss;
+            tree->action_value_sums[stats] += sign * virtual_loss * tree->value_min;
+        }
+    }
+}
+
+// descends from the root and steps the state along the path. A new leaf is added to the tree.
+int mcts_select(MctsTree* tree, GameState* state, MctsPath& path, int virtual_loss){
+    int num_snakes = tree->root->num_snakes;
+    path.nodes.clear();
+    path.slots.clear();
+    path.actions.clear();
+    path.probs.clear();
+    path.rewards.clear();
+    vector<int> joint_actions(num_snakes);
+    int node_idx = 0;
+    int result = MCTS_SELECT_TERMINAL;
+    while (true){
+        path.nodes.push_back(node_idx);
+        if (tree->nodes[node_idx].terminal) break;
+        if (tree->nodes[node_idx].pending){
+            result = MCTS_SELECT_PENDING;
+            break;
+        }
+        MctsNode node = tree->nodes[node_idx];
+        path.slots.push_back((int) path.actions.size());
+        // decoupled selection, players not at turn perform the default action
+        fill(joint_actions.begin(), joint_actions.end(), 0);
+        uint64_t joint_idx = 0;
+        uint64_t radix = 1;
+        for (int i = 0; i < node.num_at_turn; i++){
+            int slot = node.slots_begin + i;
+            double prob;
+            int action = select_action(tree, node, slot, &prob);
+            path.actions.push_back(action);
+            path.probs.push_back(prob);
+            joint_actions[tree->slot_players[slot]] = tree->slot_actions[4 * slot + action];
+            joint_idx += action * radix;
+            radix *= tree->slot_num_actions[slot];
+        }
+        if (virtual_loss != 0){
+            tree->nodes[node_idx].visits += virtual_loss;
+            for (int i = 0; i < node.num_at_turn; i++){
+                int stats = 4 * (node.slots_begin + i) + path.actions[path.slots.back() + i];
+                tree->action_visits[stats] += virtual_loss;
+                tree->action_value_sums[stats] += virtual_loss * tree->value_min;
+            }
+        }
+        size_t reward_offset = path.rewards.size();
+        path.rewards.resize(reward_offset + num_snakes);
+        bool done = step_with_rewards(state, joint_actions.data(), tree->reward_type, tree->living_reward,
+                                      tree->terminal_reward, path.rewards.data() + reward_offset);
+        uint64_t key = ((uint64_t) node_idx << 32) | joint_idx;
+        auto it = tree->children.find(key);
+        if (it != tree->children.end()){
+            node_idx = it->second;
+            continue;
+        }
+        // expansion of a new leaf
+        int child_idx = add_node(tree, state, done);
+        tree->children[key] = child_idx;
+        path.nodes.push_back(child_idx);
+        if (not done) result = MCTS_SELECT_NEW_LEAF;
+        break;
+    }
+    return result;
+}
+
+// backpropagation of the returns, the last node on the path was not left by a joint action
+void mcts_backup(MctsTree* tree, const MctsPath& path, const double* leaf_values, int virtual_loss){
+    int num_snakes = tree->root->num_snakes;
+    add_virtual_loss(tree, path, virtual_loss, -1);
+    vector<double> returns(leaf_values, leaf_values + num_snakes);
+    int num_steps = (int) path.nodes.size() - 1;
+    MctsNode& last = tree->nodes[path.nodes.back()];
+    last.visits++;
+    for (int p = 0; p < num_snakes; p++) tree->value_sums[path.nodes.back() * num_snakes + p] += returns[p];
+    for (int step = num_steps - 1; step >= 0; step--){
+        for (int p = 0; p < num_snakes; p++) returns[p] += path.rewards[step * num_snakes + p];
+        MctsNode& node = tree->nodes[path.nodes[step]];
+        node.visits++;
+        for (int p = 0; p < num_snakes; p++) tree->value_sums[path.nodes[step] * num_snakes + p] += returns[p];
+        for (int i = 0; i < node.num_at_turn; i++){
+            int slot = node.slots_begin + i;
+            update_action(tree, slot, path.actions[path.slots[step] + i], path.probs[path.slots[step] + i],
+                          returns[tree->slot_players[slot]]);
+        }
+    }
+    tree->num_iterations++;
+}
+
+void mcts_iteration(MctsTree* tree){
+    // buffers of the path are reused across iterations
+    static thread_local MctsPath path;
+    vector<double> leaf_values(tree->root->num_snakes, 0.0);
+    GameState* state = clone_into(tree->root, tree->scratch_pool);
+    int result = mcts_select(tree, state, path, 0);
+    if (result == MCTS_SELECT_NEW_LEAF and tree->rollout_policy >= 0){
+        int turns_played;
+        bool rollout_done;
+        rollout(state, tree->rollout_policy, tree->rollout_max_turns, tree->rng, tree->reward_type,
+                tree->living_reward, tree->terminal_reward, leaf_values.data(), &turns_played, &rollout_done);
+    }
+    close(state);
+    mcts_backup(tree, path, leaf_values.data(), 0);
+}
+
+int mcts_collect_leaves(MctsTree* tree, int max_leaves, int virtual_loss, int* num_completed){
+    *num_completed = 0;
+    if (tree->nodes[0].terminal or not tree->pending.empty()) return (int) tree->pending.size();
+    tree->virtual_loss = virtual_loss;
+    vector<double> zeros(tree->root->num_snakes, 0.0);
+    while ((int) tree->pending.size() + *num_completed < max_leaves){
+        MctsPending leaf;
+        leaf.state = clone_into(tree->root, tree->leaf_pool);
+        int result = mcts_select(tree, leaf.state, leaf.path, virtual_loss);
+        if (result == MCTS_SELECT_NEW_LEAF){
+            tree->nodes[leaf.path.nodes.back()].pending = true;
+            tree->pending.push_back(std::move(leaf));
+            continue;
+        }
+        close(leaf.state);
+        if (result == MCTS_SELECT_PENDING){
+            // the remaining paths would most likely collide as well, the batch is evaluated first
+            add_virtual_loss(tree, leaf.path, virtual_loss, -1);
+            break;
+        }
+        mcts_backup(tree, leaf.path, zeros.data(), virtual_loss);
+        (*num_completed)++;
+    }
+    return (int) tree->pending.size();
+}
+
+void mcts_pending_states(MctsTree* tree, GameState** states){
+    for (int i = 0; i < (int) tree->pending.size(); i++) states[i] = tree->pending[i].state;
+}
+
+void mcts_apply_evaluations(MctsTree* tree, const double* values, const double* priors){
+    int num_snakes = tree->root->num_snakes;
+    for (int i = 0; i < (int) tree->pending.size(); i++){
+        MctsPending& leaf = tree->pending[i];
+        MctsNode& node = tree->nodes[leaf.path.nodes.back()];
+        node.pending = false;
+        node.has_priors = true;
+        for (int j = 0; j < node.num_at_turn; j++){
+            int slot = node.slots_begin + j;
+            int num_actions = tree->slot_num_actions[slot];
+            const double* row = priors + ((int64_t) i * num_snakes + tree->slot_players[slot]) * 4;
+            double prior_sum = 0.0;
+            for (int a = 0; a < num_actions; a++) prior_sum += max(row[tree->slot_actions[4 * slot + a]], 0.0);
+            for (int a = 0; a < num_actions; a++){
+                double prior = max(row[tree->slot_actions[4 * slot + a]], 0.0);
+                tree->action_priors[4 * slot + a] = prior_sum > 0.0 ? prior / prior_sum : 1.0 / num_actions;
+            }
+        }
+        mcts_backup(tree, leaf.path, values + (int64_t) i * num_snakes, tree->virtual_loss);
+        close(leaf.state);
+    }
+    tree->pending.clear();
+}
+
+void mcts_discard_pending(MctsTree* tree){
+    for (MctsPending& leaf: tree->pending){
+        tree->nodes[leaf.path.nodes.back()].pending = false;
+        add_virtual_loss(tree, leaf.path, tree->virtual_loss, -1);
+        close(leaf.state);
+    }
+    tree->pending.clear();
+}
+
+int mcts_search(MctsTree* tree, int max_iterations, double max_seconds){
+    if (tree->nodes[0].terminal) return 0;
+    auto start = chrono::steady_clock::now();
+    int iterations = 0;
+    while (true){
+        if (max_iterations > 0 and iterations >= max_iterations) break;
+        if (max_seconds > 0){
+            chrono::duration<double> elapsed = chrono::steady_clock::now() - start;
+            if (elapsed.count() >= max_seconds) break;
+        }
+        mcts_iteration(tree);
+        iterations++;
+    }
+    return iterations;
+}
+
+void mcts_root_policies(MctsTree* tree, double* policies){
+    const MctsNode& root = tree->nodes[0];
+    for (int i = 0; i < tree->root->num_snakes * 4; i++) policies[i] = 0.0;
+    for (int i = 0; i < root.num_at_turn; i++){
+        int slot = root.slots_begin + i;
+        int num_actions = tree->slot_num_actions[slot];
+        double weights[4];
+        double weight_sum = 0.0;
+        for (int a = 0; a < num_actions; a++){
+            // decoupled UCT plays the most visited actions, the other algorithms their average strategy
+            int stats = 4 * slot + a;
+            weights[a] = tree->algorithm == MCTS_DUCT ? tree->action_visits[stats] : tree->strategy_sums[stats];
+            weight_sum += weights[a];
+        }
+        double* row = policies + 4 * tree->slot_players[slot];
+        for (int a = 0; a < num_actions; a++){
+            row[tree->slot_actions[4 * slot + a]] = weight_sum > 0.0 ? weights[a] / weight_sum : 1.0 / num_actions;
+        }
+    }
+}
+
+void mcts_root_values(MctsTree* tree, double* values){
+    const MctsNode& root = tree->nodes[0];
+    for (int p = 0; p < tree->root->num_snakes; p++){
+        values[p] = root.visits > 0 ? tree->value_sums[p] / root.visits : 0.0;
+    }
+}
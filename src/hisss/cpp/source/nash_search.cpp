@@ -0,0 +1,479 @@
+//
+// Depth-limited simultaneous-move search, which solves the joint action matrix of every node for a Nash equilibrium
+//
+// Two-player zero-sum games are pruned similar to the simultaneous move alpha-beta of
+// "Alpha-Beta Pruning for Games with Simultaneous Moves" (Saffidine, Finnsson and Buro, 2012), restricted to
+// dominance by pure strategies: every cell has a pessimistic and an optimistic bound and is searched with the window
+// that decides whether its row or column is dominated. Removing dominated actions keeps the value of the game.
+//
+#include <cmath>
+#include <vector>
+
+#include "../header/nash_search.h"
+#include "../header/batch.h"
+#include "../header/nash.h"
+#include "../header/rollout.h"
+
+using namespace std;
+
+// relative tolerances of the best response test of the equilibria returned by the solvers. The linear program of two
+// players is solved exactly, the nonlinear program of more players only approximately.
+const double NASH_TOLERANCE_2P = 1e-6;
+const double NASH_TOLERANCE = 5e-2;
+
+void nash_leaf_values(NashSearch& search, GameState* state, double* values){
+    int num_snakes = state->num_snakes;
+    for (int p = 0; p < num_snakes; p++) values[p] = 0.0;
+    if (search.leaf_policy < 0 or search.num_leaf_rollouts <= 0) return;
+    vector<double> returns(num_snakes);
+    for (int i = 0; i < search.num_leaf_rollouts; i++){
+        GameState* cpy = clone_into(state, search.pool);
+        int turns_played;
+        bool done;
+        rollout(cpy, search.leaf_policy, search.leaf_max_turns, search.rng, search.reward_type, search.living_reward,
+                search.terminal_reward, returns.data(), &turns_played, &done);
+        close(cpy);
+        for (int p = 0; p < num_snakes; p++) values[p] += returns[p] / search.num_leaf_rollouts;
+    }
+}
+
+// players at turn and their legal actions, returns whether the state is terminal
+bool nash_node_actions(GameState* state, vector<int>& players, vector<vector<int>>& actions){
+    int num_snakes = state->num_snakes;
+    vector<char> at_turn(num_snakes, 0);
+    int num_at_turn = players_at_turn(state, reinterpret_cast<bool*>(at_turn.data()));
+    if (is_terminal(state, num_at_turn)) return true;
+    int legal[4] = {1, 1, 1, 1};
+    for (int p = 0; p < num_snakes; p++){
+        if (not at_turn[p]) continue;
+        if (not state->all_actions_legal) legal_actions(state, p, legal);
+        vector<int> cur_actions;
+        for (int a = 0; a < 4; a++){
+            if (legal[a]) cur_actions.push_back(a);
+        }
+        players.push_back(p);
+        actions.push_back(cur_actions);
+    }
+    return false;
+}
+
+// steps a copy of the state and writes the rewards of the step, returns the copy and whether it is terminal
+GameState* nash_child(NashSearch& search, GameState* state, const int* joint_actions, double* rewards, bool* done){
+    GameState* child = clone_into(state, search.pool);
+    *done = step_with_rewards(child, joint_actions, search.reward_type, search.living_reward,
+                              search.terminal_reward, rewards);
+    return child;
+}
+
+bool nash_policies_valid(int num_at_turn, const int* num_available, const double* at_turn_values,
+                         const double* player_policies){
+    // best response test: no player at turn may gain by deviating to a pure strategy
+    int num_joint = 1;
+    int num_all = 0;
+    for (int i = 0; i < num_at_turn; i++){
+        num_joint *= num_available[i];
+        num_all += num_available[i];
+    }
+    double scale = 1.0;
+    for (int ja = 0; ja < num_joint * num_at_turn; ja++) scale = max(scale, fabs(at_turn_values[ja]));
+    double tolerance = (num_at_turn == 2 ? NASH_TOLERANCE_2P : NASH_TOLERANCE) * scale;
+    vector<int> offsets(num_at_turn);
+    int offset = 0;
+    for (int i = 0; i < num_at_turn; i++){
+        offsets[i] = offset;
+        double sum = 0.0;
+        for (int j = 0; j < num_available[i]; j++){
+            double prob = player_policies[offset + j];
+            if (not (prob >= -tolerance)) return false;  // also rejects nan
+            sum += prob;
+        }
+        if (fabs(sum - 1.0) > tolerance) return false;
+        offset += num_available[i];
+    }
+    // values of the pure strategies of every player against the policies of all others
+    vector<double> pure_values(num_all, 0.0);
+    vector<int> idx(num_at_turn);
+    for (int ja = 0; ja < num_joint; ja++){
+        int rest = ja;
+        for (int i = num_at_turn - 1; i >= 0; i--){
+            idx[i] = rest % num_available[i];
+            rest /= num_available[i];
+        }
+        for (int i = 0; i < num_at_turn; i++){
+            double prob = 1.0;
+            for (int i2 = 0; i2 < num_at_turn; i2++){
+                if (i2 != i) prob *= player_policies[offsets[i2] + idx[i2]];
+            }
+            pure_values[offsets[i] + idx[i]] += prob * at_turn_values[ja * num_at_turn + i];
+        }
+    }
+    for (int i = 0; i < num_at_turn; i++){
+        double value = 0.0;
+        double best = -INFINITY;
+        for (int j = 0; j < num_available[i]; j++){
+            value += player_policies[offsets[i] + j] * pure_values[offsets[i] + j];
+            best = max(best, pure_values[offsets[i] + j]);
+        }
+        if (best > value + tolerance) return false;
+    }
+    return true;
+}
+
+bool nash_solve(int num_at_turn, const vector<vector<int>>& actions, const vector<double>& at_turn_values,
+                double* player_policies){
+    // Solves the matrix game of the players at turn, whose values are enumerated with the last player changing
+    // fastest. The solver can return non-equilibria on degenerate matrices, which is why actions that duplicate an
+    // earlier action of the same player are removed first and the result is verified. Returns false if the
+    // policies are not an equilibrium.
+    int num_joint = (int) at_turn_values.size() / num_at_turn;
+    vector<int> num_available(num_at_turn);
+    vector<int> strides(num_at_turn);
+    int stride = 1;
+    for (int i = num_at_turn - 1; i >= 0; i--){
+        num_available[i] = (int) actions[i].size();
+        strides[i] = stride;
+        stride *= num_available[i];
+    }
+    vector<vector<int>> kept(num_at_turn);
+    for (int i = 0; i < num_at_turn; i++){
+        for (int j = 0; j < num_available[i]; j++){
+            bool duplicate = false;
+            for (int k: kept[i]){
+                duplicate = true;
+                for (int ja = 0; ja < num_joint and duplicate; ja++){
+                    if ((ja / strides[i]) % num_available[i] != j) continue;
+                    int other = ja + (k - j) * strides[i];
+                    for (int i2 = 0; i2 < num_at_turn and duplicate; i2++){
+                        duplicate = at_turn_values[ja * num_at_turn + i2] == at_turn_values[other * num_at_turn + i2];
+                    }
+                }
+                if (duplicate) break;
+            }
+            if (not duplicate) kept[i].push_back(j);
+        }
+    }
+    // reduced matrix game
+    vector<int> num_kept(num_at_turn);
+    vector<int> available;
+    int num_reduced = 1;
+    for (int i = 0; i < num_at_turn; i++){
+        num_kept[i] = (int) kept[i].size();
+        num_reduced *= num_kept[i];
+        for (int j: kept[i]) available.push_back(actions[i][j]);
+    }
+    vector<int> joint_actions(num_reduced * num_at_turn);
+    vector<double> reduced_values(num_reduced * num_at_turn);
+    for (int r = 0; r < num_reduced; r++){
+        int rest = r;
+        int ja = 0;
+        for (int i = num_at_turn - 1; i >= 0; i--){
+            int j = kept[i][rest % num_kept[i]];
+            rest /= num_kept[i];
+            joint_actions[r * num_at_turn + i] = actions[i][j];
+            ja += j * strides[i];
+        }
+        for (int i = 0; i < num_at_turn; i++){
+            reduced_values[r * num_at_turn + i] = at_turn_values[ja * num_at_turn + i];
+        }
+    }
+    vector<double> result_values(num_at_turn);
+    vector<double> reduced_policies(available.size());
+    int code;
+    if (num_at_turn == 2){
+        code = compute_2p_nash(num_kept.data(), available.data(), joint_actions.data(), reduced_values.data(),
+                               result_values.data(), reduced_policies.data());
+    } else {
+        code = compute_nash(num_at_turn, num_kept.data(), available.data(), joint_actions.data(),
+                            reduced_values.data(), result_values.data(), reduced_policies.data());
+    }
+    if (code != 0) return false;
+    int offset = 0;
+    int reduced_offset = 0;
+    for (int i = 0; i < num_at_turn; i++){
+        for (int j = 0; j < num_available[i]; j++) player_policies[offset + j] = 0.0;
+        for (int r = 0; r < num_kept[i]; r++) player_policies[offset + kept[i][r]] = reduced_policies[reduced_offset + r];
+        offset += num_available[i];
+        reduced_offset += num_kept[i];
+    }
+    return nash_policies_valid(num_at_turn, num_available.data(), at_turn_values.data(), player_policies);
+}
+
+void nash_search_general(NashSearch& search, GameState* state, int depth, double* values, double* policies);
+
+double nash_search_zero_sum(NashSearch& search, GameState* state, int depth, double alpha, double beta,
+                            double* policies);
+
+void nash_search_general(NashSearch& search, GameState* state, int depth, double* values, double* policies){
+    // plain backward induction for any number of players
+    search.num_nodes++;
+    int num_snakes = state->num_snakes;
+    for (int p = 0; p < num_snakes; p++) values[p] = 0.0;
+    vector<int> players;
+    vector<vector<int>> actions;
+    if (nash_node_actions(state, players, actions)) return;
+    if (depth <= 0){
+        nash_leaf_values(search, state, values);
+        return;
+    }
+    int num_at_turn = (int) players.size();
+    int num_joint = 1;
+    for (const vector<int>& cur_actions: actions) num_joint *= (int) cur_actions.size();
+    // joint actions are enumerated with the last player at turn changing fastest
+    vector<double> joint_values(num_joint * num_snakes);
+    vector<int> step_actions(num_snakes, 0);
+    vector<double> rewards(num_snakes);
+    vector<double> child_values(num_snakes);
+    for (int ja = 0; ja < num_joint; ja++){
+        int rest = ja;
+        for (int i = num_at_turn - 1; i >= 0; i--){
+            int num_actions = (int) actions[i].size();
+            int action = actions[i][rest % num_actions];
+            rest /= num_actions;
+            step_actions[players[i]] = action;
+        }
+        bool done;
+        GameState* child = nash_child(search, state, step_actions.data(), rewards.data(), &done);
+        if (done){
+            for (int p = 0; p < num_snakes; p++) child_values[p] = 0.0;
+        } else {
+            nash_search_general(search, child, depth - 1, child_values.data(), nullptr);
+        }
+        close(child);
+        for (int p = 0; p < num_snakes; p++) joint_values[ja * num_snakes + p] = rewards[p] + child_values[p];
+    }
+    // policies of the players at turn, concatenated
+    vector<int> num_available(num_at_turn);
+    int num_all = 0;
+    for (int i = 0; i < num_at_turn; i++){
+        num_available[i] = (int) actions[i].size();
+        num_all += num_available[i];
+    }
+    vector<double> player_policies(num_all);
+    if (num_at_turn == 1){
+        // a single player picks its best action
+        int best = 0;
+        for (int ja = 1; ja < num_joint; ja++){
+            if (joint_values[ja * num_snakes + players[0]] > joint_values[best * num_snakes + players[0]]) best = ja;
+        }
+        for (int ja = 0; ja < num_joint; ja++) player_policies[ja] = ja == best ? 1.0 : 0.0;
+    } else {
+        vector<double> at_turn_values(num_joint * num_at_turn);
+        for (int ja = 0; ja < num_joint; ja++){
+            for (int i = 0; i < num_at_turn; i++){
+                at_turn_values[ja * num_at_turn + i] = joint_values[ja * num_snakes + players[i]];
+            }
+        }
+        if (not nash_solve(num_at_turn, actions, at_turn_values, player_policies.data())){
+            // the solver failed or returned a non-equilibrium, fall back to uniform policies
+            search.num_nash_failures++;
+            int offset = 0;
+            for (int i = 0; i < num_at_turn; i++){
+                for (int j = 0; j < num_available[i]; j++) player_policies[offset + j] = 1.0 / num_available[i];
+                offset += num_available[i];
+            }
+        }
+    }
+    // expected values of all players under the product of the policies
+    for (int ja = 0; ja < num_joint; ja++){
+        double prob = 1.0;
+        int rest = ja;
+        int offset = num_all;
+        for (int i = num_at_turn - 1; i >= 0; i--){
+            offset -= num_available[i];
+            prob *= player_policies[offset + rest % num_available[i]];
+            rest /= num_available[i];
+        }
+        for (int p = 0; p < num_snakes; p++) values[p] += prob * joint_values[ja * num_snakes + p];
+    }
+    if (policies != nullptr){
+        int offset = 0;
+        for (int i = 0; i < num_at_turn; i++){
+            for (int j = 0; j < num_available[i]; j++){
+                policies[4 * players[i] + actions[i][j]] = player_policies[offset + j];
+            }
+            offset += num_available[i];
+        }
+    }
+}
+
+double nash_search_zero_sum(NashSearch& search, GameState* state, int depth, double alpha, double beta,
+                            double* policies){
+    // returns the value of player 0. Values outside of (alpha, beta) are only bounds (fail-soft).
+    search.num_nodes++;
+    vector<int> players;
+    vector<vector<int>> actions;
+    if (nash_node_actions(state, players, actions)) return 0.0;
+    if (depth <= 0){
+        double leaf[2];
+        nash_leaf_values(search, state, leaf);
+        return leaf[0];
+    }
+    const vector<int>& rows = actions[0];
+    const vector<int>& cols = actions[1];
+    int num_rows = (int) rows.size();
+    int num_cols = (int) cols.size();
+    vector<double> lower(num_rows * num_cols, search.value_min);
+    vector<double> upper(num_rows * num_cols, search.value_max);
+    vector<char> row_alive(num_rows, 1);
+    vector<char> col_alive(num_cols, 1);
+    int step_actions[2];
+    double rewards[2];
+    for (int a = 0; a < num_rows; a++){
+        for (int b = 0; b < num_cols; b++){
+            if (not row_alive[a]) break;
+            if (not col_alive[b]) continue;
+            // row a is dominated if the cell is not better than a row, which is at least as good in all other columns
+            double cell_alpha = -INFINITY;
+            for (int a2 = 0; a2 < num_rows; a2++){
+                if (a2 == a or not row_alive[a2]) continue;
+                bool dominates = true;
+                for (int b2 = 0; b2 < num_cols and dominates; b2++){
+                    if (b2 == b or not col_alive[b2]) continue;
+                    dominates = lower[a2 * num_cols + b2] >= upper[a * num_cols + b2];
+                }
+                if (dominates) cell_alpha = max(cell_alpha, lower[a2 * num_cols + b]);
+            }
+            // column b is dominated if the cell is not better for player 1 than such a column
+            double cell_beta = INFINITY;
+            for (int b2 = 0; b2 < num_cols; b2++){
+                if (b2 == b or not col_alive[b2]) continue;
+                bool dominates = true;
+                for (int a2 = 0; a2 < num_rows and dominates; a2++){
+                    if (a2 == a or not row_alive[a2]) continue;
+                    dominates = upper[a2 * num_cols + b2] <= lower[a2 * num_cols + b];
+                }
+                if (dominates) cell_beta = min(cell_beta, upper[a * num_cols + b2]);
+            }
+            // if the windows do not overlap, a null window decides which of the two is dominated
+            double window_alpha = cell_alpha;
+            double window_beta = cell_alpha < cell_beta ? cell_beta : nextafter(cell_alpha, INFINITY);
+            step_actions[players[0]] = rows[a];
+            step_actions[players[1]] = cols[b];
+            bool done;
+            GameState* child = nash_child(search, state, step_actions, rewards, &done);
+            double value = rewards[0];
+            if (not done){
+                value += nash_search_zero_sum(search, child, depth - 1, window_alpha - rewards[0],
+                                              window_beta - rewards[0], nullptr);
+            }
+            close(child);
+            int cell = a * num_cols + b;
+            if (value <= window_alpha){
+                upper[cell] = value;
+                row_alive[a] = 0;
+                search.num_pruned++;
+            } else if (value >= window_beta){
+                lower[cell] = value;
+                col_alive[b] = 0;
+                search.num_pruned++;
+            } else {
+                lower[cell] = value;
+                upper[cell] = value;
+            }
+            // pure strategies bound the value of the remaining game, which allows cutoffs of the parent window
+            double node_lower = -INFINITY;
+            for (int a2 = 0; a2 < num_rows; a2++){
+                if (not row_alive[a2]) continue;
+                double row_min = INFINITY;
+                for (int b2 = 0; b2 < num_cols; b2++){
+                    if (col_alive[b2]) row_min = min(row_min, lower[a2 * num_cols + b2]);
+                }
+                node_lower = max(node_lower, row_min);
+            }
+            if (node_lower >= beta) return node_lower;
+            double node_upper = INFINITY;
+            for (int b2 = 0; b2 < num_cols; b2++){
+                if (not col_alive[b2]) continue;
+                double col_max = -INFINITY;
+                for (int a2 = 0; a2 < num_rows; a2++){
+                    if (row_alive[a2]) col_max = max(col_max, upper[a2 * num_cols + b2]);
+                }
+                node_upper = min(node_upper, col_max);
+            }
+            if (node_upper <= alpha) return node_upper;
+        }
+    }
+    // all remaining cells are exact, solve the remaining matrix game
+    vector<int> live_rows;
+    vector<int> live_cols;
+    for (int a = 0; a < num_rows; a++) if (row_alive[a]) live_rows.push_back(a);
+    for (int b = 0; b < num_cols; b++) if (col_alive[b]) live_cols.push_back(b);
+    int num_live_rows = (int) live_rows.size();
+    int num_live_cols = (int) live_cols.size();
+    vector<vector<int>> live_actions(2);
+    for (int a: live_rows) live_actions[0].push_back(rows[a]);
+    for (int b: live_cols) live_actions[1].push_back(cols[b]);
+    vector<double> joint_values;
+    for (int a: live_rows){
+        for (int b: live_cols){
+            joint_values.push_back(lower[a * num_cols + b]);
+            joint_values.push_back(-lower[a * num_cols + b]);
+        }
+    }
+    vector<double> player_policies(num_live_rows + num_live_cols);
+    if (not nash_solve(2, live_actions, joint_values, player_policies.data())){
+        search.num_nash_failures++;
+        for (int i = 0; i < num_live_rows; i++) player_policies[i] = 1.0 / num_live_rows;
+        for (int j = 0; j < num_live_cols; j++) player_policies[num_live_rows + j] = 1.0 / num_live_cols;
+    }
+    double value = 0.0;
+    for (int i = 0; i < num_live_rows; i++){
+        for (int j = 0; j < num_live_cols; j++){
+            value += player_policies[i] * player_policies[num_live_rows + j] * joint_values[2 * (i * num_live_cols + j)];
+        }
+    }
+    if (policies != nullptr){
+        for (int i = 0; i < num_live_rows; i++) policies[4 * players[0] + rows[live_rows[i]]] = player_policies[i];
+        for (int j = 0; j < num_live_cols; j++){
+            policies[4 * players[1] + cols[live_cols[j]]] = player_policies[num_live_rows + j];
+        }
+    }
+    return value;
+}
+
+void nash_search(
+        GameState* root,
+        int depth,
+        bool prune,
+        double value_min,
+        double value_max,
+        int leaf_policy,
+        int num_leaf_rollouts,
+        int leaf_max_turns,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        uint64_t seed,
+        double* values,
+        double* policies,
+        int64_t* stats
+){
+    NashSearch search;
+    search.num_nodes = 0;
+    search.num_pruned = 0;
+    search.num_nash_failures = 0;
+    search.prune = prune and root->num_snakes == 2;
+    search.value_min = value_min;
+    search.value_max = value_max;
+    search.leaf_policy = leaf_policy;
+    search.num_leaf_rollouts = num_leaf_rollouts;
+    search.leaf_max_turns = leaf_max_turns;
+    search.reward_type = reward_type;
+    search.living_reward = living_reward;
+    search.terminal_reward = terminal_reward;
+    search.rng.seed(seed);
+    // the search holds at most one successor per depth and one rollout state at the same time
+    search.pool = pool_create(root->num_bytes, depth + 2, 0);
+    for (int i = 0; i < root->num_snakes * 4; i++) policies[i] = 0.0;
+    if (search.prune){
+        double value = nash_search_zero_sum(search, root, depth, -INFINITY, INFINITY, policies);
+        values[0] = value;
+        values[1] = -value;
+    } else {
+        nash_search_general(search, root, depth, values, policies);
+    }
+    pool_close(search.pool);
+    stats[0] = search.num_nodes;
+    stats[1] = search.num_pruned;
+    stats[2] = search.num_nash_failures;
+}
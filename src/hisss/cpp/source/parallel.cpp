@@ -0,0 +1,42 @@
+//
+// Minimal worker pool for running independent jobs on several threads
+//
+
+#include <atomic>
+#include <thread>
+#include <vector>
+
+#include "../header/parallel.h"
+
+using namespace std;
+
+int resolve_num_threads(int num_threads, int num_jobs){
+    // non-positive values use all available cores, but never more threads than jobs
+    if (num_threads <= 0) num_threads = (int) thread::hardware_concurrency();
+    if (num_threads <= 0) num_threads = 1;
+    if (num_threads > num_jobs) num_threads = num_jobs;
+    return num_threads;
+}
+
+void parallel_for(int num_jobs, int num_threads, const function<void(int)>& job){
+    if (num_jobs <= 0) return;
+    num_threads = resolve_num_threads(num_threads, num_jobs);
+    if (num_threads == 1){
+        for (int i = 0; i < num_jobs; i++) job(i);
+        return;
+    }
+    // workers pull job indices from a shared counter, which balances jobs of very different length
+    atomic<int> next_job(0);
+    auto worker = [&](){
+        while (true){
+            int i = next_job.fetch_add(1);
+            if (i >= num_jobs) break;
+            job(i);
+        }
+    };
+    vector<thread> workers;
+    workers.reserve(num_threads - 1);
+    for (int t = 0; t < num_threads - 1; t++) workers.emplace_back(worker);
+    worker();  // the calling thread works as well
+    for (thread& t: workers) t.join();
+}
@@ -0,0 +1,125 @@
+//
+// Native counterparts of the reward functions in hisss/game/rewards.py
+//
+
+#include "../header/rewards.h"
+
+void standard_rewards(
+        double living_reward,
+        double terminal_reward,
+        int num_players,
+        const bool* at_turn,
+        const bool* at_turn_last,
+        double* rewards
+){
+    int num_at_turn = 0;
+    int last_at_turn = -1;
+    for (int p = 0; p < num_players; p++){
+        if (at_turn[p]){
+            num_at_turn++;
+            last_at_turn = p;
+        }
+    }
+    // if everyone died, then nobody gets any reward
+    if (num_at_turn == 0) return;
+    // all players that died this round get a negative terminal reward
+    for (int p = 0; p < num_players; p++){
+        if (at_turn_last[p] and not at_turn[p]) rewards[p] = -terminal_reward;
+    }
+    // last player alive gets positive reward
+    if (num_at_turn == 1){
+        rewards[last_at_turn] = terminal_reward;
+        return;
+    }
+    // if game has not ended, all player alive get the living reward
+    for (int p = 0; p < num_players; p++){
+        if (at_turn[p]) rewards[p] = living_reward;
+    }
+}
+
+double kill_reward_dead(int num_at_turn_last, int num_at_turn){
+    if (num_at_turn_last == 4 and num_at_turn == 3) return -1.0;
+    if (num_at_turn_last == 4 and num_at_turn == 2) return -2.0 / 3.0;
+    if (num_at_turn_last == 4 and num_at_turn == 1) return -1.0 / 3.0;
+    if (num_at_turn_last == 3 and num_at_turn == 2) return -2.0 / 3.0;
+    if (num_at_turn_last == 3 and num_at_turn == 1) return -1.0 / 3.0;
+    if (num_at_turn_last == 2 and num_at_turn == 1) return -1.0 / 3.0;
+    return 0.0;
+}
+
+double kill_reward_alive(int num_at_turn_last, int num_at_turn){
+    if (num_at_turn_last == 4 and num_at_turn == 3) return 1.0 / 3.0;
+    if (num_at_turn_last == 4 and num_at_turn == 2) return 2.0 / 3.0;
+    if (num_at_turn_last == 4 and num_at_turn == 1) return 1.0;
+    if (num_at_turn_last == 3 and num_at_turn == 2) return 1.0 / 3.0;
+    if (num_at_turn_last == 3 and num_at_turn == 1) return 2.0 / 3.0;
+    if (num_at_turn_last == 2 and num_at_turn == 1) return 1.0 / 3.0;
+    return 0.0;
+}
+
+void kill_rewards(
+        int num_players,
+        const bool* at_turn,
+        const bool* at_turn_last,
+        double* rewards
+){
+    int num_at_turn = 0;
+    int num_at_turn_last = 0;
+    int num_died = 0;
+    for (int p = 0; p < num_players; p++){
+        num_at_turn += at_turn[p];
+        num_at_turn_last += at_turn_last[p];
+        num_died += at_turn_last[p] and not at_turn[p];
+    }
+    // if everyone died or no one died, then no one gets any reward
+    if (num_at_turn == 0 or num_died == 0) return;
+    double dead_reward = kill_reward_dead(num_at_turn_last, num_at_turn);
+    double alive_reward = kill_reward_alive(num_at_turn_last, num_at_turn);
+    for (int p = 0; p < num_players; p++){
+        if (at_turn_last[p] and not at_turn[p]) rewards[p] = dead_reward;
+        if (at_turn[p]) rewards[p] = alive_reward;
+    }
+}
+
+void coop_rewards(
+        double living_reward,
+        double terminal_reward,
+        int num_players,
+        const bool* at_turn,
+        const bool* at_turn_last,
+        double* rewards
+){
+    int num_at_turn = 0;
+    int num_at_turn_last = 0;
+    for (int p = 0; p < num_players; p++){
+        num_at_turn += at_turn[p];
+        num_at_turn_last += at_turn_last[p];
+    }
+    int num_dead = num_at_turn_last - num_at_turn;
+    // all players get negative terminal reward if a snake died
+    for (int p = 0; p < num_players; p++){
+        if (at_turn_last[p] and not at_turn[p]) rewards[p] += terminal_reward * num_at_turn_last;
+        if (at_turn[p]) rewards[p] += terminal_reward * num_dead + living_reward;
+    }
+}
+
+void compute_rewards(
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        int num_players,
+        const bool* at_turn,
+        const bool* at_turn_last,
+        double* rewards
+){
+    for (int p = 0; p < num_players; p++){
+        rewards[p] = 0.0;
+    }
+    if (reward_type == REWARD_KILL){
+        kill_rewards(num_players, at_turn, at_turn_last, rewards);
+    } else if (reward_type == REWARD_COOP){
+        coop_rewards(living_reward, terminal_reward, num_players, at_turn, at_turn_last, rewards);
+    } else {
+        standard_rewards(living_reward, terminal_reward, num_players, at_turn, at_turn_last, rewards);
+    }
+}
@@ -0,0 +1,203 @@
+//
+// Playing games until the end with simple rollout policies, optionally on several threads
+//
+
+#include <cmath>
+#include <vector>
+
+#include "../header/rollout.h"
+#include "../header/batch.h"
+#include "../header/parallel.h"
+
+using namespace std;
+
+void sample_rollout_actions(GameState* state, int policy, StateRng& rng, int* actions){
+    int legal[4];
+    int candidates[4];
+    for (Snake* s: state->snakes()){
+        actions[s->id] = 0;
+        if (not s->alive) continue;
+        int num_candidates = 0;
+        if (policy == ROLLOUT_SAFE or not state->all_actions_legal){
+            legal_actions(state, s->id, legal);
+            for (int a = 0; a < 4; a++){
+                if (legal[a]) candidates[num_candidates++] = a;
+            }
+        }
+        // either every action is legal or there is no safe action left
+        if (num_candidates == 0){
+            for (int a = 0; a < 4; a++) candidates[a] = a;
+            num_candidates = 4;
+        }
+        actions[s->id] = candidates[rng() % num_candidates];
+    }
+}
+
+void sample_table_actions(GameState* state, const double* probs, StateRng& rng, int* actions){
+    int legal[4] = {1, 1, 1, 1};
+    double weights[4];
+    for (Snake* s: state->snakes()){
+        actions[s->id] = 0;
+        if (not s->alive) continue;
+        if (not state->all_actions_legal) legal_actions(state, s->id, legal);
+        double weight_sum = 0.0;
+        for (int a = 0; a < 4; a++){
+            weights[a] = legal[a] ? probs[4 * s->id + a] : 0.0;
+            weight_sum += weights[a];
+        }
+        // fall back to uniform over the legal actions if the table does not cover any of them
+        if (weight_sum <= 0.0){
+            for (int a = 0; a < 4; a++){
+                weights[a] = legal[a] ? 1.0 : 0.0;
+                weight_sum += weights[a];
+            }
+        }
+        if (weight_sum <= 0.0) continue;
+        double r = (double) rng() / ((double) StateRng::max() + 1.0) * weight_sum;
+        int action = -1;
+        for (int a = 0; a < 4; a++){
+            if (weights[a] <= 0.0) continue;
+            action = a;
+            r -= weights[a];
+            if (r < 0.0) break;
+        }
+        actions[s->id] = action;
+    }
+}
+
+void rollout(
+        GameState* state,
+        int policy,
+        int max_turns,
+        StateRng& rng,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* cum_rewards,
+        int* turns_played,
+        bool* done
+){
+    int num_snakes = state->num_snakes;
+    vector<int> actions(num_snakes);
+    vector<double> rewards(num_snakes);
+    vector<char> at_turn(num_snakes, 0);
+    for (int p = 0; p < num_snakes; p++) cum_rewards[p] = 0.0;
+    *turns_played = 0;
+    *done = is_terminal(state, players_at_turn(state, reinterpret_cast<bool*>(at_turn.data())));
+    while (not *done and (max_turns < 0 or *turns_played < max_turns)){
+        sample_rollout_actions(state, policy, rng, actions.data());
+        *done = step_with_rewards(state, actions.data(), reward_type, living_reward, terminal_reward,
+                                  rewards.data());
+        for (int p = 0; p < num_snakes; p++) cum_rewards[p] += rewards[p];
+        (*turns_played)++;
+    }
+}
+
+void rollout_many(
+        GameState** states,
+        int num_states,
+        int policy,
+        int max_turns,
+        int num_threads,
+        const uint64_t* seeds,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* cum_rewards,
+        int* turns_played,
+        bool* dones
+){
+    // every job only touches its own state and output rows, so no synchronization is necessary
+    parallel_for(num_states, num_threads, [&](int i){
+        StateRng rng(seeds[i]);
+        rollout(states[i], policy, max_turns, rng, reward_type, living_reward, terminal_reward,
+                cum_rewards + i * states[i]->num_snakes, turns_played + i, dones + i);
+    });
+}
+
+int simulate(
+        GameState* state,
+        int policy,
+        const double* action_probs,
+        int num_prob_turns,
+        int max_turns,
+        StateRng& rng,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        int* actions,
+        double* rewards,
+        bool* alive,
+        int* lengths,
+        int* healths,
+        int* death_causes,
+        bool* done
+){
+    int num_snakes = state->num_snakes;
+    vector<int> cur_actions(num_snakes);
+    vector<char> at_turn(num_snakes, 0);
+    int turn = 0;
+    *done = is_terminal(state, players_at_turn(state, reinterpret_cast<bool*>(at_turn.data())));
+    while (not *done and turn < max_turns){
+        if (policy == ROLLOUT_TABLE){
+            int prob_turn = turn < num_prob_turns ? turn : num_prob_turns - 1;
+            sample_table_actions(state, action_probs + prob_turn * num_snakes * 4, rng, cur_actions.data());
+        } else {
+            sample_rollout_actions(state, policy, rng, cur_actions.data());
+        }
+        int row = turn * num_snakes;
+        // the recorded actions include changes of the draw prevention
+        *done = step_with_rewards(state, cur_actions.data(), reward_type, living_reward, terminal_reward,
+                                  rewards + row, actions + row);
+        for (Snake* s: state->snakes()){
+            alive[row + s->id] = s->alive;
+            lengths[row + s->id] = s->length;
+            healths[row + s->id] = s->health;
+            death_causes[row + s->id] = s->death_cause;
+        }
+        turn++;
+    }
+    return turn;
+}
+
+void estimate_values(
+        GameState* root,
+        int num_playouts,
+        int policy,
+        int max_turns,
+        int num_threads,
+        const uint64_t* seeds,
+        bool resample_chance,
+        int reward_type,
+        double living_reward,
+        double terminal_reward,
+        double* means,
+        double* std_errors
+){
+    int num_snakes = root->num_snakes;
+    vector<double> returns(num_playouts * num_snakes);
+    // the root is only read, every job plays on its own copy and writes its own row of returns
+    parallel_for(num_playouts, num_threads, [&](int i){
+        StateRng rng(seeds[i]);
+        GameState* state = clone_into(root, nullptr);
+        if (resample_chance) state->rng.seed(((uint64_t) rng() << 32) | rng());
+        int turns_played;
+        bool done;
+        rollout(state, policy, max_turns, rng, reward_type, living_reward, terminal_reward,
+                returns.data() + i * num_snakes, &turns_played, &done);
+        close(state);
+    });
+    for (int p = 0; p < num_snakes; p++){
+        double sum = 0.0;
+        for (int i = 0; i < num_playouts; i++) sum += returns[i * num_snakes + p];
+        double mean = sum / num_playouts;
+        double sq_sum = 0.0;
+        for (int i = 0; i < num_playouts; i++){
+            double diff = returns[i * num_snakes + p] - mean;
+            sq_sum += diff * diff;
+        }
+        means[p] = mean;
+        // standard error of the mean with the unbiased sample variance
+        std_errors[p] = num_playouts > 1 ? sqrt(sq_sum / (num_playouts - 1) / num_playouts) : 0.0;
+    }
+}
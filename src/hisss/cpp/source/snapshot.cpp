@@ -0,0 +1,149 @@
+//
+// Compact binary snapshots of game states
+//
+#include "../header/snapshot.h"
+
+const int SNAPSHOT_HEADER_SIZE = 20;
+const int SNAPSHOT_SNAKE_SIZE = 8;  // stats without body and board
+
+int hazard_words(int w, int h){
+    return (w * h + 31) / 32;
+}
+
+int snapshot_size(GameState* state){
+    int n = SNAPSHOT_HEADER_SIZE;
+    for (Snake* s: state->snakes()){
+        n += SNAPSHOT_SNAKE_SIZE + 2 * s->body_size + 2 * s->board_words;
+    }
+    n += 3 * state->num_food;
+    n += hazard_words(state->w, state->h);
+    return n;
+}
+
+void state_to_snapshot(GameState* state, int32_t* buf){
+    int i = 0;
+    buf[i++] = SNAPSHOT_MAGIC;
+    buf[i++] = SNAPSHOT_VERSION;
+    buf[i++] = snapshot_size(state);
+    buf[i++] = state->w;
+    buf[i++] = state->h;
+    buf[i++] = state->num_snakes;
+    buf[i++] = state->snake(0)->body_cap;
+    buf[i++] = state->food_cap;
+    buf[i++] = state->turn;
+    buf[i++] = state->min_food;
+    buf[i++] = state->food_spawn_chance;
+    buf[i++] = state->wrapped;
+    buf[i++] = state->royale;
+    buf[i++] = state->shrink_n_turns;
+    buf[i++] = state->hazard_damage;
+    buf[i++] = state->all_actions_legal;
+    buf[i++] = state->draw_prevention;
+    buf[i++] = (int32_t) (uint32_t) state->rng.state;
+    buf[i++] = (int32_t) (uint32_t) (state->rng.state >> 32);
+    buf[i++] = state->num_food;
+    for (Snake* s: state->snakes()){
+        buf[i++] = s->alive;
+        buf[i++] = s->health;
+        buf[i++] = s->length;
+        buf[i++] = s->max_health;
+        buf[i++] = s->death_cause;
+        buf[i++] = s->death_turn;
+        buf[i++] = s->killer_id;
+        buf[i++] = s->body_size;
+        for (Coord c: s->body()){
+            buf[i++] = c.first;
+            buf[i++] = c.second;
+        }
+        // the board is stored explicitly, because it does not mark cells of stacked segments that were popped
+        Bitboard b = s->board();
+        for (int j = 0; j < b.num_words; j++){
+            buf[i++] = (int32_t) (uint32_t) b.words[j];
+            buf[i++] = (int32_t) (uint32_t) (b.words[j] >> 32);
+        }
+    }
+    for (int f = 0; f < state->num_food; f++){
+        buf[i++] = state->food()[f].first;
+        buf[i++] = state->food()[f].second;
+        buf[i++] = state->food_spawn_turns()[f];
+    }
+    int num_cells = state->w * state->h;
+    for (int j = 0; j < hazard_words(state->w, state->h); j++){
+        uint32_t word = 0;
+        for (int k = 0; k < 32 and 32 * j + k < num_cells; k++){
+            if (state->hazards()[32 * j + k]) word |= 1U << k;
+        }
+        buf[i++] = (int32_t) word;
+    }
+}
+
+GameState* state_from_snapshot(const int32_t* buf, int n){
+    if (n < SNAPSHOT_HEADER_SIZE) return nullptr;
+    if (buf[0] != SNAPSHOT_MAGIC or buf[1] != SNAPSHOT_VERSION or buf[2] != n) return nullptr;
+    int w = buf[3], h = buf[4], num_snakes = buf[5], body_cap = buf[6], food_cap = buf[7];
+    int num_food = buf[19];
+    if (w <= 0 or h <= 0 or num_snakes <= 0 or body_cap <= 0 or num_food < 0 or num_food > food_cap) return nullptr;
+    // check the total size before touching any variable length record
+    int board_words = bitboard_words(w, h);
+    int expected = SNAPSHOT_HEADER_SIZE;
+    for (int id = 0; id < num_snakes; id++){
+        if (expected + SNAPSHOT_SNAKE_SIZE > n) return nullptr;
+        int body_size = buf[expected + 7];
+        if (body_size < 0 or body_size > body_cap) return nullptr;
+        expected += SNAPSHOT_SNAKE_SIZE + 2 * body_size + 2 * board_words;
+    }
+    expected += 3 * num_food + hazard_words(w, h);
+    if (expected != n) return nullptr;
+    int food_start = n - 3 * num_food - hazard_words(w, h);
+    for (int f = 0; f < num_food; f++){
+        int x = buf[food_start + 3 * f], y = buf[food_start + 3 * f + 1];
+        if (x < 0 or x >= w or y < 0 or y >= h) return nullptr;
+    }
+
+    GameState* state = allocate_state(w, h, num_snakes, body_cap, food_cap);
+    state->turn = buf[8];
+    state->min_food = buf[9];
+    state->food_spawn_chance = buf[10];
+    state->wrapped = buf[11];
+    state->royale = buf[12];
+    state->shrink_n_turns = buf[13];
+    state->hazard_damage = buf[14];
+    state->all_actions_legal = buf[15];
+    state->draw_prevention = buf[16];
+    state->rng.state = (uint64_t) (uint32_t) buf[17] | ((uint64_t) (uint32_t) buf[18] << 32);
+    int i = SNAPSHOT_HEADER_SIZE;
+    for (Snake* s: state->snakes()){
+        s->alive = buf[i++];
+        s->health = buf[i++];
+        s->length = buf[i++];
+        s->max_health = buf[i++];
+        s->death_cause = buf[i++];
+        s->death_turn = buf[i++];
+        s->killer_id = buf[i++];
+        int body_size = buf[i++];
+        // bodies are stored from head to tail
+        for (int j = body_size - 1; j >= 0; j--){
+            s->push_head(Coord(buf[i + 2 * j], buf[i + 2 * j + 1]));
+        }
+        i += 2 * body_size;
+        Bitboard b = s->board();
+        for (int j = 0; j < b.num_words; j++){
+            b.words[j] = (uint64_t) (uint32_t) buf[i] | ((uint64_t) (uint32_t) buf[i + 1] << 32);
+            i += 2;
+        }
+    }
+    for (int f = 0; f < num_food; f++){
+        state->add_food(Coord(buf[i], buf[i + 1]), buf[i + 2]);
+        i += 3;
+    }
+    int num_cells = w * h;
+    for (int j = 0; j < hazard_words(w, h); j++){
+        auto word = (uint32_t) buf[i++];
+        for (int k = 0; k < 32 and 32 * j + k < num_cells; k++){
+            state->hazards()[32 * j + k] = (word >> k) & 1U;
+        }
+    }
+    state->update_occupied();
+    recompute_hash(state);
+    return state;
+}
@@ -0,0 +1,91 @@
+//
+// Recycling allocator for the memory blocks of game states
+//
+#include <cstdlib>
+#if defined(_MSC_VER)
+    #include <malloc.h>
+#endif
+
+#include "../header/state_pool.h"
+
+// slots are aligned to cache lines, such that states used by different threads do not share a line
+const int64_t POOL_ALIGNMENT = 64;
+const int POOL_CHUNK_SLOTS = 256;
+
+char* aligned_chunk_alloc(int64_t num_bytes){
+    // malloc only guarantees the alignment of the largest scalar type
+#if defined(_MSC_VER)
+    return static_cast<char*>(_aligned_malloc(num_bytes, POOL_ALIGNMENT));
+#else
+    void* chunk = nullptr;
+    if (posix_memalign(&chunk, POOL_ALIGNMENT, num_bytes) != 0) return nullptr;
+    return static_cast<char*>(chunk);
+#endif
+}
+
+void aligned_chunk_free(char* chunk){
+#if defined(_MSC_VER)
+    _aligned_free(chunk);
+#else
+    free(chunk);
+#endif
+}
+
+bool add_chunk(StatePool* pool, int num_new_slots){
+    char* chunk = aligned_chunk_alloc(pool->slot_size * num_new_slots);
+    if (chunk == nullptr) return false;
+    pool->chunks.push_back(chunk);
+    // push in reverse, such that slots are handed out in memory order
+    for (int i = num_new_slots - 1; i >= 0; i--){
+        pool->free_list.push_back(reinterpret_cast<GameState*>(chunk + i * pool->slot_size));
+    }
+    pool->num_slots += num_new_slots;
+    return true;
+}
+
+StatePool* pool_create(int64_t slot_size, int capacity, int num_preallocated){
+    auto* pool = new StatePool();
+    pool->slot_size = (slot_size + POOL_ALIGNMENT - 1) / POOL_ALIGNMENT * POOL_ALIGNMENT;
+    pool->capacity = capacity;
+    pool->num_slots = 0;
+    pool->num_in_use = 0;
+    pool->peak_in_use = 0;
+    pool->num_overflows = 0;
+    pool->free_list.reserve(capacity);
+    if (num_preallocated > capacity) num_preallocated = capacity;
+    if (num_preallocated > 0) add_chunk(pool, num_preallocated);
+    return pool;
+}
+
+void pool_close(StatePool* pool){
+    for (char* chunk: pool->chunks) aligned_chunk_free(chunk);
+    delete pool;
+}
+
+GameState* pool_acquire(StatePool* pool, int64_t num_bytes){
+    lock_guard<mutex> lock(pool->m);
+    if (num_bytes > pool->slot_size){
+        pool->num_overflows++;
+        return nullptr;
+    }
+    if (pool->free_list.empty()){
+        int num_new_slots = pool->capacity - pool->num_slots;
+        if (num_new_slots > POOL_CHUNK_SLOTS) num_new_slots = POOL_CHUNK_SLOTS;
+        // a full pool or a failed allocation of a new chunk fall back to the heap
+        if (num_new_slots <= 0 or not add_chunk(pool, num_new_slots)){
+            pool->num_overflows++;
+            return nullptr;
+        }
+    }
+    GameState* state = pool->free_list.back();
+    pool->free_list.pop_back();
+    pool->num_in_use++;
+    if (pool->num_in_use > pool->peak_in_use) pool->peak_in_use = pool->num_in_use;
+    return state;
+}
+
+void pool_release(StatePool* pool, GameState* state){
+    lock_guard<mutex> lock(pool->m);
+    pool->free_list.push_back(state);
+    pool->num_in_use--;
+}
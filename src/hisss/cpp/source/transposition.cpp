@@ -0,0 +1,105 @@
+//
+// Fixed-size transposition table keyed by the Zobrist hash of a game state
+//
+#include <cstring>
+
+#include "../header/transposition.h"
+
+TranspositionTable* tt_create(int num_buckets, int num_players, int num_actions, int num_stripes){
+    auto* tt = new TranspositionTable();
+    int num_slots = 2 * num_buckets;
+    tt->num_buckets = num_buckets;
+    tt->num_players = num_players;
+    tt->num_actions = num_actions;
+    tt->generation = 0;
+    tt->keys = vector<uint64_t>(num_slots, 0);
+    tt->depths = vector<int>(num_slots, -1);
+    tt->generations = vector<int>(num_slots, 0);
+    tt->visits = vector<int>(num_slots, 0);
+    tt->values = vector<double>((size_t) num_slots * num_players, 0);
+    tt->policies = vector<double>((size_t) num_slots * num_players * num_actions, 0);
+    tt->stripes = vector<mutex>(num_stripes);
+    tt->num_hits = 0;
+    tt->num_misses = 0;
+    return tt;
+}
+
+void tt_close(TranspositionTable* tt){
+    delete tt;
+}
+
+void tt_clear(TranspositionTable* tt){
+    for (auto& m: tt->stripes) m.lock();
+    for (int& d: tt->depths) d = -1;
+    tt->num_hits = 0;
+    tt->num_misses = 0;
+    for (auto& m: tt->stripes) m.unlock();
+}
+
+void tt_new_generation(TranspositionTable* tt){
+    // entries of older generations are replaced first, independent of their depth
+    for (auto& m: tt->stripes) m.lock();
+    tt->generation++;
+    for (auto& m: tt->stripes) m.unlock();
+}
+
+int tt_num_slots(TranspositionTable* tt){
+    return 2 * tt->num_buckets;
+}
+
+int find_slot(TranspositionTable* tt, int bucket, uint64_t key){
+    for (int slot = 2 * bucket; slot < 2 * bucket + 2; slot++){
+        if (tt->depths[slot] >= 0 and tt->keys[slot] == key) return slot;
+    }
+    return -1;
+}
+
+int tt_probe(TranspositionTable* tt, uint64_t key, double* values, double* policy, int* depth, int* visits){
+    int bucket = (int) (key % (uint64_t) tt->num_buckets);
+    lock_guard<mutex> lock(tt->stripes[bucket % tt->stripes.size()]);
+    int slot = find_slot(tt, bucket, key);
+    if (slot < 0){
+        tt->num_misses++;
+        return -1;
+    }
+    tt->num_hits++;
+    int policy_size = tt->num_players * tt->num_actions;
+    if (values != nullptr){
+        memcpy(values, tt->values.data() + (size_t) slot * tt->num_players, tt->num_players * sizeof(double));
+    }
+    if (policy != nullptr){
+        memcpy(policy, tt->policies.data() + (size_t) slot * policy_size, policy_size * sizeof(double));
+    }
+    if (depth != nullptr) *depth = tt->depths[slot];
+    if (visits != nullptr) *visits = tt->visits[slot];
+    return slot;
+}
+
+int tt_store(TranspositionTable* tt, uint64_t key, int depth, int visits, const double* values, const double* policy){
+    int bucket = (int) (key % (uint64_t) tt->num_buckets);
+    lock_guard<mutex> lock(tt->stripes[bucket % tt->stripes.size()]);
+    int preferred = 2 * bucket;
+    int slot = find_slot(tt, bucket, key);
+    if (slot >= 0){
+        // an existing entry of the same key is only replaced by results of at least the same depth
+        if (depth < tt->depths[slot] and tt->generations[slot] == tt->generation) return -1;
+    } else if (tt->depths[preferred] < 0 or tt->generations[preferred] != tt->generation
+            or depth >= tt->depths[preferred]){
+        slot = preferred;
+    } else {
+        slot = preferred + 1;
+    }
+    int policy_size = tt->num_players * tt->num_actions;
+    tt->keys[slot] = key;
+    tt->depths[slot] = depth;
+    tt->generations[slot] = tt->generation;
+    tt->visits[slot] = visits;
+    memcpy(tt->values.data() + (size_t) slot * tt->num_players, values, tt->num_players * sizeof(double));
+    double* policy_row = tt->policies.data() + (size_t) slot * policy_size;
+    if (policy != nullptr){
+        memcpy(policy_row, policy, policy_size * sizeof(double));
+    } else {
+        memset(policy_row, 0, policy_size * sizeof(double));
+    }
+    return slot;
+}
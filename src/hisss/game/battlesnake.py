@@ -2,16 +2,18 @@ import ctypes as ct
 import itertools
 import math
 import random
-from typing import Optional, Any
+from typing import Optional, Any, Sequence
 
 import numpy as np
 
-from hisss.cpp.lib import CPP_LIB
+from hisss.cpp.lib import CPP_LIB, Struct
 from hisss.game.state import (
     CAUSE_INT_TO_STR,
     CAUSE_STR_TO_INT,
     BattleSnakeState,
+    BattleSnakeStateArrays,
     EliminationEvent,
+    JointActionOutcomes,
 )
 from hisss.game.config import (
     BattleSnakeConfig,
@@ -20,7 +22,12 @@ from hisss.game.config import (
     validate_battlesnake_cfg,
 )
 from hisss.game.encoding import num_layers_general, layers_per_player, layers_per_enemy
-from hisss.game.rewards import get_battlesnake_reward_func_from_cfg
+from hisss.game.rewards import (
+    REWARD_TYPE_TO_INT,
+    get_battlesnake_reward_func_from_cfg,
+    get_battlesnake_reward_type_from_cfg,
+)
+from hisss.game.state_pool import StatePool
 from hisss.game.utils import int_to_perm
 
 #: Constant representing the UP-direction in the Grid world
@@ -36,6 +43,192 @@ DOWN: int = 2
 LEFT: int = 3
 
 
+def _init_cpp_state(cfg: BattleSnakeConfig):  # -> ct.POINTER(Struct)
+    # snakes
+    spawn_snakes_randomly = True if cfg.init_snake_pos is None else False
+    if cfg.init_snake_pos is not None:
+        # find the longest body, this determines the array shape
+        snake_pos = {}  # we need a separate dict to not alter the config object
+        body_lengths = []
+        for s in range(cfg.num_players):
+            cur_snake_pos = []
+            for pos in cfg.init_snake_pos[s]:
+                cur_snake_pos.append((pos[0], pos[1]))
+            cur_snake_pos = list(dict.fromkeys(cur_snake_pos))  # remove duplicates
+            snake_pos[s] = cur_snake_pos
+            body_lengths.append(len(cur_snake_pos))
+        max_body_len = max(body_lengths)
+        body_len_arr = np.asarray(body_lengths, dtype=ct.c_int)
+        body_len_p = body_len_arr.ctypes.data_as(ct.POINTER(ct.c_int))
+        snake_pos_arr = (
+            np.zeros(shape=(cfg.num_players, max_body_len, 2), dtype=ct.c_int) - 1
+        )
+        for s in range(cfg.num_players):  # convert dictionary to numpy array
+            for i, pos in enumerate(snake_pos[s]):
+                snake_pos_arr[s, i, 0] = pos[0]
+                snake_pos_arr[s, i, 1] = pos[1]
+        snake_pos_p = snake_pos_arr.ctypes.data_as(ct.POINTER(ct.c_int))
+    else:
+        body_len_p = ct.cast(0, ct.POINTER(ct.c_int))  # NULL-Pointer
+        snake_pos_p = ct.cast(0, ct.POINTER(ct.c_int))  # NULL-Pointer
+        max_body_len = -1
+    # snake length
+    snake_len_arr = np.asarray(cfg.init_snake_len, dtype=ct.c_int)
+    snake_len_p = snake_len_arr.ctypes.data_as(ct.POINTER(ct.c_int))
+    # snakes alive
+    snake_alive_arr = np.asarray(cfg.init_snakes_alive, dtype=bool)
+    snake_alive_p = snake_alive_arr.ctypes.data_as(ct.POINTER(ct.c_bool))
+    # health
+    snake_health_arr = np.asarray(cfg.init_snake_health, dtype=ct.c_int)
+    snake_health_p = snake_health_arr.ctypes.data_as(ct.POINTER(ct.c_int))
+    snake_max_health_arr = np.asarray(cfg.max_snake_health, dtype=ct.c_int)
+    snake_max_health_p = snake_max_health_arr.ctypes.data_as(ct.POINTER(ct.c_int))
+    # food
+    if cfg.init_food_pos is None:
+        num_init_food = -1  # -1 is signal for random food spawning
+        food_pos_p = ct.cast(0, ct.POINTER(ct.c_int))  # NULL-Pointer
+    elif not cfg.init_food_pos:
+        num_init_food = (
+            -2
+        )  # flag to indicate that no food should be spawned at beginning
+        food_pos_p = ct.cast(0, ct.POINTER(ct.c_int))
+    else:
+        num_init_food = len(cfg.init_food_pos)
+        np_arr = np.asarray(cfg.init_food_pos, dtype=ct.c_int)
+        food_pos_p = np_arr.ctypes.data_as(ct.POINTER(ct.c_int))
+    # food spawn turns: NULL lets C++ fill in init_turns_played as fallback
+    food_spawn_turns_p = ct.cast(0, ct.POINTER(ct.c_int))
+    # hazards, we need to transpose because cpp uses flattened array (this is more efficient)
+    hazard_arr = np.zeros(shape=(cfg.h, cfg.w), dtype=bool)
+    if cfg.init_hazards is not None:
+        for hazard_tile in cfg.init_hazards:
+            hazard_arr[hazard_tile[1], hazard_tile[0]] = True
+    hazards_p = hazard_arr.ctypes.data_as(ct.POINTER(ct.c_bool))
+    # c++ call
+    return CPP_LIB.lib.init_cpp(
+        cfg.w,
+        cfg.h,
+        cfg.num_players,
+        cfg.min_food,
+        cfg.food_spawn_chance,
+        cfg.init_turns_played,
+        spawn_snakes_randomly,
+        body_len_p,
+        max_body_len,
+        snake_pos_p,
+        num_init_food,
+        food_pos_p,
+        food_spawn_turns_p,
+        snake_alive_p,
+        snake_health_p,
+        snake_len_p,
+        snake_max_health_p,
+        cfg.wrapped,
+        cfg.royale,
+        cfg.shrink_n_turns,
+        cfg.hazard_damage,
+        hazards_p,
+        cfg.all_actions_legal,
+        cfg.draw_prevention,
+    )
+
+
+def _obs_shape(cfg: BattleSnakeConfig, never_flatten: bool) -> tuple[int, ...]:
+    # number layers
+    num_enemies = 1 if cfg.ec.compress_enemies else (cfg.num_players - 1)
+    offset = num_layers_general(cfg.ec) + layers_per_player(cfg.ec)
+    z_dim = offset + num_enemies * layers_per_enemy(cfg.ec)
+    # width and height
+    width = cfg.w
+    height = cfg.h
+    if cfg.ec.centered:
+        width = 2 * cfg.w - 1
+        height = 2 * cfg.h - 1
+    elif not cfg.wrapped:  # wrapped does not have a border
+        # +1 on every side for border of field
+        width = cfg.w + 2
+        height = cfg.h + 2
+    # number of dim
+    if cfg.ec.flatten and not never_flatten:
+        dim = width * height * z_dim
+        return tuple(
+            [
+                dim,
+            ]
+        )
+    return width, height, z_dim
+
+
+def _encode_cpp_states(
+    cfg: BattleSnakeConfig,
+    state_arr,  # ct.POINTER(Struct) * num_states
+    num_states: int,
+    out: np.ndarray,
+    caches=None,  # Optional[ct.POINTER(Struct) * num_states], encoding caches of the states
+) -> tuple[int, np.ndarray, np.ndarray]:
+    # encodes all players at turn of the given states into the rows of out with a single c++ call
+    capacity = out.shape[0]
+    obs_size = int(np.prod(out.shape[1:]))
+    state_ids = np.empty(shape=(capacity,), dtype=ct.c_int)
+    player_ids = np.empty(shape=(capacity,), dtype=ct.c_int)
+    num_rows = CPP_LIB.lib.custom_encode_many_cpp(
+        state_arr,
+        num_states,
+        out,
+        capacity,
+        obs_size,
+        state_ids,
+        player_ids,
+        cfg.ec.include_current_food,
+        cfg.ec.include_next_food,
+        cfg.ec.include_board,
+        cfg.ec.include_number_of_turns,
+        cfg.ec.compress_enemies,
+        cfg.ec.include_snake_body_as_one_hot,
+        cfg.ec.include_snake_body,
+        cfg.ec.include_snake_head,
+        cfg.ec.include_snake_tail,
+        cfg.ec.include_snake_health,
+        cfg.ec.include_snake_length,
+        cfg.ec.centered,
+        cfg.ec.include_distance_map,
+        cfg.ec.include_area_control,
+        cfg.ec.include_food_distance,
+        cfg.ec.include_hazards,
+        cfg.ec.include_tail_distance,
+        cfg.ec.include_num_food_on_board,
+        cfg.ec.fixed_food_spawn_chance,
+        False,  # temperature input is not supported by batched encoding
+        cfg.ec.single_temperature_input,
+        None,
+        caches,
+    )
+    if num_rows < 0:
+        raise ValueError(
+            f"Output buffer with {capacity} rows is too small for the players at turn"
+        )
+    return num_rows, state_ids[:num_rows], player_ids[:num_rows]
+
+
+def _state_from_snapshot(cfg: BattleSnakeConfig, buf: bytes):  # -> ct.POINTER(Struct)
+    if len(buf) % 4 != 0:
+        raise ValueError("Invalid snapshot: size is not a multiple of four bytes")
+    arr = np.frombuffer(buf, dtype=np.int32).copy()
+    if arr.shape[0] >= 6 and (arr[3], arr[4], arr[5]) != (
+        cfg.w,
+        cfg.h,
+        cfg.num_players,
+    ):
+        raise ValueError(
+            f"Snapshot of a {arr[3]}x{arr[4]} board with {arr[5]} snakes does "
+            f"not match config"
+        )
+    state_p = CPP_LIB.lib.from_snapshot_cpp(arr, arr.shape[0])
+    if not state_p:
+        raise ValueError("Invalid snapshot")
+    return state_p
+
+
 class BattleSnakeGame:
     """Battlesnake game environment backed by a C++ simulation engine.
 
@@ -44,6 +237,10 @@ class BattleSnakeGame:
     to free the underlying C++ memory.  :meth:`__del__` provides a fallback but
     is not guaranteed to run promptly.
 
+    Games can be pickled, e.g. to send them to other processes. The C++ state is
+    transferred as snapshot of :meth:`to_bytes`, the unpickled game is allocated
+    on the heap and has no :meth:`step_undoable` history.
+
     Attributes:
         cfg: Game configuration used to create this environment.
         turns_played: Number of turns elapsed since the last :meth:`reset`.
@@ -79,6 +276,17 @@ class BattleSnakeGame:
         self.is_closed = False
         self.cfg = cfg
         self.turns_played = self.cfg.init_turns_played
+        # buffer sizes of get_state_arrays, grown on demand
+        self._state_array_capacity = (
+            2 * self.cfg.w * self.cfg.h,
+            self.cfg.w * self.cfg.h,
+        )
+        # pool of the c++ state memory, referenced to keep the pool alive as long as the state
+        self._pool: Optional[StatePool] = None
+        # native cache of the encodings of all players, which updates the previous encoding in place. It is
+        # created by the second encoding, such that copies that are only encoded once do not allocate it
+        self._encoding_cache_p = None
+        self._encoded_before = False
         # state pointer
         self.state_p = state_p
         if self.state_p is None:
@@ -87,12 +295,27 @@ class BattleSnakeGame:
             validate_battlesnake_cfg(self.cfg)
             self._init_cpp()
         # attributes for saving the current game state
-        self.obs_dict: dict[int, np.ndarray] = dict()
+        self.obs_save: Optional[np.ndarray] = None  # raw encoding of players at turn
         self.available_actions_save: dict[int, list[int]] = dict()
+        self.legal_action_mask_save: Optional[np.ndarray] = None
+        # maps of get_obs_all_symmetries, which only depend on the config and are shared with copies
+        self.symmetry_maps_save: dict[
+            tuple[int, int], tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        ] = dict()
         self.players_at_turn_save: Optional[list[int]] = None
         self.players_at_turn_last: Optional[list[int]] = None  # property of last step
         self.players_alive_save: Optional[list[int]] = None
         self.players_alive_last: Optional[list[int]] = None  # property of last step
+        # python side of the frames recorded by step_undoable
+        self._undo_stack: list[
+            tuple[
+                np.ndarray,
+                Optional[tuple[int, ...]],
+                int,
+                Optional[list[int]],
+                Optional[list[int]],
+            ]
+        ] = []
         self.reward_func = get_battlesnake_reward_func_from_cfg(self.cfg.reward_cfg)
         self.layer_explanation = encoding_layer_indices(self.cfg)
 
@@ -119,6 +342,201 @@ class BattleSnakeGame:
         result = list(itertools.product(*action_lists))
         return result
 
+    def available_joint_action_indices(self) -> np.ndarray:
+        """Return the packed indices of all legal joint actions.
+
+        A joint action of the players at turn is packed into a base-4 integer, the
+        action of the first player at turn being the most significant digit. Indices
+        are sorted, such that they have the order of :meth:`available_joint_actions`.
+
+        Returns:
+            Int64 array of shape ``(num_joint_actions,)``.
+        """
+        mask = self._legal_action_mask()
+        # without players at turn, the only joint action is the empty tuple with index zero
+        indices = np.zeros(shape=(1,), dtype=np.int64)
+        for player in self.players_at_turn():
+            actions = np.flatnonzero(mask[player])
+            indices = (indices[:, None] * self.num_actions + actions[None, :]).ravel()
+        return indices
+
+    def joint_action_index(self, actions: tuple[int, ...]) -> int:
+        """Pack a joint action of the players at turn into a base-4 integer.
+
+        Args:
+            actions: Joint action tuple as in :meth:`step`.
+
+        Returns:
+            The index of the joint action, see :meth:`available_joint_action_indices`.
+
+        Raises:
+            ValueError: If the length of *actions* does not match the number of
+                players at turn.
+        """
+        if len(actions) != self.num_players_at_turn():
+            raise ValueError(f"Invalid action length: {actions}")
+        ja_idx = 0
+        for action in actions:
+            ja_idx = ja_idx * self.num_actions + action
+        return ja_idx
+
+    def joint_action_from_index(self, ja_idx: int) -> tuple[int, ...]:
+        """Unpack a base-4 joint action index into a joint action tuple.
+
+        Args:
+            ja_idx: Index of a joint action of the players at turn.
+
+        Returns:
+            Joint action tuple as in :meth:`step`.
+
+        Raises:
+            ValueError: If *ja_idx* is out of range for the number of players at turn.
+        """
+        num_at_turn = self.num_players_at_turn()
+        if not 0 <= ja_idx < self.num_actions**num_at_turn:
+            raise ValueError(f"Joint action index out of range: {ja_idx}")
+        actions = []
+        for _ in range(num_at_turn):
+            ja_idx, action = divmod(int(ja_idx), self.num_actions)
+            actions.append(action)
+        return tuple(reversed(actions))
+
+    def joint_action_outcomes(self) -> JointActionOutcomes:
+        """Step a native copy of the state with every legal joint action.
+
+        All successors are computed by a single C++ call, the game itself is not
+        modified. Successors draw food spawns from copies of the random stream of
+        the game, so the outcome of a joint action equals the result of :meth:`step`
+        with that joint action.
+
+        Returns:
+            A :class:`~hisss.game.state.JointActionOutcomes` with one row per joint
+            action of :meth:`available_joint_action_indices`. All arrays are empty
+            in a terminal state.
+
+        Raises:
+            ValueError: If the game is closed.
+        """
+        indices, joint_actions = self._successor_joint_actions()
+        num_joint = indices.shape[0]
+        rewards = np.zeros(shape=(num_joint, self.num_players), dtype=np.float64)
+        dones = np.zeros(shape=(num_joint,), dtype=bool)
+        died = np.zeros(shape=(num_joint, self.num_players), dtype=bool)
+        death_causes = np.zeros(shape=(num_joint, self.num_players), dtype=ct.c_int)
+        ate_food = np.zeros(shape=(num_joint, self.num_players), dtype=bool)
+        at_turn = np.zeros(shape=(num_joint, self.num_players), dtype=bool)
+        if num_joint > 0:
+            reward_type = get_battlesnake_reward_type_from_cfg(self.cfg.reward_cfg)
+            CPP_LIB.lib.step_outcomes_cpp(
+                self.state_p,
+                num_joint,
+                joint_actions,
+                REWARD_TYPE_TO_INT[reward_type],
+                self.cfg.reward_cfg.living_reward,
+                self.cfg.reward_cfg.terminal_reward,
+                rewards,
+                dones,
+                died,
+                death_causes,
+                ate_food,
+                at_turn,
+            )
+        return JointActionOutcomes(
+            joint_action_indices=indices,
+            joint_actions=joint_actions,
+            rewards=rewards,
+            dones=dones,
+            died=died,
+            death_causes=death_causes,
+            ate_food=ate_food,
+            at_turn=at_turn,
+        )
+
+    def expand_children(
+        self, pool: Optional[StatePool] = None
+    ) -> tuple[list["BattleSnakeGame"], np.ndarray, np.ndarray, np.ndarray]:
+        """Return a stepped copy of the game for every legal joint action.
+
+        All children are copied and stepped by a single C++ call, which replaces a
+        loop of :meth:`get_copy` and :meth:`step` over
+        :meth:`available_joint_actions`. Children start without the observation
+        caches of this game, which is not modified. Like copies, every child has
+        to be closed independently.
+
+        Args:
+            pool: Optional :class:`~hisss.game.state_pool.StatePool`, which provides
+                the memory of the children. If ``None``, the pool of this game is
+                used if it has one, otherwise the children are allocated on the heap.
+
+        Returns:
+            A 4-tuple ``(children, joint_action_indices, rewards, dones)`` with one
+            entry per joint action of :meth:`available_joint_action_indices`.
+            *rewards* has shape ``(num_children, num_players)`` and *dones* marks
+            the terminal children. All entries are empty in a terminal state.
+
+        Raises:
+            ValueError: If the game or the pool is closed.
+        """
+        indices, joint_actions = self._successor_joint_actions()
+        if pool is None:
+            pool = self._pool
+        elif pool.is_closed:
+            raise ValueError("Cannot call function on closed pool")
+        num_joint = indices.shape[0]
+        rewards = np.zeros(shape=(num_joint, self.num_players), dtype=np.float64)
+        dones = np.zeros(shape=(num_joint,), dtype=bool)
+        if num_joint == 0:
+            return [], indices, rewards, dones
+        state_arr = (ct.POINTER(Struct) * num_joint)()
+        reward_type = get_battlesnake_reward_type_from_cfg(self.cfg.reward_cfg)
+        CPP_LIB.lib.expand_children_cpp(
+            self.state_p,
+            None if pool is None else pool.pool_p,
+            num_joint,
+            joint_actions,
+            REWARD_TYPE_TO_INT[reward_type],
+            self.cfg.reward_cfg.living_reward,
+            self.cfg.reward_cfg.terminal_reward,
+            state_arr,
+            rewards,
+            dones,
+            joint_actions,
+        )
+        players_at_turn = self.players_at_turn()
+        players_alive = self.players_alive()
+        children = []
+        for i in range(num_joint):
+            child = BattleSnakeGame(cfg=self.cfg, state_p=state_arr[i])
+            if CPP_LIB.lib.state_in_pool_cpp(state_arr[i]):
+                child._pool = pool
+            # the draw prevention may have changed the actions
+            child._last_actions = tuple(
+                int(joint_actions[i, player]) for player in players_at_turn
+            )
+            child._cum_rewards = self._cum_rewards + rewards[i]
+            child.turns_played = self.turns_played + 1
+            child.players_at_turn_last = players_at_turn.copy()
+            child.players_alive_last = players_alive.copy()
+            children.append(child)
+        return children, indices, rewards, dones
+
+    def _successor_joint_actions(self) -> tuple[np.ndarray, np.ndarray]:
+        # legal joint action indices and the matching actions of all players, indexed by player
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if self.is_terminal():
+            indices = np.empty(shape=(0,), dtype=np.int64)
+        else:
+            indices = self.available_joint_action_indices()
+        num_joint = indices.shape[0]
+        joint_actions = np.zeros(shape=(num_joint, self.num_players), dtype=ct.c_int)
+        players = self.players_at_turn()
+        for i, player in enumerate(reversed(players)):
+            joint_actions[:, player] = (
+                indices // self.num_actions**i
+            ) % self.num_actions
+        return indices, joint_actions
+
     def illegal_actions(self, player: int) -> list[int]:
         """Return the action indices that are illegal for *player*.
 
@@ -133,11 +551,7 @@ class BattleSnakeGame:
         """
         if player < 0 or player >= self.num_players:
             raise ValueError(f"Snake index out of range: {player}")
-        all_action_set = {i for i in range(self.num_actions)}
-        legal_action_set: set[int] = set(self.available_actions(player))
-        illegal_action_set = all_action_set - legal_action_set
-        illegal_actions = list(illegal_action_set)
-        return illegal_actions
+        return np.flatnonzero(~self._legal_action_mask()[player]).tolist()
 
     def illegal_joint_actions(self) -> list[tuple[int, ...]]:
         """Return every joint-action combination that is not fully legal.
@@ -156,101 +570,22 @@ class BattleSnakeGame:
         return list(illegal_action_set)
 
     def _init_cpp(self):
-        # snakes
-        spawn_snakes_randomly = True if self.cfg.init_snake_pos is None else False
-        if self.cfg.init_snake_pos is not None:
-            # find the longest body, this determines the array shape
-            snake_pos = {}  # we need a separate dict to not alter the config object
-            body_lengths = []
-            for s in range(self.cfg.num_players):
-                cur_snake_pos = []
-                for pos in self.cfg.init_snake_pos[s]:
-                    cur_snake_pos.append((pos[0], pos[1]))
-                cur_snake_pos = list(dict.fromkeys(cur_snake_pos))  # remove duplicates
-                snake_pos[s] = cur_snake_pos
-                body_lengths.append(len(cur_snake_pos))
-            max_body_len = max(body_lengths)
-            body_len_arr = np.asarray(body_lengths, dtype=ct.c_int)
-            body_len_p = body_len_arr.ctypes.data_as(ct.POINTER(ct.c_int))
-            snake_pos_arr = (
-                np.zeros(shape=(self.cfg.num_players, max_body_len, 2), dtype=ct.c_int)
-                - 1
-            )
-            for s in range(self.cfg.num_players):  # convert dictionary to numpy array
-                for i, pos in enumerate(snake_pos[s]):
-                    snake_pos_arr[s, i, 0] = pos[0]
-                    snake_pos_arr[s, i, 1] = pos[1]
-            snake_pos_p = snake_pos_arr.ctypes.data_as(ct.POINTER(ct.c_int))
-        else:
-            body_len_p = ct.cast(0, ct.POINTER(ct.c_int))  # NULL-Pointer
-            snake_pos_p = ct.cast(0, ct.POINTER(ct.c_int))  # NULL-Pointer
-            max_body_len = -1
-        # snake length
-        snake_len_arr = np.asarray(self.cfg.init_snake_len, dtype=ct.c_int)
-        snake_len_p = snake_len_arr.ctypes.data_as(ct.POINTER(ct.c_int))
-        # snakes alive
-        snake_alive_arr = np.asarray(self.cfg.init_snakes_alive, dtype=bool)
-        snake_alive_p = snake_alive_arr.ctypes.data_as(ct.POINTER(ct.c_bool))
-        # health
-        snake_health_arr = np.asarray(self.cfg.init_snake_health, dtype=ct.c_int)
-        snake_health_p = snake_health_arr.ctypes.data_as(ct.POINTER(ct.c_int))
-        snake_max_health_arr = np.asarray(self.cfg.max_snake_health, dtype=ct.c_int)
-        snake_max_health_p = snake_max_health_arr.ctypes.data_as(ct.POINTER(ct.c_int))
-        # food
-        if self.cfg.init_food_pos is None:
-            num_init_food = -1  # -1 is signal for random food spawning
-            food_pos_p = ct.cast(0, ct.POINTER(ct.c_int))  # NULL-Pointer
-        elif not self.cfg.init_food_pos:
-            num_init_food = (
-                -2
-            )  # flag to indicate that no food should be spawned at beginning
-            food_pos_p = ct.cast(0, ct.POINTER(ct.c_int))
-        else:
-            num_init_food = len(self.cfg.init_food_pos)
-            np_arr = np.asarray(self.cfg.init_food_pos, dtype=ct.c_int)
-            food_pos_p = np_arr.ctypes.data_as(ct.POINTER(ct.c_int))
-        # food spawn turns: NULL lets C++ fill in init_turns_played as fallback
-        food_spawn_turns_p = ct.cast(0, ct.POINTER(ct.c_int))
-        # hazards, we need to transpose because cpp uses flattened array (this is more efficient)
-        hazard_arr = np.zeros(shape=(self.cfg.h, self.cfg.w), dtype=bool)
-        if self.cfg.init_hazards is not None:
-            for hazard_tile in self.cfg.init_hazards:
-                hazard_arr[hazard_tile[1], hazard_tile[0]] = True
-        hazards_p = hazard_arr.ctypes.data_as(ct.POINTER(ct.c_bool))
-        # c++ call
-        self.state_p = CPP_LIB.lib.init_cpp(
-            self.cfg.w,
-            self.cfg.h,
-            self.cfg.num_players,
-            self.cfg.min_food,
-            self.cfg.food_spawn_chance,
-            self.cfg.init_turns_played,
-            spawn_snakes_randomly,
-            body_len_p,
-            max_body_len,
-            snake_pos_p,
-            num_init_food,
-            food_pos_p,
-            food_spawn_turns_p,
-            snake_alive_p,
-            snake_health_p,
-            snake_len_p,
-            snake_max_health_p,
-            self.cfg.wrapped,
-            self.cfg.royale,
-            self.cfg.shrink_n_turns,
-            self.cfg.hazard_damage,
-            hazards_p,
-        )
+        self.state_p = _init_cpp_state(self.cfg)
 
     def reset_saved_properties(self):
         """Clear all intra-turn caches (observations, available actions, player lists).
 
         Called automatically after each :meth:`step` and :meth:`reset`.  Only
-        call this manually if you mutate the game state externally.
+        call this manually if you mutate the game state externally.  This also
+        discards the history of :meth:`step_undoable`.
         """
-        self.obs_dict: dict[int, np.ndarray] = dict()
+        if self._undo_stack:
+            # frames of the native state are only recorded together with frames here
+            CPP_LIB.lib.undo_clear_cpp(self.state_p)
+            self._undo_stack = []
+        self.obs_save = None
         self.available_actions_save: dict[int, list[int]] = dict()
+        self.legal_action_mask_save = None
         self.players_at_turn_save = None
         self.players_at_turn_last = None
         self.players_alive_save = None
@@ -274,29 +609,7 @@ class BattleSnakeGame:
         """
         if self.is_closed:
             raise ValueError("Cannot call function on closed game")
-        # number layers
-        num_enemies = 1 if self.cfg.ec.compress_enemies else (self.num_players - 1)
-        offset = num_layers_general(self.cfg.ec) + layers_per_player(self.cfg.ec)
-        z_dim = offset + num_enemies * layers_per_enemy(self.cfg.ec)
-        # width and height
-        width = self.cfg.w
-        height = self.cfg.h
-        if self.cfg.ec.centered:
-            width = 2 * self.cfg.w - 1
-            height = 2 * self.cfg.h - 1
-        elif not self.cfg.wrapped:  # wrapped does not have a border
-            # +1 on every side for border of field
-            width = self.cfg.w + 2
-            height = self.cfg.h + 2
-        # number of dim
-        if self.cfg.ec.flatten and not never_flatten:
-            dim = width * height * z_dim
-            return tuple(
-                [
-                    dim,
-                ]
-            )
-        return width, height, z_dim
+        return _obs_shape(self.cfg, never_flatten)
 
     def step(self, actions: tuple[int, ...]) -> tuple[np.ndarray, bool, dict]:
         """Advance the game by one turn.
@@ -319,19 +632,107 @@ class BattleSnakeGame:
         """
         if self.is_terminal():
             raise Exception("Cannot call step on terminal state")
-        if len(actions) != self.num_players_at_turn():
-            raise ValueError(f"Invalid action length: {actions}")
-        if actions not in self.available_joint_actions():
-            raise ValueError(f"Calling step with non-legal actions: {actions}")
+        self._check_joint_action(actions)
         reward, done, info = self._step(actions)
+        self._undo_stack = []
+        self._cum_rewards += reward
+        self.turns_played += 1
+        return reward, done, info
+
+    def step_index(self, ja_idx: int) -> tuple[np.ndarray, bool, dict]:
+        """Advance the game by one turn with a packed joint action index.
+
+        Args:
+            ja_idx: Joint action index as returned by
+                :meth:`available_joint_action_indices`.
+
+        Returns:
+            The same ``(rewards, done, info)`` tuple as :meth:`step`.
+
+        Raises:
+            Exception: If the game is already in a terminal state.
+            ValueError: If *ja_idx* is not the index of a legal joint action.
+        """
+        return self.step(self.joint_action_from_index(ja_idx))
+
+    def _check_joint_action(self, actions: tuple[int, ...]):
+        # legality through the mask of the players at turn, instead of a search in all joint actions
+        players = self.players_at_turn()
+        if len(actions) != len(players):
+            raise ValueError(f"Invalid action length: {actions}")
+        mask = self._legal_action_mask()
+        for player, action in zip(players, actions):
+            if not 0 <= action < self.num_actions or not mask[player, action]:
+                raise ValueError(f"Calling step with non-legal actions: {actions}")
+
+    def step_undoable(self, actions: tuple[int, ...]) -> tuple[np.ndarray, bool, dict]:
+        """Advance the game by one turn such that the turn can be reverted by :meth:`undo`.
+
+        Behaves exactly like :meth:`step`, but additionally records the changes of the
+        turn inside the C++ state. This allows a search to walk down and back up a game
+        tree in place instead of cloning the state for every edge. A regular
+        :meth:`step` discards all recorded turns.
+
+        Args:
+            actions: Joint action tuple as in :meth:`step`.
+
+        Returns:
+            The same ``(rewards, done, info)`` tuple as :meth:`step`.
+
+        Raises:
+            Exception: If the game is already in a terminal state.
+            ValueError: If the game is closed or *actions* is not a legal joint action.
+        """
+        if self.is_terminal():
+            raise Exception("Cannot call step on terminal state")
+        self._check_joint_action(actions)
+        frame = (
+            self._cum_rewards.copy(),
+            self._last_actions,
+            self.turns_played,
+            self.players_at_turn_last,
+            self.players_alive_last,
+        )
+        reward, done, info = self._step(actions, undoable=True)
+        self._undo_stack.append(frame)
         self._cum_rewards += reward
-        self._last_actions = actions
         self.turns_played += 1
         return reward, done, info
 
+    def undo(self):
+        """Revert the last turn played by :meth:`step_undoable`.
+
+        The game state, random stream, cumulative rewards, turn counter and last
+        actions are restored to the values before that turn.
+
+        Raises:
+            ValueError: If the game is closed or there is no turn to revert.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if not self._undo_stack or not CPP_LIB.lib.undo_cpp(self.state_p):
+            raise ValueError("No turn to undo")
+        (
+            self._cum_rewards,
+            self._last_actions,
+            self.turns_played,
+            self.players_at_turn_last,
+            self.players_alive_last,
+        ) = self._undo_stack.pop()
+        self.obs_save = None
+        self.available_actions_save = dict()
+        self.legal_action_mask_save = None
+        self.players_at_turn_save = None
+        self.players_alive_save = None
+
+    def undo_depth(self) -> int:
+        """Return the number of turns that can be reverted by :meth:`undo`."""
+        return len(self._undo_stack)
+
     def _step(
         self,
         actions: tuple[int, ...],
+        undoable: bool = False,
     ) -> tuple[np.ndarray, bool, dict]:
         # test if actions are actually legal to perform
         if self.is_closed:
@@ -345,10 +746,18 @@ class BattleSnakeGame:
         self.players_alive_last = self.players_alive()
         # perform step
         action_p = action_arr.ctypes.data_as(ct.POINTER(ct.c_int))
-        CPP_LIB.lib.step_cpp(self.state_p, action_p)
+        if undoable:
+            CPP_LIB.lib.step_undoable_cpp(self.state_p, action_p)
+        else:
+            CPP_LIB.lib.step_cpp(self.state_p, action_p)
+        # the draw prevention may have changed the actions
+        self._last_actions = tuple(
+            int(action_arr[player]) for player in self.players_at_turn_last
+        )
         # reset saved properties
-        self.obs_dict = dict()
+        self.obs_save = None
         self.available_actions_save = dict()
+        self.legal_action_mask_save = None
         self.players_at_turn_save = None
         self.players_alive_save = None
         # compute return values
@@ -358,22 +767,47 @@ class BattleSnakeGame:
         )
         return rewards, done, {}
 
-    def get_copy(self) -> "BattleSnakeGame":
+    def get_copy(self, pool: Optional[StatePool] = None) -> "BattleSnakeGame":
         """Return an independent deep copy of this environment.
 
         The copy shares the same :attr:`cfg` reference but has its own C++
         game-state object, cumulative rewards, and caches.  Both the original
         and the copy must be closed independently.
 
+        Args:
+            pool: Optional :class:`~hisss.game.state_pool.StatePool`, which provides
+                the memory of the copy. If ``None``, the pool of this game is used if
+                it has one, otherwise the copy is allocated on the heap.
+
         Returns:
             A new :class:`BattleSnakeGame` with identical state.
         """
-        cpy = self._get_copy()
+        cpy = self._get_copy(pool)
         cpy._last_actions = self._last_actions
         cpy._cum_rewards = self._cum_rewards.copy()
         cpy.turns_played = self.turns_played
         return cpy
 
+    def set_seed(self, seed: int):
+        """Reseed the random number generator of this game.
+
+        Every game owns its own random stream, which decides food spawns and hazard
+        shrinking. Copies created by :meth:`get_copy` continue with the identical
+        stream, so reseeding is necessary if copies should diverge. Other games are
+        not affected.
+
+        Args:
+            seed: Non-negative integer seed.
+
+        Raises:
+            ValueError: If the game is closed or the seed is negative.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if seed < 0:
+            raise ValueError(f"Invalid seed: {seed}")
+        CPP_LIB.lib.set_state_seed_cpp(self.state_p, seed)
+
     def is_player_at_turn(self, player: int) -> bool:
         """Return whether *player* must provide an action this turn.
 
@@ -465,18 +899,28 @@ class BattleSnakeGame:
         """Alias for :meth:`get_last_actions`."""
         return self._last_actions
 
-    def _get_copy(self) -> "BattleSnakeGame":
+    def _get_copy(self, pool: Optional[StatePool] = None) -> "BattleSnakeGame":
         # clone the c++ env and initialize it on python side
         if self.is_closed:
             raise ValueError("Cannot call function on closed game")
-        state_p2 = CPP_LIB.lib.clone_cpp(self.state_p)
+        if pool is None:
+            state_p2 = CPP_LIB.lib.clone_cpp(self.state_p)
+            pool = self._pool
+        else:
+            if pool.is_closed:
+                raise ValueError("Cannot call function on closed pool")
+            state_p2 = CPP_LIB.lib.clone_into_cpp(self.state_p, pool.pool_p)
         cpy = BattleSnakeGame(
             cfg=self.cfg,
             state_p=state_p2,
         )
+        if CPP_LIB.lib.state_in_pool_cpp(state_p2):
+            cpy._pool = pool
         # copy properties
         cpy.available_actions_save = self.available_actions_save.copy()
-        cpy.obs_dict = self.obs_dict.copy()
+        cpy.obs_save = self.obs_save  # never modified in-place, so it can be shared
+        cpy.legal_action_mask_save = self.legal_action_mask_save
+        cpy.symmetry_maps_save = self.symmetry_maps_save
         if self.players_at_turn_save is not None:
             cpy.players_at_turn_save = self.players_at_turn_save.copy()
         if self.players_at_turn_last is not None:
@@ -495,6 +939,9 @@ class BattleSnakeGame:
         ``ValueError``.
         """
         CPP_LIB.lib.close_cpp(self.state_p)
+        if self._encoding_cache_p is not None:
+            CPP_LIB.lib.encoding_cache_close_cpp(self._encoding_cache_p)
+            self._encoding_cache_p = None
         self.is_closed = True
 
     def reset(self):
@@ -542,15 +989,36 @@ class BattleSnakeGame:
             player in self.available_actions_save
         ):  # use saved actions from last function call
             return self.available_actions_save[player]
-        # ask c++ lib what actions are legal
-        legal_actions = np.zeros(shape=(self.cfg.num_actions,), dtype=ct.c_int)
-        CPP_LIB.lib.actions_cpp(self.state_p, player, legal_actions)
-        action_list = []
-        for a in range(self.cfg.num_actions):
-            if legal_actions[a]:
-                action_list.append(a)
-        self.available_actions_save[player] = action_list
-        return action_list
+        # the mask of all players is fetched with a single call
+        mask = self._legal_action_mask()
+        for p in range(self.num_players):
+            self.available_actions_save[p] = np.flatnonzero(mask[p]).tolist()
+        return self.available_actions_save[player]
+
+    def legal_action_mask(self) -> np.ndarray:
+        """Return the legal actions of all players in the current state.
+
+        The mask of all players is computed by a single C++ call and cached for the
+        lifetime of the current turn.
+
+        Returns:
+            Bool array of shape ``(num_players, 4)``. Rows of dead players are
+            ``False``, as are the rows of players without a legal action.
+
+        Raises:
+            ValueError: If the game is closed.
+        """
+        return self._legal_action_mask().copy()
+
+    def _legal_action_mask(self) -> np.ndarray:
+        # cached mask, must not be modified in-place
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if self.legal_action_mask_save is None:
+            mask = np.empty(shape=(self.num_players, self.num_actions), dtype=bool)
+            CPP_LIB.lib.legal_action_mask_cpp(self.state_p, mask)
+            self.legal_action_mask_save = mask
+        return self.legal_action_mask_save
 
     def players_at_turn(self) -> list[int]:
         """Return the indices of all players that must act this turn.
@@ -568,10 +1036,8 @@ class BattleSnakeGame:
             raise ValueError("Cannot call function on closed game")
         if self.players_at_turn_save is None:
             # only snakes with available actions are at turn
-            self.players_at_turn_save = []
-            for player in range(self.num_players):
-                if self.is_player_alive(player) and self.available_actions(player):
-                    self.players_at_turn_save.append(player)
+            mask = self._legal_action_mask()
+            self.players_at_turn_save = np.flatnonzero(mask.any(axis=1)).tolist()
         return self.players_at_turn_save
 
     def players_alive(self) -> list[int]:
@@ -668,8 +1134,8 @@ class BattleSnakeGame:
     def all_player_pos(self) -> dict[int, list[tuple[int, int]]]:
         """Return body positions for every snake.
 
-        This method calls into C++ for each alive snake and should only be
-        used for debugging or infrequent queries.
+        Prefer :meth:`get_state_arrays`, which returns the bodies as numpy array
+        without building Python lists.
 
         Returns:
             Dict mapping player index to a list of ``(x, y)`` tuples (head
@@ -678,17 +1144,79 @@ class BattleSnakeGame:
         Raises:
             ValueError: If the game is closed.
         """
-        if self.is_closed:
-            raise ValueError("Cannot call function on closed game")
-        # this is inefficient and should only be used for debugging
+        arrays = self.get_state_arrays()
         res_dict = {}
         for player in range(self.num_players):
-            if self.is_player_alive(player):
-                res_dict[player] = self.player_pos(player)
+            if arrays.snakes_alive[player]:
+                body = arrays.bodies[player, : arrays.body_lengths[player]]
+                res_dict[player] = [(pos[0], pos[1]) for pos in body]
             else:
                 res_dict[player] = []
         return res_dict
 
+    def get_state_arrays(self) -> BattleSnakeStateArrays:
+        """Return bodies, stats, food, hazards and elimination info as numpy arrays.
+
+        All arrays are filled by a single call into C++, which makes this the
+        preferred accessor for feature extraction and export in every turn.
+
+        Returns:
+            A :class:`~hisss.game.state.BattleSnakeStateArrays` of the current state.
+
+        Raises:
+            ValueError: If the game is closed.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        n = self.num_players
+        # the capacities grow with the state, such that the first call usually fits
+        max_body_len, max_food = self._state_array_capacity
+        sizes = np.zeros(shape=(2,), dtype=ct.c_int)
+        while True:
+            bodies = np.empty(shape=(n, max_body_len, 2), dtype=ct.c_int)
+            body_lengths = np.empty(shape=(n,), dtype=ct.c_int)
+            health = np.empty(shape=(n,), dtype=ct.c_int)
+            length = np.empty(shape=(n,), dtype=ct.c_int)
+            alive = np.empty(shape=(n,), dtype=bool)
+            food = np.empty(shape=(max_food, 2), dtype=ct.c_int)
+            food_spawn_turns = np.empty(shape=(max_food,), dtype=ct.c_int)
+            hazards = np.empty(shape=(self.cfg.w, self.cfg.h), dtype=bool)
+            elimination = np.empty(shape=(n, 3), dtype=ct.c_int)
+            fits = CPP_LIB.lib.state_arrays_cpp(
+                self.state_p,
+                max_body_len,
+                max_food,
+                sizes,
+                bodies,
+                body_lengths,
+                health,
+                length,
+                alive,
+                food,
+                food_spawn_turns,
+                hazards,
+                elimination,
+            )
+            if fits:
+                break
+            max_body_len = max(max_body_len, int(sizes[0]))
+            max_food = max(max_food, int(sizes[1]))
+            self._state_array_capacity = (max_body_len, max_food)
+        return BattleSnakeStateArrays(
+            turn=self.turns_played,
+            bodies=bodies[:, : sizes[0]],
+            body_lengths=body_lengths,
+            snake_health=health,
+            snake_len=length,
+            snakes_alive=alive,
+            food_pos=food[: sizes[1]],
+            food_spawn_turns=food_spawn_turns[: sizes[1]],
+            hazards=hazards.T,
+            elimination_cause=elimination[:, 0],
+            elimination_turn=elimination[:, 1],
+            elimination_by=elimination[:, 2],
+        )
+
     def num_food(self) -> int:
         """Return the number of food items currently on the board.
 
@@ -843,86 +1371,29 @@ class BattleSnakeGame:
         str_repr = arr.value.decode("utf-8")
         return str_repr
 
-    def _get_cpp_encoding(
-        self,
-        player: int,
-        temperatures: Optional[list[float]],
-        single_temperature: Optional[bool],
-    ):
-        obs_arr = np.zeros(
-            shape=self.get_obs_shape(never_flatten=True), dtype=np.float32
-        )
-        obs_p = obs_arr.ctypes.data_as(ct.POINTER(ct.c_float))
-        t_arr = np.asarray(temperatures, dtype=ct.c_float)
-        t_p = t_arr.ctypes.data_as(ct.POINTER(ct.c_float))
-        CPP_LIB.lib.custom_encode_cpp(
-            self.state_p,
-            obs_p,
-            self.cfg.ec.include_current_food,
-            self.cfg.ec.include_next_food,
-            self.cfg.ec.include_board,
-            self.cfg.ec.include_number_of_turns,
-            self.cfg.ec.compress_enemies,
-            player,
-            self.cfg.ec.include_snake_body_as_one_hot,
-            self.cfg.ec.include_snake_body,
-            self.cfg.ec.include_snake_head,
-            self.cfg.ec.include_snake_tail,
-            self.cfg.ec.include_snake_health,
-            self.cfg.ec.include_snake_length,
-            self.cfg.ec.centered,
-            self.cfg.ec.include_distance_map,
-            self.cfg.ec.include_area_control,
-            self.cfg.ec.include_food_distance,
-            self.cfg.ec.include_hazards,
-            self.cfg.ec.include_tail_distance,
-            self.cfg.ec.include_num_food_on_board,
-            self.cfg.ec.fixed_food_spawn_chance,
-            self.cfg.ec.temperature_input,
-            self.cfg.ec.single_temperature_input
-            if single_temperature is None
-            else single_temperature,
-            t_p,
-        )
-        return obs_arr
-
-    def _get_custom_state_encoding(
-        self,
-        player: int,
-        perm: Optional[np.ndarray],
-        temperatures: Optional[list[float]],
-        single_temperature: Optional[bool],
-    ) -> np.ndarray:
-        if self.is_closed:
-            raise ValueError("Cannot call function on closed game")
-        player_list = self.players_at_turn()
-        # if the player is dead we give him an arbitrary encoding (just to match shapes, it is discarded later)
-        if player not in player_list:
-            raise Exception("Cannot get an encoding for a dead snake (duh)")
-        # check if we already computed an encoding for this player
-        if player not in self.obs_dict or temperatures is not None:
-            obs_arr = self._get_cpp_encoding(
-                player=player,
-                temperatures=temperatures,
-                single_temperature=single_temperature,
+    def _get_obs_at_turn(self) -> np.ndarray:
+        # raw encoding of all players at turn, computed by a single c++ call and cached until the next step.
+        # From the second encoding on, the native cache only updates the cells that changed since the last one
+        if self.obs_save is None:
+            out = np.empty(
+                shape=(
+                    self.num_players_at_turn(),
+                    *self.get_obs_shape(never_flatten=True),
+                ),
+                dtype=np.float32,
             )
-            self.obs_dict[player] = obs_arr.copy()
-        else:
-            obs_arr = np.copy(self.obs_dict[player])
-        # rotate encodings of enemy players according to permutation
-        if (not self.cfg.ec.compress_enemies) and self.cfg.num_players > 2:
-            if perm is None:
-                perm = np.random.permutation(self.cfg.num_players - 1)
-            left, right = [], []
-            offset = num_layers_general(self.cfg.ec) + layers_per_player(self.cfg.ec)
-            num_enemy_layer = layers_per_enemy(self.cfg.ec)
-            for sub_layer in range(num_enemy_layer):
-                for enemy in range(0, self.cfg.num_players - 1):
-                    left.append(offset + enemy * num_enemy_layer + sub_layer)
-                for idx in perm:
-                    right.append(offset + idx * num_enemy_layer + sub_layer)
-            obs_arr[:, :, left] = obs_arr[:, :, right]
-        return obs_arr
+            state_arr = (ct.POINTER(Struct) * 1)(self.state_p)
+            caches = None
+            if self._encoded_before:
+                if self._encoding_cache_p is None:
+                    self._encoding_cache_p = CPP_LIB.lib.encoding_cache_create_cpp(
+                        self.num_players
+                    )
+                caches = (ct.POINTER(Struct) * 1)(self._encoding_cache_p)
+            _encode_cpp_states(self.cfg, state_arr, 1, out, caches)
+            self._encoded_before = True
+            self.obs_save = out
+        return self.obs_save
 
     def __eq__(self, other: Any):
         """Return whether this game state is identical to *other*.
@@ -946,6 +1417,40 @@ class BattleSnakeGame:
         equal = CPP_LIB.lib.equals_cpp(self.state_p, other.state_p)
         return equal
 
+    def state_hash(self) -> int:
+        """Return a 64-bit Zobrist hash of the current game state.
+
+        The hash covers the bodies, health, lengths and alive status of all snakes,
+        the food cells, the hazards and the parity of the turn. It is maintained
+        incrementally by the C++ engine, so this call does not walk the board. Equal
+        states (see :meth:`__eq__`) always have equal hashes, which makes the hash
+        suitable for transposition tables and deduplication. Different states may
+        collide.
+
+        Returns:
+            Non-negative integer smaller than ``2**64``.
+
+        Raises:
+            ValueError: If the game is closed.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        return int(CPP_LIB.lib.state_hash_cpp(self.state_p))
+
+    def _enemy_channel_permutation(self, perm: np.ndarray) -> np.ndarray:
+        # index array over the channel axis, which moves the layers of every enemy to the permuted slot
+        offset = num_layers_general(self.cfg.ec) + layers_per_player(self.cfg.ec)
+        num_enemy_layer = layers_per_enemy(self.cfg.ec)
+        channel_idx = np.arange(
+            offset + (self.cfg.num_players - 1) * num_enemy_layer, dtype=int
+        )
+        for sub_layer in range(num_enemy_layer):
+            for enemy, idx in enumerate(perm):
+                channel_idx[offset + enemy * num_enemy_layer + sub_layer] = (
+                    offset + idx * num_enemy_layer + sub_layer
+                )
+        return channel_idx
+
     def get_symmetry_count(self):
         """Return the total number of distinct board symmetries.
 
@@ -967,6 +1472,32 @@ class BattleSnakeGame:
         else:
             return 8 * math.factorial(self.cfg.num_players - 1)
 
+    def _decode_symmetry(
+        self, symmetry: int
+    ) -> tuple[int, bool, np.ndarray, np.ndarray]:
+        # number of rotations, flip, enemy permutation and action permutation of a symmetry index
+        # last 3 bits of symmetry represent rotation and flip
+        sym_rot = symmetry % 8
+        flip = sym_rot % 2 == 1  # if symmetry is odd then mirror it
+        num_rot = math.floor(sym_rot / 2)
+        # symmetry except last 3 bit describes player permutation
+        sym_player = math.floor(symmetry / 8)
+        player_perm = int_to_perm(sym_player, self.num_players - 1)
+        # calculate action mapping by using offset: counterclockwise rotation of 90 is -1
+        # flip is offset of 2 (left -> right, up -> down,...)
+        # original: UP=0, RIGHT=1, DOWN=2, LEFT=3
+        action_offset: int = -num_rot  # + 2*flip
+        action_perm = np.empty(shape=(self.cfg.num_actions,), dtype=int)
+        for a in range(self.cfg.num_actions):
+            a_new = (a + action_offset) % self.cfg.num_actions
+            if flip:
+                if a_new == 2:
+                    a_new = 0
+                elif a_new == 0:
+                    a_new = 2
+            action_perm[a] = a_new
+        return num_rot, flip, player_perm, action_perm
+
     def get_obs(
         self,
         symmetry: Optional[int] = 0,
@@ -1025,133 +1556,225 @@ class BattleSnakeGame:
                 raise ValueError(f"Invalid temperature length: {temperatures}")
         if symmetry is None:
             symmetry = np.random.randint(self.get_symmetry_count())
-        # last 3 bits of symmetry represent rotation and flip
-        sym_rot = symmetry % 8
-        flip = sym_rot % 2 == 1  # if symmetry is odd then mirror it
-        num_rot = math.floor(sym_rot / 2)
-        # symmetry except last 3 bit describes player permutation
-        sym_player = math.floor(symmetry / 8)
-        perm = int_to_perm(sym_player, self.num_players - 1)
-        # get encoding and stack them
-        obs_list = []
-        for player in self.players_at_turn():
-            obs = self._get_custom_state_encoding(
-                player=player,
-                perm=perm,
-                temperatures=temperatures,
-                single_temperature=single_temperature,
-            )
-            obs_list.append(obs)
-        obs = np.stack(obs_list)
-        # apply rotation and flip
+        num_rot, flip, player_perm, action_perm = self._decode_symmetry(symmetry)
+        obs = self._get_obs_at_turn()
+        # apply rotation and flip, these are only views on the cached encoding
         obs_res = np.rot90(obs, k=num_rot, axes=(-3, -2))
         if flip:
             obs_res = np.flip(obs_res, axis=-2)
-        # calculate action mapping by using offset: counterclockwise rotation of 90 is -1
-        # flip is offset of 2 (left -> right, up -> down,...)
-        # original: UP=0, RIGHT=1, DOWN=2, LEFT=3
-        action_offset: int = -num_rot  # + 2*flip
         perm, inv_perm = dict(), dict()
         for a in range(self.cfg.num_actions):
-            a_new = (a + action_offset) % self.cfg.num_actions
-            if flip:
-                if a_new == 2:
-                    a_new = 0
-                elif a_new == 0:
-                    a_new = 2
-            perm[a] = a_new
-            inv_perm[a_new] = a
+            perm[a] = int(action_perm[a])
+            inv_perm[int(action_perm[a])] = a
         # sanity check
         if obs_res.shape[0] != self.num_players_at_turn():
             raise Exception("Unknown Exception with observation shape")
+        # rotate encodings of enemy players according to permutation. Both branches produce a single
+        # new contiguous array, which is necessary because of negative strides and the cached encoding
+        if (not self.cfg.ec.compress_enemies) and self.cfg.num_players > 2:
+            result = obs_res[..., self._enemy_channel_permutation(player_perm)]
+        else:
+            result = obs_res.copy()
         if self.cfg.ec.flatten:
-            obs_res = obs_res.reshape(self.num_players_at_turn(), -1)
-        result = obs_res.copy()  # necessary because of negative stride
+            result = result.reshape(self.num_players_at_turn(), -1)
         # view radius
         if self.cfg.view_radius is not None:
-            # Pre-compute newly-spawned food once (same for all players)
-            new_food_pos: np.ndarray | None = None
-            if "current_food" in self.layer_explanation:
-                all_spawn_turns = self.food_spawn_turns()
-                new_food_pos = self.food_pos()[all_spawn_turns == self.turns_played]
-            masks = []
-            for idx, p_self in enumerate(self.players_at_turn()):
-                scaled_distance = result[
-                    idx, :, :, self.layer_explanation["distance_map"]
-                ]
-                distance_map = scaled_distance * (self.cfg.w + self.cfg.h - 2)
-                cur_mask = (distance_map <= self.cfg.view_radius).astype(float)
-                masks.append(cur_mask)
-                if "current_food" in self.layer_explanation:
-                    food_idx = self.layer_explanation["current_food"]
-                    cur_layer = result[idx, :, :, food_idx]
-                    result[idx, :, :, food_idx] = cur_layer * cur_mask
-                    # Food that spawned this turn is always visible for one step
-                    if new_food_pos is not None and len(new_food_pos) > 0:
-                        spawn_mask = self._new_food_obs_mask(
-                            new_food_pos, p_self, num_rot, flip
-                        )
-                        result[idx, :, :, food_idx] = np.maximum(
-                            result[idx, :, :, food_idx], spawn_mask
-                        )
-                for p in range(
-                    1, self.num_players
-                ):  # do not restrict view on own player
-                    if f"{p}_snake_health" in self.layer_explanation:
-                        result[
-                            idx, :, :, self.layer_explanation[f"{p}_snake_health"]
-                        ] = 0
-                    if f"{p}_snake_length" in self.layer_explanation:
-                        result[
-                            idx, :, :, self.layer_explanation[f"{p}_snake_length"]
-                        ] = 0
-                    if f"{p}_snake_tail_distance" in self.layer_explanation:
-                        result[
-                            idx,
-                            :,
-                            :,
-                            self.layer_explanation[f"{p}_snake_tail_distance"],
-                        ] = 0
-                    if f"{p}_snake_body" in self.layer_explanation:
-                        cur_layer = result[
-                            idx, :, :, self.layer_explanation[f"{p}_snake_body"]
-                        ]
-                        result[idx, :, :, self.layer_explanation[f"{p}_snake_body"]] = (
-                            cur_layer * cur_mask
-                        )
-                    if f"{p}_snake_body_as_one_hot" in self.layer_explanation:
-                        cur_layer = result[
-                            idx,
-                            :,
-                            :,
-                            self.layer_explanation[f"{p}_snake_body_as_one_hot"],
-                        ]
-                        result[
-                            idx,
-                            :,
-                            :,
-                            self.layer_explanation[f"{p}_snake_body_as_one_hot"],
-                        ] = cur_layer * cur_mask
-                    if f"{p}_snake_head" in self.layer_explanation:
-                        cur_layer = result[
-                            idx, :, :, self.layer_explanation[f"{p}_snake_head"]
-                        ]
-                        result[idx, :, :, self.layer_explanation[f"{p}_snake_head"]] = (
-                            cur_layer * cur_mask
-                        )
-                    if f"{p}_snake_tail" in self.layer_explanation:
-                        cur_layer = result[
-                            idx, :, :, self.layer_explanation[f"{p}_snake_tail"]
-                        ]
-                        result[idx, :, :, self.layer_explanation[f"{p}_snake_tail"]] = (
-                            cur_layer * cur_mask
-                        )
-            # make mask layer
-            if self.cfg.ec.include_view_mask:
-                mask_arr = np.asarray(masks)
-                result = np.concatenate((result, mask_arr[:, :, :, None]), axis=-1)
+            result = self._apply_view_radius(result, num_rot, flip)
         return result, perm, inv_perm
 
+    def get_obs_all_symmetries(
+        self,
+        symmetries: Optional[Sequence[int]] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the observations of all players at turn under several symmetries.
+
+        All variants are written by a single C++ call into one contiguous buffer,
+        which replaces repeated calls of :meth:`get_obs` for data augmentation. Variant
+        ``i`` equals ``get_obs(symmetry=symmetries[i])``.
+
+        Args:
+            symmetries: Symmetry indices in ``[0, get_symmetry_count())``. ``None``
+                uses all symmetries, i.e. the 8 rotations and flips combined with
+                every enemy permutation.
+            out: Optional C-contiguous float32 buffer with exactly
+                ``num_symmetries * num_players_at_turn`` observations, e.g. of shape
+                ``(num_symmetries, num_players_at_turn, *obs_shape)``. If ``None``, a
+                new buffer is allocated.
+
+        Returns:
+            A 3-tuple ``(obs, perms, inv_perms)`` where:
+
+            - *obs* — float32 array of shape
+              ``(num_symmetries, num_players_at_turn, *obs_shape)``, which is a view on
+              *out* if given.
+            - *perms* — int array of shape ``(num_symmetries, num_actions)``. Row
+              ``i`` maps original action indices to the transformed action indices of
+              variant ``i``, like the dict returned by :meth:`get_obs`.
+            - *inv_perms* — inverse of *perms* with the same shape.
+
+        Raises:
+            ValueError: If the game is closed or terminal, temperature input is
+                configured, a symmetry is invalid, a rotation by 90 degrees is
+                requested for a non-square encoding or *out* does not fit.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if self.is_terminal():
+            raise ValueError("Cannot get encoding on terminal state")
+        if self.cfg.ec.temperature_input:
+            raise ValueError("Need temperatures to generate encoding")
+        if symmetries is None:
+            symmetries = range(self.get_symmetry_count())
+        symmetries = tuple(symmetries)
+        obs = self._get_obs_at_turn()
+        if self.cfg.view_radius is not None:
+            # masking the view radius commutes with rotations, flips and enemy permutations
+            obs = self._apply_view_radius(obs.copy(), 0, False)
+        num_rows, x_dim, y_dim, z_dim = obs.shape
+        maps = [self._symmetry_maps(s, x_dim, y_dim, z_dim) for s in symmetries]
+        cell_maps = np.stack([m[0] for m in maps])
+        channel_maps = np.stack([m[1] for m in maps])
+        perms = np.stack([m[2] for m in maps])
+        inv_perms = np.stack([m[3] for m in maps])
+        obs_shape = (x_dim, y_dim, z_dim)
+        if self.cfg.ec.flatten:
+            obs_shape = (x_dim * y_dim * z_dim,)
+        if out is None:
+            out = np.empty(
+                shape=(len(symmetries), num_rows, *obs_shape), dtype=np.float32
+            )
+        elif (
+            out.dtype != np.float32
+            or not out.flags.c_contiguous
+            or out.size != len(symmetries) * obs.size
+        ):
+            raise ValueError(f"Invalid output buffer: {out.dtype}, {out.shape}")
+        CPP_LIB.lib.transform_encodings_cpp(
+            np.ascontiguousarray(obs, dtype=np.float32),
+            num_rows,
+            x_dim * y_dim,
+            z_dim,
+            len(symmetries),
+            cell_maps,
+            channel_maps,
+            out,
+        )
+        return out.reshape(len(symmetries), num_rows, *obs_shape), perms, inv_perms
+
+    def _symmetry_maps(
+        self, symmetry: int, x_dim: int, y_dim: int, z_dim: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # input cell of every output cell, input channel of every output channel and the action permutation of a
+        # symmetry. They only depend on the configuration and are computed once
+        key = (symmetry, z_dim)
+        if key in self.symmetry_maps_save:
+            return self.symmetry_maps_save[key]
+        if symmetry < 0 or symmetry >= self.get_symmetry_count():
+            raise ValueError(f"Invalid symmetry: {symmetry}")
+        num_rot, flip, player_perm, action_perm = self._decode_symmetry(symmetry)
+        if num_rot % 2 == 1 and x_dim != y_dim:
+            raise ValueError("Cannot rotate encoding of non-square board")
+        # cells are transformed exactly like the encoding in get_obs
+        cell_map = np.rot90(np.arange(x_dim * y_dim).reshape(x_dim, y_dim), k=num_rot)
+        if flip:
+            cell_map = np.flip(cell_map, axis=1)
+        # additional layers like the view mask are not permuted
+        channel_map = np.arange(z_dim)
+        if (not self.cfg.ec.compress_enemies) and self.cfg.num_players > 2:
+            channel_idx = self._enemy_channel_permutation(player_perm)
+            channel_map[: len(channel_idx)] = channel_idx
+        inv_action_perm = np.empty_like(action_perm)
+        inv_action_perm[action_perm] = np.arange(self.cfg.num_actions)
+        maps = (
+            cell_map.reshape(-1).astype(ct.c_int),
+            channel_map.astype(ct.c_int),
+            action_perm,
+            inv_action_perm,
+        )
+        self.symmetry_maps_save[key] = maps
+        return maps
+
+    def _apply_view_radius(
+        self, result: np.ndarray, num_rot: int, flip: bool
+    ) -> np.ndarray:
+        # masks the observations of all players at turn to the view radius. The observations are already rotated
+        # by num_rot and flipped. The mask is appended as additional layer if configured
+        # Pre-compute newly-spawned food once (same for all players)
+        new_food_pos: np.ndarray | None = None
+        if "current_food" in self.layer_explanation:
+            all_spawn_turns = self.food_spawn_turns()
+            new_food_pos = self.food_pos()[all_spawn_turns == self.turns_played]
+        masks = []
+        for idx, p_self in enumerate(self.players_at_turn()):
+            scaled_distance = result[idx, :, :, self.layer_explanation["distance_map"]]
+            distance_map = scaled_distance * (self.cfg.w + self.cfg.h - 2)
+            cur_mask = (distance_map <= self.cfg.view_radius).astype(float)
+            masks.append(cur_mask)
+            if "current_food" in self.layer_explanation:
+                food_idx = self.layer_explanation["current_food"]
+                cur_layer = result[idx, :, :, food_idx]
+                result[idx, :, :, food_idx] = cur_layer * cur_mask
+                # Food that spawned this turn is always visible for one step
+                if new_food_pos is not None and len(new_food_pos) > 0:
+                    spawn_mask = self._new_food_obs_mask(
+                        new_food_pos, p_self, num_rot, flip
+                    )
+                    result[idx, :, :, food_idx] = np.maximum(
+                        result[idx, :, :, food_idx], spawn_mask
+                    )
+            for p in range(1, self.num_players):  # do not restrict view on own player
+                if f"{p}_snake_health" in self.layer_explanation:
+                    result[idx, :, :, self.layer_explanation[f"{p}_snake_health"]] = 0
+                if f"{p}_snake_length" in self.layer_explanation:
+                    result[idx, :, :, self.layer_explanation[f"{p}_snake_length"]] = 0
+                if f"{p}_snake_tail_distance" in self.layer_explanation:
+                    result[
+                        idx,
+                        :,
+                        :,
+                        self.layer_explanation[f"{p}_snake_tail_distance"],
+                    ] = 0
+                if f"{p}_snake_body" in self.layer_explanation:
+                    cur_layer = result[
+                        idx, :, :, self.layer_explanation[f"{p}_snake_body"]
+                    ]
+                    result[idx, :, :, self.layer_explanation[f"{p}_snake_body"]] = (
+                        cur_layer * cur_mask
+                    )
+                if f"{p}_snake_body_as_one_hot" in self.layer_explanation:
+                    cur_layer = result[
+                        idx,
+                        :,
+                        :,
+                        self.layer_explanation[f"{p}_snake_body_as_one_hot"],
+                    ]
+                    result[
+                        idx,
+                        :,
+                        :,
+                        self.layer_explanation[f"{p}_snake_body_as_one_hot"],
+                    ] = cur_layer * cur_mask
+                if f"{p}_snake_head" in self.layer_explanation:
+                    cur_layer = result[
+                        idx, :, :, self.layer_explanation[f"{p}_snake_head"]
+                    ]
+                    result[idx, :, :, self.layer_explanation[f"{p}_snake_head"]] = (
+                        cur_layer * cur_mask
+                    )
+                if f"{p}_snake_tail" in self.layer_explanation:
+                    cur_layer = result[
+                        idx, :, :, self.layer_explanation[f"{p}_snake_tail"]
+                    ]
+                    result[idx, :, :, self.layer_explanation[f"{p}_snake_tail"]] = (
+                        cur_layer * cur_mask
+                    )
+        # make mask layer
+        if self.cfg.ec.include_view_mask:
+            mask_arr = np.asarray(masks)
+            result = np.concatenate((result, mask_arr[:, :, :, None]), axis=-1)
+        return result
+
     def _new_food_obs_mask(
         self,
         new_food_pos: np.ndarray,
@@ -1198,7 +1821,7 @@ class BattleSnakeGame:
 
         mask = np.rot90(mask, k=num_rot, axes=(0, 1))
         if flip:
-            mask = np.flip(mask, axis=0)
+            mask = np.flip(mask, axis=1)  # same axis as the flip of the observation
         return mask
 
     def __del__(self):
@@ -1206,6 +1829,28 @@ class BattleSnakeGame:
             self.close()
             self.is_closed = True
 
+    def __getstate__(self) -> dict[str, Any]:
+        # the c++ state is sent as binary snapshot, caches are rebuilt lazily and the
+        # history of step_undoable as well as the state pool stay with the original
+        return {
+            "cfg": self.cfg,
+            "snapshot": self.to_bytes(),
+            "cum_rewards": self._cum_rewards,
+            "last_actions": self._last_actions,
+            "turns_played": self.turns_played,
+            "players_at_turn_last": self.players_at_turn_last,
+            "players_alive_last": self.players_alive_last,
+        }
+
+    def __setstate__(self, state: dict[str, Any]):
+        state_p = _state_from_snapshot(state["cfg"], state["snapshot"])
+        self.__init__(state["cfg"], state_p=state_p)
+        self._cum_rewards = state["cum_rewards"]
+        self._last_actions = state["last_actions"]
+        self.turns_played = state["turns_played"]
+        self.players_at_turn_last = state["players_at_turn_last"]
+        self.players_alive_last = state["players_alive_last"]
+
     def get_bool_board_matrix(self) -> np.ndarray:
         """Return the board occupancy matrix (constrictor mode only).
 
@@ -1222,6 +1867,51 @@ class BattleSnakeGame:
         CPP_LIB.lib.char_game_matrix_cpp(self.state_p, arr_p)
         return arr
 
+    def to_bytes(self) -> bytes:
+        """Serialise the C++ game state into a compact binary snapshot.
+
+        Unlike :meth:`get_state`, the snapshot is written by a single native call
+        and contains the complete state, including the random number generator.
+        A game restored with :meth:`from_bytes` therefore continues with the
+        identical food spawns. Python-side bookkeeping such as cumulative rewards
+        and the last actions is not included.
+
+        Returns:
+            Versioned binary snapshot of the current state.
+
+        Raises:
+            ValueError: If the game is closed.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        buf = np.empty(
+            shape=(CPP_LIB.lib.snapshot_size_cpp(self.state_p),), dtype=np.int32
+        )
+        CPP_LIB.lib.to_snapshot_cpp(self.state_p, buf)
+        return buf.tobytes()
+
+    @classmethod
+    def from_bytes(cls, cfg: BattleSnakeConfig, buf: bytes) -> "BattleSnakeGame":
+        """Create a new game from a snapshot written by :meth:`to_bytes`.
+
+        Args:
+            cfg: Configuration of the game, which the snapshot was taken from.
+            buf: Binary snapshot.
+
+        Returns:
+            A new :class:`BattleSnakeGame` with the state of the snapshot.
+
+        Raises:
+            ValueError: If *buf* is not a valid snapshot or does not match the board
+                size and number of players of *cfg*.
+        """
+        post_init_battlesnake_cfg(cfg)
+        validate_battlesnake_cfg(cfg)
+        state_p = _state_from_snapshot(cfg, buf)
+        game = cls(cfg, state_p=state_p)
+        game.turns_played = CPP_LIB.lib.turns_played_cpp(state_p)
+        return game
+
     def get_state(self) -> BattleSnakeState:
         """Capture the current game state as a serialisable snapshot.
 
@@ -1233,23 +1923,26 @@ class BattleSnakeGame:
             A :class:`~hisss.game.state.BattleSnakeState` describing the
             current board.
         """
-        snakes_alive = self.players_alive()
-        snakes_alive_bool = [i in snakes_alive for i in range(self.num_players)]
-        player_pos = {i: self.player_pos(i) for i in range(self.num_players)}
-        food_pos_arr = self.food_pos()
-        food_spawn_turns_arr = self.food_spawn_turns()
+        arrays = self.get_state_arrays()
+        snakes_alive_bool = [bool(a) for a in arrays.snakes_alive]
+        player_pos = {
+            i: [(pos[0], pos[1]) for pos in arrays.bodies[i, : arrays.body_lengths[i]]]
+            for i in range(self.num_players)
+        }
+        food_pos_arr = arrays.food_pos
+        food_spawn_turns_arr = arrays.food_spawn_turns
         food_list = [
             [food_pos_arr[i, 0], food_pos_arr[i, 1]]
             for i in range(food_pos_arr.shape[0])
         ]
-        snake_health = self.player_healths()
-        snake_len = self.player_lengths()
+        snake_health = list(arrays.snake_health)
+        snake_len = list(arrays.snake_len)
         elimination_events: dict[int, EliminationEvent] = {}
         for i in range(self.num_players):
             if not snakes_alive_bool[i]:
-                cause_int = CPP_LIB.lib.snake_elim_cause_cpp(self.state_p, i)
-                killer_int = CPP_LIB.lib.snake_elim_killer_cpp(self.state_p, i)
-                elim_turn = CPP_LIB.lib.snake_elim_turn_cpp(self.state_p, i)
+                cause_int = int(arrays.elimination_cause[i])
+                killer_int = int(arrays.elimination_by[i])
+                elim_turn = int(arrays.elimination_turn[i])
                 cause_str = CAUSE_INT_TO_STR.get(cause_int)
                 if cause_str is not None:
                     by_str = f"snake-{killer_int}" if killer_int >= 0 else None
@@ -1355,6 +2048,8 @@ class BattleSnakeGame:
             self.cfg.shrink_n_turns,
             self.cfg.hazard_damage,
             hazards_p,
+            self.cfg.all_actions_legal,
+            self.cfg.draw_prevention,
         )
         if state.elimination_events:
             for snake_id, event in state.elimination_events.items():
@@ -1364,3 +2059,62 @@ class BattleSnakeGame:
                     self.state_p, snake_id, cause_int, killer_int, event.turn
                 )
         self.reset_saved_properties()
+
+
+def encode_batch(
+    games: Sequence[BattleSnakeGame],
+    out: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Encode every player at turn of several games into one contiguous tensor.
+
+    All observations are written by a single C++ call directly into *out*, which
+    avoids the per-player allocations of :meth:`BattleSnakeGame.get_obs`. The result
+    is the raw encoding, i.e. it corresponds to ``get_obs(symmetry=0)`` without a view
+    radius. Rows are ordered by game and then by player index.
+
+    Args:
+        games: Non-terminal games that all share the same encoding configuration.
+        out: Optional C-contiguous float32 buffer with at least as many rows as there
+            are players at turn in total and ``width * height * channels`` entries per
+            row, e.g. of shape ``(total_players, width, height, channels)``. If
+            ``None``, a buffer large enough for all players is allocated.
+
+    Returns:
+        A 3-tuple ``(obs, game_indices, players)`` where *obs* is a view on the filled
+        rows of *out* with shape ``(total_players, *obs_shape)``, and *game_indices* and
+        *players* are int arrays that identify the game and player of every row.
+
+    Raises:
+        ValueError: If a game is closed or terminal, the encoding configurations
+            differ, temperature input is configured, or *out* is too small.
+    """
+    if not games:
+        raise ValueError("Need at least one game to encode")
+    cfg = games[0].cfg
+    if cfg.ec.temperature_input:
+        raise ValueError("Batched encoding does not support temperature input")
+    for game in games:
+        if game.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if game.cfg.ec != cfg.ec:
+            raise ValueError("All games need the same encoding config")
+        if game.is_terminal():
+            raise ValueError("Cannot get encoding on terminal state")
+    obs_shape = games[0].get_obs_shape()
+    raw_shape = games[0].get_obs_shape(never_flatten=True)
+    if out is None:
+        out = np.empty(
+            shape=(len(games) * cfg.num_players, *raw_shape), dtype=np.float32
+        )
+    elif (
+        out.dtype != np.float32
+        or not out.flags.c_contiguous
+        or int(np.prod(out.shape[1:])) != int(np.prod(raw_shape))
+    ):
+        raise ValueError(f"Invalid output buffer: {out.dtype}, {out.shape}")
+    state_arr = (ct.POINTER(Struct) * len(games))(*[g.state_p for g in games])
+    num_rows, game_indices, players = _encode_cpp_states(
+        cfg, state_arr, len(games), out
+    )
+    obs = out[:num_rows].reshape(num_rows, *obs_shape)
+    return obs, game_indices, players
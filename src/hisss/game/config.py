@@ -43,6 +43,9 @@ class BattleSnakeConfig:
     # snakes
     #: If True, ignores collision/bounds checking for legal action generation.
     all_actions_legal: bool = False
+    #: If True, a step in which the last two snakes would both die is changed: one of
+    #: them, chosen uniformly, yields with a random action that does not kill it.
+    draw_prevention: bool = False
     #: Maximum health capacity for each snake.
     max_snake_health: Optional[list[int]] = None
 
@@ -218,6 +218,27 @@ class BattleSnakeRewardFunctionCooperation(BattleSnakeRewardFunction):
         return rewards
 
 
+#: Integer codes of the reward types in the C++ engine (see ``rewards.h``).
+REWARD_TYPE_TO_INT: dict[BattleSnakeRewardType, int] = {
+    BattleSnakeRewardType.STANDARD: 0,
+    BattleSnakeRewardType.KILL: 1,
+    BattleSnakeRewardType.COOP: 2,
+}
+
+
+def get_battlesnake_reward_type_from_cfg(
+    cfg: BattleSnakeRewardConfig,
+) -> BattleSnakeRewardType:
+    if isinstance(cfg, StandardBattleSnakeRewardConfig):
+        return BattleSnakeRewardType.STANDARD
+    elif isinstance(cfg, KillBattleSnakeRewardConfig):
+        return BattleSnakeRewardType.KILL
+    elif isinstance(cfg, CooperationBattleSnakeRewardConfig):
+        return BattleSnakeRewardType.COOP
+    else:
+        raise ValueError(f"Unknown reward function type: {cfg}")
+
+
 def get_battlesnake_reward_func_from_cfg(
     cfg: BattleSnakeRewardConfig,
 ) -> BattleSnakeRewardFunction:
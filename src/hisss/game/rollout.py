@@ -0,0 +1,233 @@
+import ctypes as ct
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, Sequence
+
+import numpy as np
+
+from hisss.cpp.lib import CPP_LIB, Struct
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.rewards import (
+    REWARD_TYPE_TO_INT,
+    get_battlesnake_reward_type_from_cfg,
+)
+
+
+class RolloutPolicy(Enum):
+    """Enumeration of the policies that can be used for native rollouts."""
+
+    #: Every player picks uniformly among its legal actions
+    UNIFORM = "UNIFORM"
+    #: Every player picks uniformly among the actions that do not lead to an immediate death
+    #: (walls, bodies, starvation). If no such action exists, all actions are considered.
+    SAFE = "SAFE"
+
+
+ROLLOUT_POLICY_TO_INT: dict[RolloutPolicy, int] = {
+    RolloutPolicy.UNIFORM: 0,
+    RolloutPolicy.SAFE: 1,
+}
+# native id of the policy that samples from given probability tables
+ROLLOUT_TABLE_INT: int = 2
+
+
+@dataclass
+class Trajectory:
+    """Columnar record of a game played by :func:`simulate`.
+
+    All arrays have one row per turn and one column per player. Row ``t`` contains
+    the actions chosen in turn ``t`` and the rewards and snake properties after it.
+    """
+
+    actions: np.ndarray  # int, -1 for players that were not at turn
+    rewards: np.ndarray  # float
+    alive: np.ndarray  # bool
+    lengths: np.ndarray  # int
+    healths: np.ndarray  # int
+    death_causes: (
+        np.ndarray
+    )  # int codes of hisss.game.state.CAUSE_INT_TO_STR, 0 if alive
+    done: bool  # whether the game reached a terminal state
+
+    @property
+    def num_turns(self) -> int:
+        """Number of turns played."""
+        return self.actions.shape[0]
+
+
+def play_rollouts(
+    games: Sequence[BattleSnakeGame],
+    policy: RolloutPolicy = RolloutPolicy.UNIFORM,
+    max_turns: Optional[int] = None,
+    num_threads: int = 1,
+    seed: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Play several games until the end with a simple policy in C++.
+
+    The games are played in-place on a pool of native worker threads. The Python GIL
+    is released for the whole duration of the call. Use
+    :meth:`~hisss.game.battlesnake.BattleSnakeGame.get_copy` beforehand if the
+    original states are still needed. Note that copies share the random stream for
+    chance events (food spawns) with their original, so call
+    :meth:`~hisss.game.battlesnake.BattleSnakeGame.set_seed` on the copies if their
+    chance events should be independent.
+
+    Args:
+        games: Games that all share the same number of players and reward
+            configuration. The same game must not appear twice.
+        policy: Policy that selects the actions of all players.
+        max_turns: Maximum number of turns to play per game. ``None`` plays until
+            every game is terminal.
+        num_threads: Number of worker threads. Non-positive values use all available
+            cores.
+        seed: Seed for the action sampling of the policy. ``None`` draws a random
+            seed.
+
+    Returns:
+        A 3-tuple ``(rewards, turns, dones)`` where *rewards* is a float array of shape
+        ``(num_games, num_players)`` with the rewards accumulated during the rollout,
+        *turns* is an int array of shape ``(num_games,)`` with the number of turns
+        played and *dones* is a bool array of shape ``(num_games,)`` marking the games
+        that reached a terminal state.
+
+    Raises:
+        ValueError: If a game is closed, games appear twice or their configurations
+            are incompatible.
+    """
+    if not games:
+        raise ValueError("Need at least one game for rollouts")
+    if len(set(id(game) for game in games)) != len(games):
+        raise ValueError("Cannot play rollouts of the same game twice in parallel")
+    cfg = games[0].cfg
+    for game in games:
+        if game.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if game.num_players != cfg.num_players or game.cfg.reward_cfg != cfg.reward_cfg:
+            raise ValueError("All games need the same number of players and rewards")
+    num_games = len(games)
+    reward_type = get_battlesnake_reward_type_from_cfg(cfg.reward_cfg)
+    seeds = np.random.default_rng(seed).integers(
+        0, np.iinfo(np.uint64).max, size=(num_games,), dtype=np.uint64, endpoint=True
+    )
+    state_arr = (ct.POINTER(Struct) * num_games)(*[game.state_p for game in games])
+    rewards = np.empty(shape=(num_games, cfg.num_players), dtype=ct.c_double)
+    turns = np.empty(shape=(num_games,), dtype=ct.c_int)
+    dones = np.empty(shape=(num_games,), dtype=bool)
+    CPP_LIB.lib.rollout_many_cpp(
+        state_arr,
+        num_games,
+        ROLLOUT_POLICY_TO_INT[policy],
+        -1 if max_turns is None else max_turns,
+        num_threads,
+        seeds,
+        REWARD_TYPE_TO_INT[reward_type],
+        cfg.reward_cfg.living_reward,
+        cfg.reward_cfg.terminal_reward,
+        rewards,
+        turns,
+        dones,
+    )
+    # synchronize the python side of the games with the new c++ states
+    for idx, game in enumerate(games):
+        if turns[idx] == 0:
+            continue
+        game.reset_saved_properties()
+        game.set_last_actions(None)
+        game.turns_played += int(turns[idx])
+        game.set_cum_rewards(game.get_cum_rewards() + rewards[idx])
+    return rewards, turns, dones
+
+
+def simulate(
+    game: BattleSnakeGame,
+    policy: RolloutPolicy | np.ndarray,
+    max_turns: int,
+    seed: Optional[int] = None,
+) -> Trajectory:
+    """Play a single game in C++ and record the trajectory.
+
+    The game is played in-place, use
+    :meth:`~hisss.game.battlesnake.BattleSnakeGame.get_copy` beforehand if the
+    original state is still needed.
+
+    Args:
+        game: Game to play.
+        policy: Either a :class:`RolloutPolicy` or a float array of action
+            probabilities with shape ``(num_turns, num_players, 4)`` or
+            ``(num_players, 4)``. Row ``t`` of the table is used in turn ``t`` and the
+            last row is repeated afterwards. Probabilities are restricted to the legal
+            actions of a player and renormalized, players without probability mass on a
+            legal action pick uniformly among the legal actions.
+        max_turns: Maximum number of turns to play.
+        seed: Seed for the action sampling of the policy. ``None`` draws a random
+            seed.
+
+    Returns:
+        The :class:`Trajectory` of the played turns.
+
+    Raises:
+        ValueError: If the game is closed, *max_turns* is negative or the probability
+            table has an invalid shape or negative entries.
+    """
+    if game.is_closed:
+        raise ValueError("Cannot call function on closed game")
+    if max_turns < 0:
+        raise ValueError(f"Invalid number of turns: {max_turns}")
+    n = game.num_players
+    if isinstance(policy, RolloutPolicy):
+        policy_int = ROLLOUT_POLICY_TO_INT[policy]
+        probs = np.zeros(shape=(1, n, 4), dtype=ct.c_double)
+    else:
+        policy_int = ROLLOUT_TABLE_INT
+        probs = np.asarray(policy, dtype=ct.c_double)
+        if probs.ndim == 2:
+            probs = probs[np.newaxis]
+        if probs.ndim != 3 or probs.shape[0] == 0 or probs.shape[1:] != (n, 4):
+            raise ValueError(f"Invalid shape of action probabilities: {probs.shape}")
+        if np.any(probs < 0):
+            raise ValueError("Action probabilities must not be negative")
+        probs = np.ascontiguousarray(probs)
+    reward_type = get_battlesnake_reward_type_from_cfg(game.cfg.reward_cfg)
+    rng_seed = np.random.default_rng(seed).integers(
+        0, np.iinfo(np.uint64).max, dtype=np.uint64, endpoint=True
+    )
+    actions = np.empty(shape=(max_turns, n), dtype=ct.c_int)
+    rewards = np.empty(shape=(max_turns, n), dtype=ct.c_double)
+    alive = np.empty(shape=(max_turns, n), dtype=bool)
+    lengths = np.empty(shape=(max_turns, n), dtype=ct.c_int)
+    healths = np.empty(shape=(max_turns, n), dtype=ct.c_int)
+    death_causes = np.empty(shape=(max_turns, n), dtype=ct.c_int)
+    done = ct.c_bool()
+    turns = CPP_LIB.lib.simulate_cpp(
+        game.state_p,
+        policy_int,
+        probs,
+        probs.shape[0],
+        max_turns,
+        int(rng_seed),
+        REWARD_TYPE_TO_INT[reward_type],
+        game.cfg.reward_cfg.living_reward,
+        game.cfg.reward_cfg.terminal_reward,
+        actions,
+        rewards,
+        alive,
+        lengths,
+        healths,
+        death_causes,
+        ct.byref(done),
+    )
+    # synchronize the python side of the game with the new c++ state
+    if turns > 0:
+        game.reset_saved_properties()
+        game.set_last_actions(tuple(int(a) for a in actions[turns - 1] if a >= 0))
+        game.turns_played += turns
+        game.set_cum_rewards(game.get_cum_rewards() + rewards[:turns].sum(axis=0))
+    return Trajectory(
+        actions=actions[:turns],
+        rewards=rewards[:turns],
+        alive=alive[:turns],
+        lengths=lengths[:turns],
+        healths=healths[:turns],
+        death_causes=death_causes[:turns],
+        done=bool(done.value),
+    )
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 CAUSE_INT_TO_STR: dict[int, str] = {
     1: "wall-collision",
     2: "out-of-health",
@@ -27,3 +29,46 @@ class BattleSnakeState:
     snake_len: list[int]  # includes dead snakes
     food_spawn_turns: list[int] | None = None
     elimination_events: dict[int, "EliminationEvent"] | None = None
+
+
+@dataclass
+class BattleSnakeStateArrays:
+    """Packed numpy view of a game state, see ``BattleSnakeGame.get_state_arrays``.
+
+    Arrays include dead snakes. Bodies are ordered head first and padded with -1 up
+    to the longest body. Elimination causes use the integer codes of
+    :data:`CAUSE_INT_TO_STR` (0 if the snake was not eliminated) and killers are -1
+    if no other snake was involved.
+    """
+
+    turn: int
+    bodies: np.ndarray  # shape (num_players, max_body_len, 2)
+    body_lengths: np.ndarray  # shape (num_players,)
+    snake_health: np.ndarray  # shape (num_players,)
+    snake_len: np.ndarray  # shape (num_players,)
+    snakes_alive: np.ndarray  # shape (num_players,), bool
+    food_pos: np.ndarray  # shape (num_food, 2)
+    food_spawn_turns: np.ndarray  # shape (num_food,)
+    hazards: np.ndarray  # same layout as BattleSnakeGame.get_hazards()
+    elimination_cause: np.ndarray  # shape (num_players,)
+    elimination_turn: np.ndarray  # shape (num_players,)
+    elimination_by: np.ndarray  # shape (num_players,)
+
+
+@dataclass
+class JointActionOutcomes:
+    """Outcomes of all legal joint actions, see ``BattleSnakeGame.joint_action_outcomes``.
+
+    Rows follow the order of ``available_joint_action_indices``. A snake died if it
+    was eliminated by the step, death causes use the integer codes of
+    :data:`CAUSE_INT_TO_STR` (0 if the snake did not die).
+    """
+
+    joint_action_indices: np.ndarray  # shape (num_joint,)
+    joint_actions: np.ndarray  # shape (num_joint, num_players), indexed by player
+    rewards: np.ndarray  # shape (num_joint, num_players)
+    dones: np.ndarray  # shape (num_joint,), bool
+    died: np.ndarray  # shape (num_joint, num_players), bool
+    death_causes: np.ndarray  # shape (num_joint, num_players)
+    ate_food: np.ndarray  # shape (num_joint, num_players), bool
+    at_turn: np.ndarray  # shape (num_joint, num_players), bool, after the step
@@ -0,0 +1,105 @@
+import numpy as np
+
+from hisss.cpp.lib import CPP_LIB
+
+
+class StatePool:
+    """Recycling allocator for the C++ states of games with the same configuration.
+
+    Copies created by
+    :meth:`BattleSnakeGame.get_copy(pool=...) <hisss.game.battlesnake.BattleSnakeGame.get_copy>`
+    take their memory from fixed-size slots of the pool instead of the heap, and
+    :meth:`~hisss.game.battlesnake.BattleSnakeGame.close` returns the slot to the
+    pool. Copies of pooled games use the same pool. This avoids heap fragmentation
+    and allocator overhead in search trees with many short-lived nodes, and it
+    bounds the memory of a worker: once *capacity* slots are in use, further copies
+    fall back to the heap and are counted in :attr:`num_overflows`.
+
+    Slots are allocated in chunks on demand and are only freed together with the
+    pool. Games keep a reference to their pool, so the pool is not garbage
+    collected while pooled games exist.
+
+    Attributes:
+        is_closed: Whether :meth:`close` has already been called.
+    """
+
+    def __init__(
+        self,
+        game,  # BattleSnakeGame
+        capacity: int,
+        num_preallocated: int = 0,
+    ):
+        """Create a new pool for states of the same size as the state of *game*.
+
+        Args:
+            game: Template game. All games created from the same configuration have
+                the same state size.
+            capacity: Maximum number of states in the pool.
+            num_preallocated: Number of slots to allocate immediately instead of on
+                demand.
+
+        Raises:
+            ValueError: If the game is closed or *capacity* is not positive.
+        """
+        if game.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if capacity <= 0:
+            raise ValueError(f"Invalid pool capacity: {capacity}")
+        num_bytes = CPP_LIB.lib.state_num_bytes_cpp(game.state_p)
+        self.pool_p = CPP_LIB.lib.pool_create_cpp(num_bytes, capacity, num_preallocated)
+        self.is_closed = False
+
+    def _stats(self) -> np.ndarray:
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed pool")
+        stats = np.empty(shape=(6,), dtype=np.int64)
+        CPP_LIB.lib.pool_stats_cpp(self.pool_p, stats)
+        return stats
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of states in the pool."""
+        return int(self._stats()[0])
+
+    @property
+    def num_allocated(self) -> int:
+        """Number of slots allocated so far."""
+        return int(self._stats()[1])
+
+    @property
+    def num_in_use(self) -> int:
+        """Number of slots currently used by open games."""
+        return int(self._stats()[2])
+
+    @property
+    def peak_in_use(self) -> int:
+        """Maximum number of slots that were in use at the same time."""
+        return int(self._stats()[3])
+
+    @property
+    def num_overflows(self) -> int:
+        """Number of copies that fell back to the heap because the pool was full."""
+        return int(self._stats()[4])
+
+    @property
+    def slot_bytes(self) -> int:
+        """Size of a single slot in bytes."""
+        return int(self._stats()[5])
+
+    def close(self):
+        """Free the memory of the pool.
+
+        Raises:
+            ValueError: If games still use slots of the pool.
+        """
+        if self.is_closed:
+            return
+        if self.num_in_use > 0:
+            raise ValueError("Cannot close pool while games still use it")
+        CPP_LIB.lib.pool_close_cpp(self.pool_p)
+        self.is_closed = True
+
+    def __del__(self):
+        # a pool with remaining states is leaked instead of invalidating their memory
+        if not self.is_closed and self.num_in_use == 0:
+            self.close()
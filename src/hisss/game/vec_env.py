@@ -0,0 +1,242 @@
+import ctypes as ct
+from typing import Optional, Sequence
+
+import numpy as np
+
+from hisss.cpp.lib import CPP_LIB, Struct
+from hisss.game.battlesnake import (
+    BattleSnakeGame,
+    _encode_cpp_states,
+    _init_cpp_state,
+    _obs_shape,
+)
+from hisss.game.config import (
+    BattleSnakeConfig,
+    post_init_battlesnake_cfg,
+    validate_battlesnake_cfg,
+)
+from hisss.game.rewards import (
+    REWARD_TYPE_TO_INT,
+    get_battlesnake_reward_type_from_cfg,
+)
+
+
+class BattleSnakeVecEnv:
+    """A batch of independent Battlesnake games that are stepped by a single C++ call.
+
+    All games share the same configuration. In contrast to stepping many
+    :class:`~hisss.game.battlesnake.BattleSnakeGame` instances one after another,
+    :meth:`step` performs only one ctypes round trip for the whole batch and computes
+    the rewards natively. Always call :meth:`close` when the environment is no longer
+    needed to free the underlying C++ memory.
+
+    Attributes:
+        cfg: Game configuration shared by all games.
+        num_envs: Number of games in the batch.
+        turns_played: Integer array of shape ``(num_envs,)`` with the number of turns
+            elapsed in each game since its last reset.
+        is_closed: Whether :meth:`close` has already been called.
+    """
+
+    def __init__(
+        self,
+        cfg: BattleSnakeConfig,
+        num_envs: int,
+    ):
+        """Initialise a new batch of games.
+
+        Args:
+            cfg: Configuration used for every game in the batch.
+            num_envs: Number of games in the batch.
+
+        Raises:
+            ValueError: If *num_envs* is not positive.
+        """
+        if num_envs <= 0:
+            raise ValueError(f"Invalid number of environments: {num_envs}")
+        self.cfg = cfg
+        self.num_envs = num_envs
+        self.is_closed = False
+        post_init_battlesnake_cfg(self.cfg)
+        validate_battlesnake_cfg(self.cfg)
+        reward_type = get_battlesnake_reward_type_from_cfg(self.cfg.reward_cfg)
+        self._reward_type = REWARD_TYPE_TO_INT[reward_type]
+        # array of c++ state pointers, which is passed to c++ as GameState**
+        self.state_arr = (ct.POINTER(Struct) * num_envs)()
+        for idx in range(num_envs):
+            self.state_arr[idx] = _init_cpp_state(self.cfg)
+        self.turns_played = np.full(
+            shape=(num_envs,), fill_value=self.cfg.init_turns_played, dtype=int
+        )
+        self._cum_rewards = np.zeros(shape=(num_envs, self.num_players), dtype=float)
+        self._dones = np.zeros(shape=(num_envs,), dtype=bool)
+
+    @property
+    def num_players(self) -> int:
+        """Total number of players (snakes) in each game, including dead ones."""
+        return self.cfg.num_players
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Advance every game by one turn.
+
+        Games that are already terminal are not stepped again. They receive zero
+        rewards and stay marked as done until they are :meth:`reset`. Actions are not
+        validated; illegal actions simply kill the corresponding snake, exactly as in
+        the C++ engine.
+
+        Args:
+            actions: Integer array of shape ``(num_envs, num_players)``. Entry ``[i, p]``
+                is the action of player ``p`` in game ``i``. Actions of players that are
+                not at turn are ignored.
+
+        Returns:
+            A 2-tuple ``(rewards, dones)`` where *rewards* is a ``float64`` array of
+            shape ``(num_envs, num_players)`` and *dones* is a bool array of shape
+            ``(num_envs,)`` marking the games in a terminal state.
+
+        Raises:
+            ValueError: If the environment is closed or *actions* has the wrong shape.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed environment")
+        action_arr = np.ascontiguousarray(actions, dtype=ct.c_int)
+        if action_arr.shape != (self.num_envs, self.num_players):
+            raise ValueError(f"Invalid action shape: {action_arr.shape}")
+        rewards = np.empty(shape=(self.num_envs, self.num_players), dtype=ct.c_double)
+        was_done = self._dones.copy()
+        CPP_LIB.lib.step_many_cpp(
+            self.state_arr,
+            self.num_envs,
+            action_arr,
+            self._reward_type,
+            self.cfg.reward_cfg.living_reward,
+            self.cfg.reward_cfg.terminal_reward,
+            rewards,
+            self._dones,
+        )
+        self._cum_rewards += rewards
+        self.turns_played[~was_done] += 1
+        return rewards, self._dones.copy()
+
+    def reset(self, env_indices: Optional[Sequence[int]] = None):
+        """Reinitialise games to their starting state.
+
+        Args:
+            env_indices: Indices of the games to reset. ``None`` resets all games.
+
+        Raises:
+            ValueError: If the environment is closed.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed environment")
+        if env_indices is None:
+            env_indices = range(self.num_envs)
+        for idx in env_indices:
+            CPP_LIB.lib.close_cpp(self.state_arr[idx])
+            self.state_arr[idx] = _init_cpp_state(self.cfg)
+            self.turns_played[idx] = self.cfg.init_turns_played
+            self._cum_rewards[idx] = 0
+            self._dones[idx] = False
+
+    def get_obs(
+        self,
+        out: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Encode every player at turn of all games that are not done with a single C++ call.
+
+        The result is the raw encoding without symmetry or view radius, see
+        :func:`~hisss.game.battlesnake.encode_batch`.
+
+        Args:
+            out: Optional C-contiguous float32 buffer with at least as many rows as there
+                are players at turn in total, e.g. of shape
+                ``(num_envs * num_players, width, height, channels)``. If ``None``, a
+                buffer of that shape is allocated.
+
+        Returns:
+            A 3-tuple ``(obs, env_indices, players)`` where *obs* is a view on the filled
+            rows of *out* and *env_indices* and *players* identify the game and player
+            of every row.
+
+        Raises:
+            ValueError: If the environment is closed, temperature input is configured or
+                *out* is too small.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed environment")
+        if self.cfg.ec.temperature_input:
+            raise ValueError("Batched encoding does not support temperature input")
+        obs_shape = _obs_shape(self.cfg, never_flatten=False)
+        raw_shape = _obs_shape(self.cfg, never_flatten=True)
+        if out is None:
+            out = np.empty(
+                shape=(self.num_envs * self.num_players, *raw_shape), dtype=np.float32
+            )
+        elif (
+            out.dtype != np.float32
+            or not out.flags.c_contiguous
+            or int(np.prod(out.shape[1:])) != int(np.prod(raw_shape))
+        ):
+            raise ValueError(f"Invalid output buffer: {out.dtype}, {out.shape}")
+        active = np.nonzero(~self._dones)[0]
+        state_arr = (ct.POINTER(Struct) * len(active))(
+            *[self.state_arr[idx] for idx in active]
+        )
+        num_rows, state_ids, players = _encode_cpp_states(
+            self.cfg, state_arr, len(active), out
+        )
+        obs = out[:num_rows].reshape(num_rows, *obs_shape)
+        return obs, active[state_ids], players
+
+    def get_cum_rewards(self) -> np.ndarray:
+        """Return the cumulative rewards of every game since its last reset.
+
+        Returns:
+            Float array of shape ``(num_envs, num_players)``.
+        """
+        return self._cum_rewards
+
+    def get_dones(self) -> np.ndarray:
+        """Return the done mask of the last :meth:`step`.
+
+        Returns:
+            Bool array of shape ``(num_envs,)``.
+        """
+        return self._dones.copy()
+
+    def get_game(self, env_idx: int) -> BattleSnakeGame:
+        """Return an independent copy of a single game in the batch.
+
+        The copy can be used for rendering, observations or any other
+        :class:`~hisss.game.battlesnake.BattleSnakeGame` functionality and has to be
+        closed separately.
+
+        Args:
+            env_idx: Index of the game.
+
+        Returns:
+            A new :class:`~hisss.game.battlesnake.BattleSnakeGame` with the state of
+            game *env_idx*.
+
+        Raises:
+            ValueError: If the environment is closed.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed environment")
+        state_p = CPP_LIB.lib.clone_cpp(self.state_arr[env_idx])
+        game = BattleSnakeGame(cfg=self.cfg, state_p=state_p)
+        game.turns_played = int(self.turns_played[env_idx])
+        game.set_cum_rewards(self._cum_rewards[env_idx].copy())
+        return game
+
+    def close(self):
+        """Free all underlying C++ game-state objects."""
+        if self.is_closed:
+            return
+        for idx in range(self.num_envs):
+            CPP_LIB.lib.close_cpp(self.state_arr[idx])
+        self.is_closed = True
+
+    def __del__(self):
+        if not self.is_closed:
+            self.close()
@@ -0,0 +1,298 @@
+import ctypes as ct
+import time
+from enum import Enum
+from typing import Callable, Optional
+
+import numpy as np
+
+from hisss.cpp.lib import CPP_LIB, Struct
+from hisss.game.battlesnake import BattleSnakeGame, _encode_cpp_states, _obs_shape
+from hisss.game.rewards import (
+    REWARD_TYPE_TO_INT,
+    get_battlesnake_reward_type_from_cfg,
+)
+from hisss.game.rollout import ROLLOUT_POLICY_TO_INT, RolloutPolicy
+
+
+class MCTSAlgorithm(Enum):
+    """Selection rules for the players at turn in every node of :class:`MCTS`."""
+
+    #: Decoupled UCT, every player picks the action with the highest UCB score
+    DUCT = "DUCT"
+    #: Every player samples from Exp3 on importance-weighted returns
+    EXP3 = "EXP3"
+    #: Every player samples from regret matching on importance-weighted returns
+    REGRET_MATCHING = "REGRET_MATCHING"
+
+
+MCTS_ALGORITHM_TO_INT: dict[MCTSAlgorithm, int] = {
+    MCTSAlgorithm.DUCT: 0,
+    MCTSAlgorithm.EXP3: 1,
+    MCTSAlgorithm.REGRET_MATCHING: 2,
+}
+
+#: Default exploration parameter of every algorithm
+DEFAULT_EXPLORATION: dict[MCTSAlgorithm, float] = {
+    MCTSAlgorithm.DUCT: 1.4,
+    MCTSAlgorithm.EXP3: 0.1,
+    MCTSAlgorithm.REGRET_MATCHING: 0.1,
+}
+
+
+class MCTS:
+    """Simultaneous-move Monte Carlo tree search in C++.
+
+    The tree is built from a copy of the state of a game, so the game can be
+    modified or closed after the search was created. Every node treats the players
+    at turn as independent decision makers (decoupled selection) and new leaves are
+    evaluated by a rollout. Statistics of all nodes are held in flat arenas of the
+    native tree. Repeated calls of :meth:`search` continue to grow the same tree.
+
+    Returns are the sum of the rewards of the game configuration. They are
+    normalized to ``[0, 1]`` with *value_bounds* for the selection rules.
+
+    Instead of rollouts, :meth:`search_batched` evaluates leaves with an external
+    evaluator such as a neural network. Leaves are collected natively into batches
+    with virtual loss and encoded into a single buffer, such that the evaluator is
+    called once per batch. Decoupled UCT uses the policies of the evaluator as
+    priors (PUCT) in every node that was evaluated this way.
+
+    Attributes:
+        num_players: Number of players of the game.
+        algorithm: Selection rule used in every node.
+        is_closed: Whether :meth:`close` has already been called.
+    """
+
+    def __init__(
+        self,
+        game: BattleSnakeGame,
+        algorithm: MCTSAlgorithm = MCTSAlgorithm.DUCT,
+        exploration: Optional[float] = None,
+        rollout_policy: Optional[RolloutPolicy] = RolloutPolicy.UNIFORM,
+        rollout_max_turns: Optional[int] = None,
+        value_bounds: tuple[float, float] = (-1, 1),
+        seed: Optional[int] = None,
+    ):
+        """Create a new search tree rooted at the current state of *game*.
+
+        Args:
+            game: Game whose current state is the root of the tree.
+            algorithm: Selection rule used in every node.
+            exploration: UCB constant of DUCT or the uniform exploration rate of Exp3
+                and regret matching. ``None`` uses :data:`DEFAULT_EXPLORATION`.
+            rollout_policy: Policy of the rollouts that evaluate new leaves. ``None``
+                evaluates leaves with zero.
+            rollout_max_turns: Maximum number of turns of a rollout. ``None`` plays
+                until the game is terminal.
+            value_bounds: Minimum and maximum return of a player.
+            seed: Seed of the search. ``None`` draws a random seed.
+
+        Raises:
+            ValueError: If the game is closed or the parameters are invalid.
+        """
+        if game.is_closed:
+            raise ValueError("Cannot call function on closed game")
+        if exploration is None:
+            exploration = DEFAULT_EXPLORATION[algorithm]
+        if exploration < 0:
+            raise ValueError(f"Invalid exploration: {exploration}")
+        if algorithm != MCTSAlgorithm.DUCT and exploration > 1:
+            raise ValueError(f"Exploration rate must not exceed one: {exploration}")
+        if value_bounds[0] >= value_bounds[1]:
+            raise ValueError(f"Invalid value bounds: {value_bounds}")
+        self.num_players = game.num_players
+        self.algorithm = algorithm
+        self.cfg = game.cfg
+        reward_type = get_battlesnake_reward_type_from_cfg(game.cfg.reward_cfg)
+        tree_seed = np.random.default_rng(seed).integers(
+            0, np.iinfo(np.uint64).max, dtype=np.uint64, endpoint=True
+        )
+        self.tree_p = CPP_LIB.lib.mcts_create_cpp(
+            game.state_p,
+            MCTS_ALGORITHM_TO_INT[algorithm],
+            exploration,
+            value_bounds[0],
+            value_bounds[1],
+            -1 if rollout_policy is None else ROLLOUT_POLICY_TO_INT[rollout_policy],
+            -1 if rollout_max_turns is None else rollout_max_turns,
+            REWARD_TYPE_TO_INT[reward_type],
+            game.cfg.reward_cfg.living_reward,
+            game.cfg.reward_cfg.terminal_reward,
+            int(tree_seed),
+        )
+        self.is_closed = False
+
+    def search(
+        self,
+        iterations: Optional[int] = None,
+        time_limit: Optional[float] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Grow the tree until the iteration or time budget is exhausted.
+
+        Args:
+            iterations: Maximum number of iterations.
+            time_limit: Maximum duration in seconds.
+
+        Returns:
+            The :meth:`root_values` and :meth:`root_policies` after the search.
+
+        Raises:
+            ValueError: If the search is closed or no budget is given.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed search")
+        if iterations is None and time_limit is None:
+            raise ValueError("Need an iteration or time budget for the search")
+        if (iterations is not None and iterations <= 0) or (
+            time_limit is not None and time_limit <= 0
+        ):
+            return self.root_values(), self.root_policies()
+        CPP_LIB.lib.mcts_search_cpp(
+            self.tree_p,
+            0 if iterations is None else iterations,
+            0 if time_limit is None else time_limit,
+        )
+        return self.root_values(), self.root_policies()
+
+    def search_batched(
+        self,
+        evaluator: Callable[[np.ndarray], tuple[np.ndarray, np.ndarray]],
+        iterations: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        batch_size: int = 16,
+        virtual_loss: int = 1,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Grow the tree with leaves that are evaluated in batches.
+
+        Every batch selects up to *batch_size* paths. The decisions on the path of a
+        pending leaf count as *virtual_loss* visits with the minimum value, which
+        steers the following paths of the batch towards other leaves. All players at
+        turn of the pending leaves are encoded into one buffer, like
+        :func:`~hisss.game.battlesnake.encode_batch`, and passed to *evaluator* in a
+        single call. Paths that end in a terminal state do not need an evaluation.
+
+        Args:
+            evaluator: Function that maps observations of shape
+                ``(num_rows, *obs_shape)`` to a 2-tuple ``(values, policies)`` with
+                the value of shape ``(num_rows,)`` and the policy of shape
+                ``(num_rows, 4)`` of the player of every row. Policies are
+                renormalized over the legal actions.
+            iterations: Maximum number of iterations.
+            time_limit: Maximum duration in seconds, checked between batches.
+            batch_size: Maximum number of leaves per call of *evaluator*.
+            virtual_loss: Number of virtual visits per decision of a pending leaf.
+
+        Returns:
+            The :meth:`root_values` and :meth:`root_policies` after the search.
+
+        Raises:
+            ValueError: If the search is closed, no budget is given, the parameters
+                are invalid or the encoding config uses temperature input.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed search")
+        if iterations is None and time_limit is None:
+            raise ValueError("Need an iteration or time budget for the search")
+        if batch_size <= 0 or virtual_loss < 0:
+            raise ValueError(
+                f"Invalid batch size or virtual loss: {batch_size}, {virtual_loss}"
+            )
+        if self.cfg.ec.temperature_input:
+            raise ValueError("Batched encoding does not support temperature input")
+        obs_shape = _obs_shape(self.cfg, False)
+        out = np.empty(
+            shape=(batch_size * self.num_players, *_obs_shape(self.cfg, True)),
+            dtype=np.float32,
+        )
+        state_arr = (ct.POINTER(Struct) * batch_size)()
+        num_completed = ct.c_int(0)
+        remaining = iterations
+        start = time.time()
+        while remaining is None or remaining > 0:
+            if time_limit is not None and time.time() - start >= time_limit:
+                break
+            max_leaves = batch_size if remaining is None else min(batch_size, remaining)
+            num_leaves = CPP_LIB.lib.mcts_collect_leaves_cpp(
+                self.tree_p, max_leaves, virtual_loss, ct.byref(num_completed)
+            )
+            if num_leaves == 0 and num_completed.value == 0:
+                break  # the root is terminal
+            if remaining is not None:
+                remaining -= num_leaves + num_completed.value
+            if num_leaves == 0:
+                continue
+            try:
+                CPP_LIB.lib.mcts_pending_states_cpp(self.tree_p, state_arr)
+                num_rows, leaf_ids, players = _encode_cpp_states(
+                    self.cfg, state_arr, num_leaves, out
+                )
+                obs = out[:num_rows].reshape(num_rows, *obs_shape)
+                row_values, row_policies = evaluator(obs)
+                values = np.zeros(
+                    shape=(num_leaves, self.num_players), dtype=np.float64
+                )
+                priors = np.zeros(
+                    shape=(num_leaves, self.num_players, 4), dtype=np.float64
+                )
+                values[leaf_ids, players] = np.asarray(row_values).reshape(num_rows)
+                priors[leaf_ids, players] = np.asarray(row_policies).reshape(
+                    num_rows, 4
+                )
+            except BaseException:
+                CPP_LIB.lib.mcts_discard_pending_cpp(self.tree_p)
+                raise
+            CPP_LIB.lib.mcts_apply_evaluations_cpp(self.tree_p, values, priors)
+        return self.root_values(), self.root_policies()
+
+    def root_policies(self) -> np.ndarray:
+        """Return the root policy of every player.
+
+        DUCT plays proportionally to the visit counts, Exp3 and regret matching
+        return their average strategy.
+
+        Returns:
+            Float array of shape ``(num_players, 4)``. Rows of players that are not at
+            turn in the root are zero.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed search")
+        policies = np.empty(shape=(self.num_players, 4), dtype=np.float64)
+        CPP_LIB.lib.mcts_root_policies_cpp(self.tree_p, policies)
+        return policies
+
+    def root_values(self) -> np.ndarray:
+        """Return the mean return of every player in the root.
+
+        Returns:
+            Float array of shape ``(num_players,)``, zero before the first iteration.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed search")
+        values = np.empty(shape=(self.num_players,), dtype=np.float64)
+        CPP_LIB.lib.mcts_root_values_cpp(self.tree_p, values)
+        return values
+
+    @property
+    def num_nodes(self) -> int:
+        """Number of nodes in the tree, including the root."""
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed search")
+        return CPP_LIB.lib.mcts_num_nodes_cpp(self.tree_p)
+
+    @property
+    def num_iterations(self) -> int:
+        """Total number of iterations of all calls of :meth:`search`."""
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed search")
+        return CPP_LIB.lib.mcts_num_iterations_cpp(self.tree_p)
+
+    def close(self):
+        """Free the memory of the tree."""
+        if self.is_closed:
+            return
+        CPP_LIB.lib.mcts_close_cpp(self.tree_p)
+        self.is_closed = True
+
+    def __del__(self):
+        if not self.is_closed:
+            self.close()
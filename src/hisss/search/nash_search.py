@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from hisss.cpp.lib import CPP_LIB
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.rewards import (
+    REWARD_TYPE_TO_INT,
+    BattleSnakeRewardType,
+    get_battlesnake_reward_type_from_cfg,
+)
+from hisss.game.rollout import ROLLOUT_POLICY_TO_INT, RolloutPolicy
+
+
+@dataclass
+class NashSearchResult:
+    """Result of :func:`nash_search`."""
+
+    #: Float array of shape ``(num_players,)``, value of every player in the root
+    values: np.ndarray
+    #: Float array of shape ``(num_players, 4)``, equilibrium policy of every player in
+    #: the root. Rows of players that are not at turn are zero.
+    policies: np.ndarray
+    #: Number of searched nodes, including the root and the leaves
+    num_nodes: int
+    #: Number of actions that were removed as dominated by the pruning
+    num_pruned: int
+    #: Number of nodes where the equilibrium solver failed and uniform policies were used
+    num_nash_failures: int
+
+
+def is_zero_sum(game: BattleSnakeGame) -> bool:
+    """Whether the rewards of *game* sum to zero in every step.
+
+    This holds for two players with the kill rewards or with the standard rewards
+    without living reward.
+    """
+    if game.num_players != 2:
+        return False
+    reward_type = get_battlesnake_reward_type_from_cfg(game.cfg.reward_cfg)
+    if reward_type == BattleSnakeRewardType.KILL:
+        return True
+    return (
+        reward_type == BattleSnakeRewardType.STANDARD
+        and game.cfg.reward_cfg.living_reward == 0
+    )
+
+
+def zero_sum_value_bounds(game: BattleSnakeGame) -> tuple[float, float]:
+    """Minimum and maximum return of player 0 in a two-player zero-sum game.
+
+    A game ends at most once, so the returns are bounded by the terminal reward of
+    the standard rewards and by the kill reward of one third.
+
+    Raises:
+        ValueError: If the rewards of *game* are not zero-sum.
+    """
+    if not is_zero_sum(game):
+        raise ValueError("Value bounds are only defined for two-player zero-sum games")
+    reward_type = get_battlesnake_reward_type_from_cfg(game.cfg.reward_cfg)
+    if reward_type == BattleSnakeRewardType.KILL:
+        return -1 / 3, 1 / 3
+    terminal_reward = abs(game.cfg.reward_cfg.terminal_reward)
+    return -terminal_reward, terminal_reward
+
+
+def nash_search(
+    game: BattleSnakeGame,
+    depth: int,
+    leaf_policy: Optional[RolloutPolicy] = None,
+    num_leaf_rollouts: int = 1,
+    leaf_max_turns: Optional[int] = None,
+    prune: Optional[bool] = None,
+    value_bounds: Optional[tuple[float, float]] = None,
+    seed: Optional[int] = None,
+) -> NashSearchResult:
+    """Depth-limited simultaneous-move search in C++.
+
+    The search expands all joint actions of the players at turn up to *depth* turns
+    and solves the matrix of returns of every node for a Nash equilibrium by
+    backward induction, with the same solvers as :func:`calculate_nash_equilibrium`.
+    States are copied natively from the current state of *game*, which is not
+    modified.
+
+    In two-player zero-sum games, actions that are dominated by a pure strategy
+    are pruned with alpha-beta style bounds on the returns. Pruning does not change
+    the value of the root, but the equilibrium policy may differ if the game has
+    several equilibria.
+
+    Args:
+        game: Game whose current state is the root of the search.
+        depth: Number of joint actions from the root to the leaves.
+        leaf_policy: Policy of the rollouts that evaluate the leaves. ``None``
+            evaluates leaves with zero.
+        num_leaf_rollouts: Number of rollouts averaged per leaf.
+        leaf_max_turns: Maximum number of turns of a leaf rollout. ``None`` plays
+            until the game is terminal.
+        prune: Whether to prune dominated actions. ``None`` prunes if the rewards of
+            the game are zero-sum for two players.
+        value_bounds: Minimum and maximum return of player 0, used as initial bounds
+            when pruning. ``None`` uses :func:`zero_sum_value_bounds`.
+        seed: Seed of the leaf rollouts. ``None`` draws a random seed.
+
+    Returns:
+        The values and root policies of the search.
+
+    Raises:
+        ValueError: If the game is closed, the parameters are invalid, pruning is
+            requested for a game that is not two-player zero-sum or the value bounds
+            of pruning are narrower than the returns of the game.
+    """
+    if game.is_closed:
+        raise ValueError("Cannot call function on closed game")
+    if depth < 0:
+        raise ValueError(f"Invalid depth: {depth}")
+    if num_leaf_rollouts <= 0:
+        raise ValueError(f"Invalid number of leaf rollouts: {num_leaf_rollouts}")
+    zero_sum = is_zero_sum(game)
+    if prune is None:
+        prune = zero_sum
+    if prune and not zero_sum:
+        raise ValueError("Pruning is only possible in two-player zero-sum games")
+    if value_bounds is None:
+        value_bounds = zero_sum_value_bounds(game) if zero_sum else (-1, 1)
+    elif value_bounds[0] >= value_bounds[1]:
+        raise ValueError(f"Invalid value bounds: {value_bounds}")
+    if prune:
+        # cells outside of the bounds would be wrongly counted as dominated
+        min_return, max_return = zero_sum_value_bounds(game)
+        if value_bounds[0] > min_return or value_bounds[1] < max_return:
+            raise ValueError(
+                f"Value bounds {value_bounds} are narrower than the returns "
+                f"{(min_return, max_return)}"
+            )
+    reward_type = get_battlesnake_reward_type_from_cfg(game.cfg.reward_cfg)
+    search_seed = np.random.default_rng(seed).integers(
+        0, np.iinfo(np.uint64).max, dtype=np.uint64, endpoint=True
+    )
+    values = np.empty(shape=(game.num_players,), dtype=np.float64)
+    policies = np.empty(shape=(game.num_players, 4), dtype=np.float64)
+    stats = np.empty(shape=(3,), dtype=np.int64)
+    CPP_LIB.lib.nash_search_cpp(
+        game.state_p,
+        depth,
+        prune,
+        value_bounds[0],
+        value_bounds[1],
+        -1 if leaf_policy is None else ROLLOUT_POLICY_TO_INT[leaf_policy],
+        num_leaf_rollouts,
+        -1 if leaf_max_turns is None else leaf_max_turns,
+        REWARD_TYPE_TO_INT[reward_type],
+        game.cfg.reward_cfg.living_reward,
+        game.cfg.reward_cfg.terminal_reward,
+        int(search_seed),
+        values,
+        policies,
+        stats,
+    )
+    return NashSearchResult(
+        values=values,
+        policies=policies,
+        num_nodes=int(stats[0]),
+        num_pruned=int(stats[1]),
+        num_nash_failures=int(stats[2]),
+    )
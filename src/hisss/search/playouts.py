@@ -0,0 +1,74 @@
+from typing import Optional
+
+import numpy as np
+
+from hisss.cpp.lib import CPP_LIB
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.rewards import (
+    REWARD_TYPE_TO_INT,
+    get_battlesnake_reward_type_from_cfg,
+)
+from hisss.game.rollout import ROLLOUT_POLICY_TO_INT, RolloutPolicy
+
+
+def estimate_values(
+    game: BattleSnakeGame,
+    num_playouts: int,
+    num_threads: int = 1,
+    policy: RolloutPolicy = RolloutPolicy.UNIFORM,
+    max_turns: Optional[int] = None,
+    resample_chance: bool = True,
+    seed: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Estimate the value of a game state by Monte Carlo playouts in C++.
+
+    Every playout starts from a native copy of the state of *game* and plays until
+    the end with *policy*. The game itself is not modified. The playouts run on a
+    pool of native worker threads and the result does not depend on the number of
+    threads.
+
+    Args:
+        game: Game whose current state is evaluated.
+        num_playouts: Number of independent playouts.
+        num_threads: Number of worker threads. Non-positive values use all available
+            cores.
+        policy: Policy that selects the actions of all players.
+        max_turns: Maximum number of turns per playout. ``None`` plays until the game
+            is terminal.
+        resample_chance: If ``True``, every playout draws its own food spawns.
+            Otherwise all playouts continue with the random stream of *game*.
+        seed: Seed of the playouts. ``None`` draws a random seed.
+
+    Returns:
+        A 2-tuple ``(means, std_errors)`` of float arrays with shape
+        ``(num_players,)``, containing the mean return of every player from the
+        current state on and the standard error of that mean.
+
+    Raises:
+        ValueError: If the game is closed or *num_playouts* is not positive.
+    """
+    if game.is_closed:
+        raise ValueError("Cannot call function on closed game")
+    if num_playouts <= 0:
+        raise ValueError(f"Invalid number of playouts: {num_playouts}")
+    reward_type = get_battlesnake_reward_type_from_cfg(game.cfg.reward_cfg)
+    seeds = np.random.default_rng(seed).integers(
+        0, np.iinfo(np.uint64).max, size=(num_playouts,), dtype=np.uint64, endpoint=True
+    )
+    means = np.empty(shape=(game.num_players,), dtype=np.float64)
+    std_errors = np.empty(shape=(game.num_players,), dtype=np.float64)
+    CPP_LIB.lib.estimate_values_cpp(
+        game.state_p,
+        num_playouts,
+        ROLLOUT_POLICY_TO_INT[policy],
+        -1 if max_turns is None else max_turns,
+        num_threads,
+        seeds,
+        resample_chance,
+        REWARD_TYPE_TO_INT[reward_type],
+        game.cfg.reward_cfg.living_reward,
+        game.cfg.reward_cfg.terminal_reward,
+        means,
+        std_errors,
+    )
+    return means, std_errors
@@ -0,0 +1,193 @@
+import ctypes as ct
+from typing import Optional
+
+import numpy as np
+
+from hisss.cpp.lib import CPP_LIB
+
+
+class TranspositionTable:
+    """A fixed-size transposition table in C++ keyed by the hash of a game state.
+
+    Simultaneous-move search reaches the same position through different orders of
+    joint actions. The table stores the value vector, visit count and the last
+    Nash policy of such positions, so that they are computed only once. Keys are
+    usually obtained by :meth:`~hisss.game.battlesnake.BattleSnakeGame.state_hash`.
+
+    Every bucket holds two slots. The first slot keeps the deepest entry of the
+    current generation, the second slot is always replaced. Call
+    :meth:`new_generation` at the start of a new search to age all entries, such that
+    they are replaced first. Writers lock one of several stripes of the table,
+    so :meth:`probe` and :meth:`store` can be used from native worker threads and
+    Python threads alike.
+
+    The raw entry arrays are exposed as numpy views (:attr:`keys`, :attr:`depths`,
+    :attr:`visits`, :attr:`values`, :attr:`policies`) with one row per slot. Empty
+    slots have a depth of ``-1``. The views are not synchronized with concurrent
+    writers and must not be used after :meth:`close`.
+
+    Attributes:
+        num_players: Length of the stored value vectors.
+        num_actions: Number of actions per player in the stored policies.
+        num_slots: Total number of slots, i.e. twice the number of buckets.
+        is_closed: Whether :meth:`close` has already been called.
+    """
+
+    def __init__(
+        self,
+        num_buckets: int,
+        num_players: int,
+        num_actions: int = 4,
+        num_stripes: int = 64,
+    ):
+        """Allocate a new empty table.
+
+        Args:
+            num_buckets: Number of buckets. The table holds up to two entries per
+                bucket.
+            num_players: Length of the stored value vectors.
+            num_actions: Number of actions per player in the stored policies.
+            num_stripes: Number of locks, which are shared by the buckets in a
+                round-robin fashion.
+
+        Raises:
+            ValueError: If one of the sizes is not positive.
+        """
+        if min(num_buckets, num_players, num_actions, num_stripes) <= 0:
+            raise ValueError(
+                f"Invalid table size: {num_buckets}, {num_players}, {num_actions}, {num_stripes}"
+            )
+        self.num_players = num_players
+        self.num_actions = num_actions
+        self.is_closed = False
+        self.tt_p = CPP_LIB.lib.tt_create_cpp(
+            num_buckets, num_players, num_actions, num_stripes
+        )
+        self.num_slots = CPP_LIB.lib.tt_num_slots_cpp(self.tt_p)
+        self.keys = np.ctypeslib.as_array(
+            CPP_LIB.lib.tt_keys_cpp(self.tt_p), shape=(self.num_slots,)
+        )
+        self.depths = np.ctypeslib.as_array(
+            CPP_LIB.lib.tt_depths_cpp(self.tt_p), shape=(self.num_slots,)
+        )
+        self.visits = np.ctypeslib.as_array(
+            CPP_LIB.lib.tt_visits_cpp(self.tt_p), shape=(self.num_slots,)
+        )
+        self.values = np.ctypeslib.as_array(
+            CPP_LIB.lib.tt_values_cpp(self.tt_p), shape=(self.num_slots, num_players)
+        )
+        self.policies = np.ctypeslib.as_array(
+            CPP_LIB.lib.tt_policies_cpp(self.tt_p),
+            shape=(self.num_slots, num_players, num_actions),
+        )
+
+    def probe(self, key: int) -> Optional[tuple[np.ndarray, np.ndarray, int, int]]:
+        """Look up the entry of a state.
+
+        Args:
+            key: Hash of the state.
+
+        Returns:
+            ``None`` if the table does not contain the key. Otherwise, a 4-tuple
+            ``(values, policy, depth, visits)`` with copies of the stored value vector
+            of shape ``(num_players,)`` and policy of shape
+            ``(num_players, num_actions)``.
+
+        Raises:
+            ValueError: If the table is closed.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed table")
+        values = np.empty(shape=(self.num_players,), dtype=ct.c_double)
+        policy = np.empty(shape=(self.num_players, self.num_actions), dtype=ct.c_double)
+        depth, visits = ct.c_int(), ct.c_int()
+        slot = CPP_LIB.lib.tt_probe_cpp(
+            self.tt_p, key, values, policy, ct.byref(depth), ct.byref(visits)
+        )
+        if slot < 0:
+            return None
+        return values, policy, depth.value, visits.value
+
+    def store(
+        self,
+        key: int,
+        values: np.ndarray,
+        policy: Optional[np.ndarray] = None,
+        depth: int = 0,
+        visits: int = 0,
+    ) -> Optional[int]:
+        """Insert or update the entry of a state.
+
+        An existing entry of the same key from the current generation is only
+        overwritten by results of at least the same depth.
+
+        Args:
+            key: Hash of the state.
+            values: Value vector of shape ``(num_players,)``.
+            policy: Optional policy of shape ``(num_players, num_actions)``. ``None``
+                stores zeros.
+            depth: Search depth (or any other quality measure) of the result.
+            visits: Visit count of the state.
+
+        Returns:
+            The slot the entry was written to or ``None`` if a deeper entry of the
+            same key was kept.
+
+        Raises:
+            ValueError: If the table is closed or the arrays have the wrong shape.
+        """
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed table")
+        value_arr = np.ascontiguousarray(values, dtype=ct.c_double)
+        if value_arr.shape != (self.num_players,):
+            raise ValueError(f"Invalid value shape: {value_arr.shape}")
+        policy_p = None
+        if policy is not None:
+            policy_arr = np.ascontiguousarray(policy, dtype=ct.c_double)
+            if policy_arr.shape != (self.num_players, self.num_actions):
+                raise ValueError(f"Invalid policy shape: {policy_arr.shape}")
+            policy_p = policy_arr.ctypes.data_as(ct.POINTER(ct.c_double))
+        slot = CPP_LIB.lib.tt_store_cpp(
+            self.tt_p, key, depth, visits, value_arr, policy_p
+        )
+        return None if slot < 0 else slot
+
+    def new_generation(self):
+        """Age all entries, such that they are replaced first by new entries."""
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed table")
+        CPP_LIB.lib.tt_new_generation_cpp(self.tt_p)
+
+    def clear(self):
+        """Remove all entries and reset the hit statistics."""
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed table")
+        CPP_LIB.lib.tt_clear_cpp(self.tt_p)
+
+    @property
+    def num_hits(self) -> int:
+        """Number of successful :meth:`probe` calls since the last :meth:`clear`."""
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed table")
+        return int(CPP_LIB.lib.tt_num_hits_cpp(self.tt_p))
+
+    @property
+    def num_misses(self) -> int:
+        """Number of unsuccessful :meth:`probe` calls since the last :meth:`clear`."""
+        if self.is_closed:
+            raise ValueError("Cannot call function on closed table")
+        return int(CPP_LIB.lib.tt_num_misses_cpp(self.tt_p))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.depths >= 0))
+
+    def close(self):
+        """Free the underlying C++ table. All numpy views become invalid."""
+        if self.is_closed:
+            return
+        CPP_LIB.lib.tt_close_cpp(self.tt_p)
+        self.is_closed = True
+
+    def __del__(self):
+        if not self.is_closed:
+            self.close()
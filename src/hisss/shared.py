@@ -1,8 +1,8 @@
-import copy
-import random
+import ctypes as ct
 
 import numpy as np
 
+from hisss.cpp.lib import CPP_LIB
 from hisss.game.battlesnake import BattleSnakeGame
 
 
@@ -11,9 +11,10 @@ def action_kills_player(
     player: int,
     ja: tuple[int, ...],
 ) -> bool:
-    cpy = game.get_copy()
-    cpy.step(ja)
-    return player not in cpy.players_at_turn()
+    game.step_undoable(ja)
+    killed = player not in game.players_at_turn()
+    game.undo()
+    return killed
 
 
 def step_with_draw_prevention(
@@ -22,36 +23,14 @@ def step_with_draw_prevention(
 ) -> np.ndarray:
     # computes a step, which prevents a draw between two players (if possible). Returns reward of the step
     # Also does not change the win chances for either player in repeated games (equal yield probability)
-    if game.num_players_at_turn() != 2:
-        # we can only correct deaths of two players
+    if game.cfg.draw_prevention:
+        # the step of the game already prevents draws
         rewards, _, _ = game.step(joint_actions)
         return rewards
-    cpy = game.get_copy()
-    cpy.step(joint_actions)
-    if not cpy.is_terminal():
-        # Either none or only one player died, which does not result in draw
-        rewards, _, _ = game.step(joint_actions)
-        return rewards
-    # choose one of the players to yield for the other player
-    yield_player_idx = np.random.randint(0, 2)
-    yield_player = game.players_at_turn()[yield_player_idx]
-    original_action = joint_actions[yield_player_idx]
-    # check which other action do not kill yielding player
-    possible_other_actions = []
-    for action in game.available_actions(yield_player):
-        if action == original_action:
-            continue
-        ja_cpy = list(copy.copy(joint_actions))
-        ja_cpy[yield_player_idx] = action
-        if not action_kills_player(game, yield_player, tuple(ja_cpy)):
-            possible_other_actions.append(action)
-    # if no other action is possible, then take original action
-    if not possible_other_actions:
-        rewards, _, _ = game.step(joint_actions)
-        return rewards
-    # choose random other action
-    new_action = random.choice(possible_other_actions)
-    new_ja = list(copy.copy(joint_actions))
-    new_ja[yield_player_idx] = new_action
-    rewards, _, _ = game.step(tuple(new_ja))
+    # the yielding player and its new action are chosen natively with the random stream of the game
+    action_arr = np.zeros(shape=(game.num_players,), dtype=ct.c_int)
+    players = game.players_at_turn()
+    action_arr[players] = joint_actions
+    CPP_LIB.lib.prevent_draw_cpp(game.state_p, action_arr)
+    rewards, _, _ = game.step(tuple(int(action_arr[p]) for p in players))
     return rewards
@@ -2,9 +2,12 @@ import ctypes as ct
 import time
 import unittest
 
+import numpy as np
+
 from hisss.cpp.lib import CPP_LIB
 from hisss.game.battlesnake import DOWN, LEFT, RIGHT, UP, BattleSnakeGame
 from hisss.game.config import BattleSnakeConfig
+from hisss.shared import step_with_draw_prevention
 from test.bootcamp.test_envs_3x3 import perform_choke_2_player
 
 
@@ -73,6 +76,99 @@ class TestStep(unittest.TestCase):
         self.assertEqual(0, len(env2.available_actions(2)))
         self.assertEqual(64, len(env2.available_joint_actions()))
 
+    def test_legal_action_mask(self):
+        snake_spawns = {0: [[0, 1]], 1: [[1, 0]], 2: [[1, 2]], 3: [[2, 1]]}
+        gc = BattleSnakeConfig(
+            w=3,
+            h=3,
+            num_players=4,
+            min_food=0,
+            food_spawn_chance=0,
+            init_snake_pos=snake_spawns,
+            init_food_pos=[[1, 1]],
+            init_snake_len=[3, 3, 3, 3],
+            all_actions_legal=False,
+        )
+        env = BattleSnakeGame(cfg=gc)
+        mask = env.legal_action_mask()
+        self.assertEqual((4, 4), mask.shape)
+        self.assertEqual(bool, mask.dtype)
+        for player in range(4):
+            self.assertEqual(
+                env.available_actions(player), list(np.flatnonzero(mask[player]))
+            )
+            self.assertEqual(
+                env.illegal_actions(player), list(np.flatnonzero(~mask[player]))
+            )
+        # the returned mask is a copy of the cache
+        mask[:] = False
+        self.assertEqual(12, env.legal_action_mask().sum())
+        gc.all_actions_legal = True
+        env2 = BattleSnakeGame(gc)
+        env2.step((UP, UP, UP, UP))
+        mask = env2.legal_action_mask()
+        self.assertTrue(np.all(mask[[0, 1, 3]]))
+        self.assertFalse(np.any(mask[2]))
+        self.assertEqual([0, 1, 3], env2.players_at_turn())
+
+    def test_joint_action_indices(self):
+        gc = BattleSnakeConfig(w=7, h=7, num_players=4, all_actions_legal=False)
+        env = BattleSnakeGame(cfg=gc)
+        while not env.is_terminal():
+            joint_actions = env.available_joint_actions()
+            indices = env.available_joint_action_indices()
+            self.assertEqual(len(joint_actions), len(indices))
+            for ja, ja_idx in zip(joint_actions, indices):
+                self.assertEqual(ja_idx, env.joint_action_index(ja))
+                self.assertEqual(ja, env.joint_action_from_index(ja_idx))
+            illegal = set(range(4 ** env.num_players_at_turn())) - set(indices)
+            for ja_idx in list(illegal)[:3]:
+                with self.assertRaises(ValueError):
+                    env.step_index(ja_idx)
+            env.step_index(indices[-1])
+            self.assertEqual(joint_actions[-1], env.get_last_actions())
+        # the last player alive in a terminal state still has legal actions
+        self.assertEqual(
+            len(env.available_joint_actions()),
+            len(env.available_joint_action_indices()),
+        )
+
+    def test_draw_prevention(self):
+        def h2h_config(draw_prevention: bool) -> BattleSnakeConfig:
+            return BattleSnakeConfig(
+                w=5,
+                h=5,
+                num_players=2,
+                min_food=0,
+                food_spawn_chance=0,
+                init_snake_pos={0: [[1, 2]], 1: [[3, 2]]},
+                init_food_pos=[],
+                init_snake_len=[3, 3],
+                draw_prevention=draw_prevention,
+            )
+
+        env = BattleSnakeGame(h2h_config(False))
+        env.step((RIGHT, LEFT))
+        self.assertEqual([], env.players_alive())
+        yielded = set()
+        for _ in range(50):
+            env = BattleSnakeGame(h2h_config(True))
+            snapshot = env.to_bytes()
+            env.step_undoable((RIGHT, LEFT))
+            self.assertEqual([0, 1], env.players_alive())
+            actions = env.get_last_actions()
+            # exactly one player yields, the other keeps its action
+            self.assertTrue((actions[0] == RIGHT) != (actions[1] == LEFT))
+            yielded.add(0 if actions[1] == LEFT else 1)
+            # undo restores the random stream from before the choice
+            env.undo()
+            self.assertEqual(snapshot, env.to_bytes())
+        self.assertEqual({0, 1}, yielded)
+        # the python helper uses the same native logic without the config option
+        env = BattleSnakeGame(h2h_config(False))
+        step_with_draw_prevention(env, (RIGHT, LEFT))
+        self.assertEqual([0, 1], env.players_alive())
+
     def test_snake_h2h_same_size(self):
         snake_spawns = {0: [[0, 0]], 1: [[4, 0]]}
         food_pos = []
@@ -517,6 +613,43 @@ class TestStep(unittest.TestCase):
         env2.close()
         cpy.close()
 
+    def test_state_hash(self):
+        gc = BattleSnakeConfig(w=7, h=7, num_players=3, food_spawn_chance=50)
+        env = BattleSnakeGame(cfg=gc)
+        cpy = env.get_copy()
+        self.assertEqual(env.state_hash(), cpy.state_hash())
+        hashes = {env.state_hash()}
+        for _ in range(5):
+            if env.is_terminal():
+                break
+            env.step(env.available_joint_actions()[0])
+            # the incrementally updated hash equals the hash of a freshly built state
+            rebuilt = BattleSnakeGame(cfg=gc)
+            rebuilt.set_state(env.get_state())
+            self.assertTrue(env == rebuilt)
+            self.assertEqual(env.state_hash(), rebuilt.state_hash())
+            rebuilt.close()
+            hashes.add(env.state_hash())
+        self.assertEqual(env.turns_played + 1, len(hashes))
+        self.assertFalse(env == cpy)
+        env.close()
+        cpy.close()
+
+    def test_equals_hazards(self):
+        gc = BattleSnakeConfig(w=5, h=5, num_players=2, init_hazards=[[0, 0]])
+        env = BattleSnakeGame(cfg=gc)
+        other = BattleSnakeGame(cfg=gc)
+        other.set_state(env.get_state())
+        self.assertTrue(env == other)
+        gc2 = BattleSnakeConfig(w=5, h=5, num_players=2, init_hazards=[[0, 1]])
+        other2 = BattleSnakeGame(cfg=gc2)
+        other2.set_state(env.get_state())
+        self.assertFalse(env == other2)
+        self.assertNotEqual(env.state_hash(), other2.state_hash())
+        env.close()
+        other.close()
+        other2.close()
+
     def test_all_actions_legal(self):
         snake_spawns = {0: [[0, 1]], 1: [[1, 0]], 2: [[1, 2]], 3: [[2, 1]]}
         food_pos = [[1, 1]]
@@ -646,7 +779,7 @@ class TestStep(unittest.TestCase):
         for game in game_list:
             game.close()
 
-    def test_copy_is_not_seeded(self):
+    def test_copy_keeps_random_stream(self):
         game_conf = BattleSnakeConfig(w=7, h=7, num_players=3, food_spawn_chance=100)
         game_list = []
         num_envs = 10
@@ -658,7 +791,38 @@ class TestStep(unittest.TestCase):
         for game in game_list:
             game.step(actions)
             game.render()
+        self.assertTrue(all(cur_game == game_list[0] for cur_game in game_list))
+        for game in game_list:
+            game.close()
+
+    def test_reseeded_copies_diverge(self):
+        game_conf = BattleSnakeConfig(
+            w=7,
+            h=7,
+            num_players=3,
+            food_spawn_chance=100,
+            init_snake_pos={0: [[1, 1]], 1: [[3, 1]], 2: [[5, 1]]},
+            init_food_pos=[[3, 5]],
+        )
+        game_list = []
+        num_envs = 10
+        game = BattleSnakeGame(game_conf)
+        for seed in range(num_envs):
+            new_game = game.get_copy()
+            new_game.set_seed(seed)
+            game_list.append(new_game)
+        actions = (UP, UP, UP)
+        for game in game_list:
+            game.step(actions)
         self.assertFalse(all(cur_game == game_list[0] for cur_game in game_list))
+        # the same seed reproduces the same food spawn
+        cpy = game_list[5].get_copy()
+        cpy.set_seed(42)
+        game_list[5].set_seed(42)
+        cpy.step(actions)
+        game_list[5].step(actions)
+        self.assertTrue(cpy == game_list[5])
+        cpy.close()
         for game in game_list:
             game.close()
 
@@ -1,11 +1,11 @@
 import math
 import unittest
 
-from hisss.game.battlesnake import BattleSnakeGame, LEFT, UP
+from hisss.game.battlesnake import BattleSnakeGame, LEFT, UP, encode_batch
 
 import numpy as np
 
-from hisss.game.config import BattleSnakeConfig
+from hisss.game.config import BattleSnakeConfig, standard_config
 from hisss.game.encoding import (
     BestBattleSnakeEncodingConfig,
     BestRestrictedEncodingConfig,
@@ -485,6 +485,38 @@ class TestEncodingCPP(unittest.TestCase):
                     )
                     self.assertTrue(check)
 
+    def test_get_obs_all_symmetries(self):
+        ec_list = [
+            BestBattleSnakeEncodingConfig(compress_enemies=False),
+            BestBattleSnakeEncodingConfig(flatten=True),
+        ]
+        for ec in ec_list:
+            cfg = BattleSnakeConfig(w=7, h=7, num_players=4, min_food=2, ec=ec)
+            game = BattleSnakeGame(cfg)
+            game.play_random_steps(3)
+            obs, perms, inv_perms = game.get_obs_all_symmetries()
+            self.assertEqual(game.get_symmetry_count(), obs.shape[0])
+            for symmetry in range(game.get_symmetry_count()):
+                expected, perm, inv_perm = game.get_obs(symmetry=symmetry)
+                np.testing.assert_array_equal(expected, obs[symmetry])
+                self.assertEqual(perm, dict(enumerate(perms[symmetry].tolist())))
+                self.assertEqual(
+                    inv_perm, dict(enumerate(inv_perms[symmetry].tolist()))
+                )
+            # subset of symmetries written into a preallocated buffer
+            out = np.empty(
+                shape=(3, game.num_players_at_turn(), *game.get_obs_shape()),
+                dtype=np.float32,
+            )
+            sub_obs, _, _ = game.get_obs_all_symmetries(symmetries=[5, 0, 7], out=out)
+            self.assertTrue(np.shares_memory(sub_obs, out))
+            np.testing.assert_array_equal(obs[[5, 0, 7]], sub_obs)
+            with self.assertRaises(ValueError):
+                game.get_obs_all_symmetries(symmetries=[game.get_symmetry_count()])
+            with self.assertRaises(ValueError):
+                game.get_obs_all_symmetries(symmetries=[0, 1], out=out)
+            game.close()
+
 
 class TestRestrictedViewFoodSpawn(unittest.TestCase):
     """Food spawned this turn is visible even if outside the view radius."""
@@ -527,3 +559,79 @@ class TestRestrictedViewFoodSpawn(unittest.TestCase):
             0, food_layer.sum(), "Food outside radius should be hidden after spawn turn"
         )
         game.close()
+
+    def test_new_food_visible_in_all_symmetries(self):
+        game = self._make_game()
+        obs, _, _ = game.get_obs_all_symmetries()
+        food_idx = game.layer_explanation["current_food"]
+        for symmetry in range(game.get_symmetry_count()):
+            expected, _, _ = game.get_obs(symmetry=symmetry)
+            self.assertGreater(expected[0, :, :, food_idx].sum(), 0)
+            np.testing.assert_array_equal(expected, obs[symmetry])
+        game.close()
+
+    def test_encode_batch(self):
+        games = []
+        for steps in range(4):
+            game = BattleSnakeGame(standard_config())
+            game.play_random_steps(steps)
+            games.append(game)
+        total = sum(game.num_players_at_turn() for game in games)
+        out = np.full(
+            shape=(total + 2, *games[0].get_obs_shape()), fill_value=7, dtype=np.float32
+        )
+        obs, game_indices, players = encode_batch(games, out=out)
+        self.assertEqual(total, obs.shape[0])
+        self.assertTrue(np.shares_memory(obs, out))
+        row = 0
+        for idx, game in enumerate(games):
+            expected, _, _ = game.get_obs(symmetry=0)
+            for p_idx, player in enumerate(game.players_at_turn()):
+                self.assertEqual(idx, game_indices[row])
+                self.assertEqual(player, players[row])
+                np.testing.assert_array_equal(expected[p_idx], obs[row])
+                row += 1
+        with self.assertRaises(ValueError):
+            encode_batch(games, out=out[: total - 1])
+        for game in games:
+            game.close()
+
+    def test_incremental_encoding(self):
+        # the encoding cache of a game must reproduce the encoding of a fresh copy
+        ec_list = [
+            BestBattleSnakeEncodingConfig(),
+            BestBattleSnakeEncodingConfig(
+                compress_enemies=False, include_hazards=True, include_next_food=True
+            ),
+            SimpleBattleSnakeEncodingConfig(include_hazards=True),
+        ]
+        for ec in ec_list:
+            cfg = BattleSnakeConfig(
+                w=7,
+                h=7,
+                num_players=4,
+                min_food=2,
+                ec=ec,
+                royale=True,
+                shrink_n_turns=3,
+            )
+            game = BattleSnakeGame(cfg)
+            rng = np.random.default_rng(0)
+            for _ in range(60):
+                if game.is_terminal():
+                    game.reset()
+                obs, _, _ = game.get_obs()
+                cpy = game.get_copy()
+                expected, _, _ = cpy.get_obs()
+                cpy.close()
+                np.testing.assert_array_equal(expected, obs)
+                joint_actions = game.available_joint_actions()
+                ja = joint_actions[rng.integers(len(joint_actions))]
+                if rng.random() < 0.3:
+                    game.step_undoable(ja)
+                    if not game.is_terminal():
+                        game.get_obs()
+                    game.undo()
+                else:
+                    game.step(ja)
+            game.close()
@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+
+from hisss.game.battlesnake import UP, BattleSnakeGame
+from hisss.game.config import duel_config, standard_config
+from hisss.game.rollout import RolloutPolicy, play_rollouts, simulate
+
+
+class TestRollout(unittest.TestCase):
+    def test_play_until_terminal(self):
+        games = [BattleSnakeGame(duel_config()) for _ in range(16)]
+        rewards, turns, dones = play_rollouts(games, num_threads=4)
+        self.assertTrue(np.all(dones))
+        self.assertTrue(np.all(turns > 0))
+        for idx, game in enumerate(games):
+            self.assertTrue(game.is_terminal())
+            self.assertEqual(turns[idx], game.turns_played)
+            np.testing.assert_allclose(rewards[idx], game.get_cum_rewards())
+            # standard reward in a duel: either a draw or a win of one player
+            self.assertIn(sorted(rewards[idx].tolist()), [[0, 0], [-1, 1]])
+            game.close()
+
+    def test_max_turns(self):
+        games = [BattleSnakeGame(standard_config()) for _ in range(4)]
+        _, turns, dones = play_rollouts(games, max_turns=3, num_threads=2)
+        for idx, game in enumerate(games):
+            self.assertLessEqual(turns[idx], 3)
+            self.assertEqual(turns[idx], game.turns_played)
+            self.assertEqual(dones[idx], game.is_terminal())
+            if not dones[idx]:
+                self.assertEqual(3, turns[idx])
+                game.get_obs()  # python caches are in sync with the new state
+            game.close()
+
+    def test_reproducible(self):
+        game = BattleSnakeGame(standard_config())
+        results = []
+        for num_threads in [1, 4]:
+            copies = [game.get_copy() for _ in range(8)]
+            for idx, cpy in enumerate(copies):
+                cpy.set_seed(idx)
+            rewards, turns, _ = play_rollouts(
+                copies,
+                policy=RolloutPolicy.SAFE,
+                num_threads=num_threads,
+                seed=42,
+            )
+            results.append((rewards, turns))
+            for cpy in copies:
+                cpy.close()
+        np.testing.assert_array_equal(results[0][0], results[1][0])
+        np.testing.assert_array_equal(results[0][1], results[1][1])
+        game.close()
+
+    def test_safe_policy_survives_longer(self):
+        cfg = standard_config()
+        cfg.all_actions_legal = True
+        games_uniform = [BattleSnakeGame(cfg) for _ in range(32)]
+        games_safe = [BattleSnakeGame(cfg) for _ in range(32)]
+        _, turns_uniform, _ = play_rollouts(games_uniform, seed=0)
+        _, turns_safe, _ = play_rollouts(games_safe, policy=RolloutPolicy.SAFE, seed=0)
+        self.assertGreater(turns_safe.mean(), turns_uniform.mean())
+        for game in games_uniform + games_safe:
+            game.close()
+
+    def test_invalid_games(self):
+        game = BattleSnakeGame(duel_config())
+        with self.assertRaises(ValueError):
+            play_rollouts([game, game])
+        game.close()
+        with self.assertRaises(ValueError):
+            play_rollouts([game])
+
+    def test_simulate_trajectory(self):
+        game = BattleSnakeGame(duel_config())
+        cpy = game.get_copy()
+        traj = simulate(cpy, RolloutPolicy.SAFE, max_turns=500, seed=3)
+        self.assertTrue(traj.done)
+        self.assertTrue(cpy.is_terminal())
+        self.assertEqual(traj.num_turns, cpy.turns_played)
+        np.testing.assert_allclose(traj.rewards.sum(axis=0), cpy.get_cum_rewards())
+        alive = [p for p in range(cpy.num_players) if traj.alive[-1, p]]
+        self.assertEqual(alive, cpy.players_alive())
+        # replaying the actions in python reaches the same states
+        for t in range(traj.num_turns):
+            ja = tuple(int(a) for a in traj.actions[t] if a >= 0)
+            self.assertEqual(len(ja), game.num_players_at_turn())
+            rewards, _, _ = game.step(ja)
+            np.testing.assert_allclose(traj.rewards[t], rewards)
+            self.assertEqual(list(traj.lengths[t]), game.player_lengths())
+            self.assertEqual(list(traj.healths[t]), game.player_healths())
+        self.assertTrue(game == cpy)
+        self.assertEqual(cpy.get_last_actions(), game.get_last_actions())
+        # the game may also end with a trapped player that is still alive
+        dead = ~traj.alive[-1]
+        self.assertTrue(np.all(traj.death_causes[-1][dead] > 0))
+        self.assertTrue(np.all(traj.death_causes[-1][~dead] == 0))
+        game.close()
+        cpy.close()
+
+    def test_simulate_probability_table(self):
+        cfg = duel_config()
+        cfg.all_actions_legal = True
+        game = BattleSnakeGame(cfg)
+        # every player always moves up until it hits the wall
+        probs = np.zeros(shape=(game.num_players, 4))
+        probs[:, UP] = 1
+        traj = simulate(game, probs, max_turns=20, seed=0)
+        self.assertTrue(traj.done)
+        self.assertTrue(np.all(traj.actions == UP))
+        with self.assertRaises(ValueError):
+            simulate(game, np.ones(shape=(game.num_players, 3)), max_turns=3)
+        game.close()
+
+    def test_simulate_max_turns(self):
+        game = BattleSnakeGame(standard_config())
+        traj = simulate(game, RolloutPolicy.UNIFORM, max_turns=2)
+        self.assertEqual(2, traj.num_turns)
+        self.assertFalse(traj.done)
+        self.assertEqual(2, game.turns_played)
+        game.get_obs()
+        game.close()
@@ -0,0 +1,93 @@
+import pickle
+import random
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.config import BattleSnakeConfig, duel_config, standard_config
+
+
+def _step_first_action(game: BattleSnakeGame) -> BattleSnakeGame:
+    game.step(game.available_joint_actions()[0])
+    return game
+
+
+class TestSnapshot(unittest.TestCase):
+    def _round_trip(self, cfg: BattleSnakeConfig, seed: int):
+        rng = random.Random(seed)
+        game = BattleSnakeGame(cfg)
+        game.set_seed(seed)
+        while not game.is_terminal():
+            restored = BattleSnakeGame.from_bytes(cfg, game.to_bytes())
+            self.assertTrue(restored == game)
+            self.assertEqual(game.state_hash(), restored.state_hash())
+            self.assertEqual(game.turns_played, restored.turns_played)
+            self.assertEqual(game.players_alive(), restored.players_alive())
+            np.testing.assert_array_equal(game.get_hazards(), restored.get_hazards())
+            # the random stream is part of the snapshot
+            ja = rng.choice(game.available_joint_actions())
+            cpy = game.get_copy()
+            cpy.step(ja)
+            restored.step(ja)
+            self.assertTrue(restored == cpy)
+            np.testing.assert_array_equal(cpy.food_pos(), restored.food_pos())
+            cpy.close()
+            restored.close()
+            game.step(ja)
+        game.close()
+
+    def test_round_trip(self):
+        for seed in range(3):
+            self._round_trip(duel_config(), seed)
+            self._round_trip(standard_config(), seed)
+
+    def test_round_trip_royale(self):
+        cfg = BattleSnakeConfig(
+            w=7, h=7, num_players=2, royale=True, shrink_n_turns=3, hazard_damage=5
+        )
+        for seed in range(3):
+            self._round_trip(cfg, seed)
+
+    def test_invalid_snapshot(self):
+        game = BattleSnakeGame(duel_config())
+        buf = game.to_bytes()
+        with self.assertRaises(ValueError):
+            BattleSnakeGame.from_bytes(duel_config(), buf[:-4])
+        with self.assertRaises(ValueError):
+            BattleSnakeGame.from_bytes(duel_config(), b"\x00" * len(buf))
+        with self.assertRaises(ValueError):
+            BattleSnakeGame.from_bytes(standard_config(), buf)
+        game.close()
+        with self.assertRaises(ValueError):
+            game.to_bytes()
+
+    def test_pickle(self):
+        game = BattleSnakeGame(standard_config())
+        game.set_seed(1)
+        for _ in range(3):
+            game.step(game.available_joint_actions()[0])
+        restored = pickle.loads(pickle.dumps(game))
+        self.assertTrue(restored == game)
+        self.assertEqual(game.turns_played, restored.turns_played)
+        np.testing.assert_array_equal(
+            game.get_cum_rewards(), restored.get_cum_rewards()
+        )
+        self.assertEqual(game.get_last_actions(), restored.get_last_actions())
+        np.testing.assert_array_equal(game.get_obs()[0], restored.get_obs()[0])
+        ja = game.available_joint_actions()[0]
+        game.step(ja)
+        restored.step(ja)
+        self.assertTrue(restored == game)
+        game.close()
+        restored.close()
+
+    def test_pickle_process_pool(self):
+        game = BattleSnakeGame(duel_config())
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            restored = executor.submit(_step_first_action, game).result()
+        game.step(game.available_joint_actions()[0])
+        self.assertTrue(restored == game)
+        game.close()
+        restored.close()
@@ -1,6 +1,11 @@
+import random
 import unittest
 
+import numpy as np
+
 from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.config import BattleSnakeConfig, standard_config
+from hisss.game.state_pool import StatePool
 from test.bootcamp.test_envs_3x3 import perform_choke_2_player
 
 
@@ -23,3 +28,111 @@ class TestState(unittest.TestCase):
 
         game.set_state(game2.get_state())
         game.render()
+
+    def test_state_arrays(self):
+        royale_cfg = BattleSnakeConfig(
+            w=7, h=7, num_players=2, royale=True, shrink_n_turns=3, hazard_damage=5
+        )
+        for cfg in [standard_config(), royale_cfg]:
+            game = BattleSnakeGame(cfg)
+            rng = random.Random(0)
+            while not game.is_terminal():
+                arrays = game.get_state_arrays()
+                self.assertEqual(game.turns_played, arrays.turn)
+                for p in range(game.num_players):
+                    body = arrays.bodies[p, : arrays.body_lengths[p]]
+                    self.assertEqual(game.player_pos(p), [tuple(c) for c in body])
+                    self.assertTrue(
+                        np.all(arrays.bodies[p, arrays.body_lengths[p] :] == -1)
+                    )
+                self.assertEqual(game.player_healths(), list(arrays.snake_health))
+                self.assertEqual(game.player_lengths(), list(arrays.snake_len))
+                alive = [p for p in range(game.num_players) if arrays.snakes_alive[p]]
+                self.assertEqual(game.players_alive(), alive)
+                np.testing.assert_array_equal(game.food_pos(), arrays.food_pos)
+                np.testing.assert_array_equal(
+                    game.food_spawn_turns(), arrays.food_spawn_turns
+                )
+                np.testing.assert_array_equal(game.get_hazards(), arrays.hazards)
+                game.step(rng.choice(game.available_joint_actions()))
+            # games can also end with a trapped player, which is not eliminated
+            arrays = game.get_state_arrays()
+            events = game.get_state().elimination_events or {}
+            self.assertEqual(
+                sorted(events.keys()),
+                [p for p in range(game.num_players) if not arrays.snakes_alive[p]],
+            )
+            for p, event in events.items():
+                self.assertEqual(event.turn, arrays.elimination_turn[p])
+            game.close()
+
+    def test_joint_action_outcomes(self):
+        cfg = BattleSnakeConfig(w=7, h=7, num_players=4, min_food=2)
+        for _ in range(3):
+            game = BattleSnakeGame(cfg)
+            while not game.is_terminal():
+                outcomes = game.joint_action_outcomes()
+                key = game.state_hash()
+                before = game.get_state_arrays()
+                np.testing.assert_array_equal(
+                    game.available_joint_action_indices(),
+                    outcomes.joint_action_indices,
+                )
+                for row, ja in enumerate(game.available_joint_actions()):
+                    players = game.players_at_turn()
+                    self.assertEqual(ja, tuple(outcomes.joint_actions[row, players]))
+                    rewards, done, _ = game.step_undoable(ja)
+                    after = game.get_state_arrays()
+                    np.testing.assert_allclose(rewards, outcomes.rewards[row])
+                    self.assertEqual(done, outcomes.dones[row])
+                    died = before.snakes_alive & ~after.snakes_alive
+                    np.testing.assert_array_equal(died, outcomes.died[row])
+                    np.testing.assert_array_equal(
+                        np.where(died, after.elimination_cause, 0),
+                        outcomes.death_causes[row],
+                    )
+                    np.testing.assert_array_equal(
+                        after.snake_len > before.snake_len, outcomes.ate_food[row]
+                    )
+                    at_turn = np.zeros(game.num_players, dtype=bool)
+                    at_turn[game.players_at_turn()] = True
+                    np.testing.assert_array_equal(at_turn, outcomes.at_turn[row])
+                    game.undo()
+                self.assertEqual(key, game.state_hash())
+                game.step(random.choice(game.available_joint_actions()))
+            self.assertEqual(0, len(game.joint_action_outcomes().dones))
+            game.close()
+
+    def test_expand_children(self):
+        cfg = BattleSnakeConfig(w=7, h=7, num_players=4, min_food=2)
+        game = BattleSnakeGame(cfg)
+        pool = StatePool(game, capacity=256)
+        while not game.is_terminal():
+            children, indices, rewards, dones = game.expand_children(pool)
+            np.testing.assert_array_equal(
+                game.available_joint_action_indices(), indices
+            )
+            for child, ja, r, done in zip(
+                children, game.available_joint_actions(), rewards, dones
+            ):
+                cpy = game.get_copy()
+                step_rewards, step_done, _ = cpy.step(ja)
+                self.assertEqual(cpy.state_hash(), child.state_hash())
+                np.testing.assert_allclose(step_rewards, r)
+                self.assertEqual(step_done, done)
+                np.testing.assert_allclose(
+                    cpy.get_cum_rewards(), child.get_cum_rewards()
+                )
+                self.assertEqual(cpy.turns_played, child.turns_played)
+                self.assertEqual(cpy.get_last_actions(), child.get_last_actions())
+                self.assertEqual(cpy.players_at_turn(), child.players_at_turn())
+                if not done:
+                    np.testing.assert_array_equal(cpy.get_obs()[0], child.get_obs()[0])
+                cpy.close()
+            self.assertEqual(len(children), pool.num_in_use)
+            for child in children:
+                child.close()
+            game.step(random.choice(game.available_joint_actions()))
+        self.assertEqual(0, len(game.expand_children()[0]))
+        game.close()
+        pool.close()
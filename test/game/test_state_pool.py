@@ -0,0 +1,53 @@
+import unittest
+
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.config import duel_config
+from hisss.game.state_pool import StatePool
+
+
+class TestStatePool(unittest.TestCase):
+    def test_copies_recycle_slots(self):
+        game = BattleSnakeGame(duel_config())
+        pool = StatePool(game, capacity=4)
+        for _ in range(10):
+            cpy = game.get_copy(pool=pool)
+            self.assertTrue(cpy == game)
+            self.assertEqual(1, pool.num_in_use)
+            cpy.step(cpy.available_joint_actions()[0])
+            cpy.close()
+            self.assertEqual(0, pool.num_in_use)
+        self.assertEqual(1, pool.peak_in_use)
+        self.assertEqual(0, pool.num_overflows)
+        self.assertGreaterEqual(pool.slot_bytes, 0)
+        pool.close()
+        game.close()
+
+    def test_copies_of_pooled_games_use_pool(self):
+        game = BattleSnakeGame(duel_config())
+        pool = StatePool(game, capacity=8, num_preallocated=8)
+        self.assertEqual(8, pool.num_allocated)
+        cpy = game.get_copy(pool=pool)
+        children = [cpy.get_copy() for _ in range(3)]
+        self.assertEqual(4, pool.num_in_use)
+        for child in children:
+            self.assertTrue(child == game)
+            child.close()
+        cpy.close()
+        self.assertEqual(0, pool.num_in_use)
+        pool.close()
+        game.close()
+
+    def test_overflow_falls_back_to_heap(self):
+        game = BattleSnakeGame(duel_config())
+        pool = StatePool(game, capacity=2)
+        copies = [game.get_copy(pool=pool) for _ in range(3)]
+        self.assertEqual(2, pool.num_in_use)
+        self.assertEqual(1, pool.num_overflows)
+        self.assertTrue(copies[2] == game)
+        with self.assertRaises(ValueError):
+            pool.close()
+        for cpy in copies:
+            cpy.close()
+        self.assertEqual(0, pool.num_in_use)
+        pool.close()
+        game.close()
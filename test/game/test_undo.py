@@ -0,0 +1,106 @@
+import random
+import unittest
+
+import numpy as np
+
+from hisss.cpp.lib import CPP_LIB
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.config import BattleSnakeConfig, duel_config, standard_config
+
+
+def _snapshot(game: BattleSnakeGame) -> tuple:
+    return (
+        game.get_str_repr(),
+        tuple(game.player_healths()),
+        tuple(game.player_lengths()),
+        tuple(game.players_alive()),
+        tuple(game.players_at_turn()),
+        game.food_pos().tobytes(),
+        game.food_spawn_turns().tobytes(),
+        game.get_hazards().tobytes(),
+        game.get_cum_rewards().tobytes(),
+        game.turns_played,
+        game.get_last_actions(),
+        game.state_hash(),
+    )
+
+
+class TestUndo(unittest.TestCase):
+    def _walk_and_undo(self, cfg: BattleSnakeConfig, seed: int):
+        rnd = random.Random(seed)
+        game = BattleSnakeGame(cfg)
+        snapshots = []
+        while not game.is_terminal():
+            snapshots.append(_snapshot(game))
+            game.step_undoable(rnd.choice(game.available_joint_actions()))
+        self.assertEqual(len(snapshots), game.undo_depth())
+        while snapshots:
+            game.undo()
+            self.assertEqual(snapshots.pop(), _snapshot(game))
+        self.assertEqual(0, game.undo_depth())
+        game.close()
+
+    def test_undo_restores_states(self):
+        for seed in range(5):
+            self._walk_and_undo(duel_config(), seed)
+            self._walk_and_undo(standard_config(), seed)
+
+    def test_undo_royale(self):
+        cfg = BattleSnakeConfig(
+            w=7, h=7, num_players=2, royale=True, shrink_n_turns=3, hazard_damage=5
+        )
+        for seed in range(5):
+            self._walk_and_undo(cfg, seed)
+
+    def test_undo_restores_random_stream(self):
+        game = BattleSnakeGame(standard_config())
+        game.set_seed(3)
+        cpy = game.get_copy()
+        ja = game.available_joint_actions()[0]
+        for _ in range(3):
+            game.step_undoable(ja)
+            game.undo()
+        game.step(ja)
+        cpy.step(ja)
+        self.assertEqual(cpy.get_str_repr(), game.get_str_repr())
+        np.testing.assert_array_equal(cpy.food_pos(), game.food_pos())
+        game.close()
+        cpy.close()
+
+    def test_step_discards_history(self):
+        game = BattleSnakeGame(duel_config())
+        with self.assertRaises(ValueError):
+            game.undo()
+        game.step_undoable(game.available_joint_actions()[0])
+        game.step(game.available_joint_actions()[0])
+        self.assertEqual(0, game.undo_depth())
+        with self.assertRaises(ValueError):
+            game.undo()
+        game.close()
+
+    def test_reset_saved_properties_discards_history(self):
+        game = BattleSnakeGame(duel_config())
+        game.step_undoable(game.available_joint_actions()[0])
+        game.step_undoable(game.available_joint_actions()[0])
+        game.reset_saved_properties()
+        self.assertEqual(0, game.undo_depth())
+        self.assertEqual(0, CPP_LIB.lib.undo_depth_cpp(game.state_p))
+        with self.assertRaises(ValueError):
+            game.undo()
+        before = _snapshot(game)
+        game.step_undoable(game.available_joint_actions()[0])
+        self.assertEqual(1, CPP_LIB.lib.undo_depth_cpp(game.state_p))
+        game.undo()
+        self.assertEqual(before, _snapshot(game))
+        game.close()
+
+    def test_copy_has_no_history(self):
+        game = BattleSnakeGame(duel_config())
+        game.step_undoable(game.available_joint_actions()[0])
+        cpy = game.get_copy()
+        self.assertEqual(0, cpy.undo_depth())
+        with self.assertRaises(ValueError):
+            cpy.undo()
+        game.undo()
+        game.close()
+        cpy.close()
@@ -0,0 +1,107 @@
+import random
+import unittest
+
+import numpy as np
+
+from hisss.game.battlesnake import DOWN, LEFT, UP
+from hisss.game.config import (
+    BattleSnakeConfig,
+    duel_config,
+    restricted_duel_config,
+    restricted_standard_config,
+)
+from hisss.game.rewards import KillBattleSnakeRewardConfig
+from hisss.game.vec_env import BattleSnakeVecEnv
+
+
+class TestVecEnv(unittest.TestCase):
+    def _compare_with_game(self, cfg: BattleSnakeConfig, num_envs: int, steps: int):
+        env = BattleSnakeVecEnv(cfg, num_envs)
+        for _ in range(steps):
+            actions = np.zeros(shape=(num_envs, cfg.num_players), dtype=np.int32)
+            expected_rewards = np.zeros(shape=(num_envs, cfg.num_players))
+            expected_dones = env.get_dones()
+            for env_idx in range(num_envs):
+                if expected_dones[env_idx]:
+                    continue
+                game = env.get_game(env_idx)
+                joint_action = random.choice(game.available_joint_actions())
+                for player, action in zip(game.players_at_turn(), joint_action):
+                    actions[env_idx, player] = action
+                rewards, done, _ = game.step(joint_action)
+                expected_rewards[env_idx] = rewards
+                expected_dones[env_idx] = done
+                game.close()
+            rewards, dones = env.step(actions)
+            np.testing.assert_allclose(expected_rewards, rewards)
+            np.testing.assert_array_equal(expected_dones, dones)
+            if np.all(dones):
+                env.reset(np.nonzero(dones)[0])
+        env.close()
+
+    def test_duel(self):
+        self._compare_with_game(duel_config(), num_envs=8, steps=50)
+
+    def test_restricted_duel(self):
+        self._compare_with_game(restricted_duel_config(), num_envs=8, steps=50)
+
+    def test_restricted_standard(self):
+        self._compare_with_game(restricted_standard_config(), num_envs=4, steps=50)
+
+    def test_kill_reward(self):
+        cfg = restricted_standard_config()
+        cfg.reward_cfg = KillBattleSnakeRewardConfig()
+        self._compare_with_game(cfg, num_envs=4, steps=50)
+
+    def test_done_env_not_stepped(self):
+        init_pos = {0: [[0, 1], [1, 1], [0, 2]], 1: [[2, 2], [2, 1], [2, 0]]}
+        cfg = BattleSnakeConfig(
+            w=3,
+            h=3,
+            num_players=2,
+            constrictor=True,
+            init_snake_pos=init_pos,
+            init_snake_len=[3, 3],
+            init_snake_health=[5, 5],
+            all_actions_legal=False,
+        )
+        env = BattleSnakeVecEnv(cfg, num_envs=2)
+        rewards, dones = env.step(np.asarray([[DOWN, LEFT], [DOWN, LEFT]]))
+        np.testing.assert_array_equal([[1, -1], [1, -1]], rewards)
+        self.assertTrue(np.all(dones))
+        rewards, dones = env.step(np.asarray([[UP, UP], [UP, UP]]))
+        np.testing.assert_array_equal(np.zeros((2, 2)), rewards)
+        self.assertTrue(np.all(dones))
+        np.testing.assert_array_equal([1, 1], env.turns_played)
+        env.reset([0])
+        self.assertFalse(env.get_dones()[0])
+        self.assertTrue(env.get_dones()[1])
+        self.assertEqual(0, env.turns_played[0])
+        env.close()
+
+    def test_invalid_action_shape(self):
+        env = BattleSnakeVecEnv(duel_config(), num_envs=3)
+        with self.assertRaises(ValueError):
+            env.step(np.zeros((2, 2), dtype=np.int32))
+        env.close()
+        with self.assertRaises(ValueError):
+            env.step(np.zeros((3, 2), dtype=np.int32))
+
+    def test_get_obs(self):
+        env = BattleSnakeVecEnv(duel_config(), num_envs=4)
+        env.step(np.asarray([[UP, UP], [DOWN, DOWN], [LEFT, UP], [UP, LEFT]]))
+        obs, env_indices, players = env.get_obs()
+        row = 0
+        for env_idx in range(env.num_envs):
+            if env.get_dones()[env_idx]:
+                continue
+            game = env.get_game(env_idx)
+            expected, _, _ = game.get_obs(symmetry=0)
+            for p_idx, player in enumerate(game.players_at_turn()):
+                self.assertEqual(env_idx, env_indices[row])
+                self.assertEqual(player, players[row])
+                np.testing.assert_array_equal(expected[p_idx], obs[row])
+                row += 1
+            game.close()
+        self.assertEqual(row, obs.shape[0])
+        env.close()
@@ -0,0 +1,136 @@
+import unittest
+
+import numpy as np
+
+from hisss.game.battlesnake import UP, BattleSnakeGame
+from hisss.game.config import BattleSnakeConfig, duel_config, standard_config
+from hisss.search.mcts import MCTS, MCTSAlgorithm
+
+
+def _corridor_config() -> BattleSnakeConfig:
+    # player 0 has to move up, every other action runs into a wall or its own body
+    cfg = duel_config()
+    cfg.init_snake_pos = {0: [[0, 0], [1, 0], [2, 0]], 1: [[4, 4]]}
+    cfg.init_food_pos = []
+    cfg.min_food = 0
+    cfg.food_spawn_chance = 0
+    return cfg
+
+
+class TestMCTS(unittest.TestCase):
+    def test_policies_and_values(self):
+        for algorithm in MCTSAlgorithm:
+            game = BattleSnakeGame(duel_config())
+            search = MCTS(game, algorithm=algorithm, seed=0)
+            game.close()  # the tree does not depend on the game
+            values, policies = search.search(iterations=300)
+            self.assertEqual(300, search.num_iterations)
+            self.assertGreater(search.num_nodes, 1)
+            self.assertEqual((2,), values.shape)
+            self.assertEqual((2, 4), policies.shape)
+            np.testing.assert_allclose(np.ones(2), policies.sum(axis=1))
+            self.assertTrue(np.all(np.abs(values) <= 1))
+            # standard rewards of a duel are zero-sum
+            self.assertAlmostEqual(0, values.sum())
+            search.search(iterations=100)
+            self.assertEqual(400, search.num_iterations)
+            search.close()
+
+    def test_only_legal_actions(self):
+        game = BattleSnakeGame(standard_config())
+        search = MCTS(game, algorithm=MCTSAlgorithm.REGRET_MATCHING, seed=1)
+        _, policies = search.search(time_limit=0.05)
+        self.assertGreater(search.num_iterations, 0)
+        for player in range(game.num_players):
+            for action in game.illegal_actions(player):
+                self.assertEqual(0, policies[player, action])
+        search.close()
+        game.close()
+
+    def test_forced_move(self):
+        cfg = _corridor_config()
+        cfg.all_actions_legal = True
+        game = BattleSnakeGame(cfg)
+        for algorithm in MCTSAlgorithm:
+            search = MCTS(game, algorithm=algorithm, rollout_policy=None, seed=2)
+            _, policies = search.search(iterations=2000)
+            self.assertEqual(UP, int(np.argmax(policies[0])))
+            search.close()
+        game.close()
+
+    def test_terminal_root(self):
+        game = BattleSnakeGame(duel_config())
+        while not game.is_terminal():
+            game.step(game.available_joint_actions()[0])
+        search = MCTS(game)
+        values, policies = search.search(iterations=10)
+        self.assertEqual(0, search.num_iterations)
+        np.testing.assert_array_equal(np.zeros(2), values)
+        np.testing.assert_array_equal(np.zeros((2, 4)), policies)
+        search.close()
+        game.close()
+        with self.assertRaises(ValueError):
+            search.search(iterations=1)
+
+    def test_batched_evaluation(self):
+        game = BattleSnakeGame(standard_config())
+        obs_shape = game.get_obs_shape()
+        batch_sizes = []
+
+        def evaluator(obs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+            self.assertEqual(obs_shape, obs.shape[1:])
+            batch_sizes.append(obs.shape[0])
+            # prefer moving up
+            policies = np.full(shape=(obs.shape[0], 4), fill_value=0.1)
+            policies[:, UP] = 0.7
+            return np.zeros(obs.shape[0]), policies
+
+        for algorithm in MCTSAlgorithm:
+            search = MCTS(game, algorithm=algorithm, rollout_policy=None, seed=3)
+            values, policies = search.search_batched(
+                evaluator, iterations=500, batch_size=8
+            )
+            self.assertEqual(500, search.num_iterations)
+            np.testing.assert_allclose(np.ones(4), policies.sum(axis=1))
+            for player in range(game.num_players):
+                for action in game.illegal_actions(player):
+                    self.assertEqual(0, policies[player, action])
+            # the search can continue with rollouts
+            search.search(iterations=10)
+            self.assertEqual(510, search.num_iterations)
+            search.close()
+        self.assertGreater(len(batch_sizes), 0)
+        self.assertLessEqual(max(batch_sizes), 8 * game.num_players)
+        game.close()
+
+    def test_batched_forced_move(self):
+        cfg = _corridor_config()
+        cfg.all_actions_legal = True
+        game = BattleSnakeGame(cfg)
+
+        def evaluator(obs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+            return np.zeros(obs.shape[0]), np.full(
+                shape=(obs.shape[0], 4), fill_value=0.25
+            )
+
+        search = MCTS(game, rollout_policy=None, seed=4)
+        _, policies = search.search_batched(evaluator, iterations=200, batch_size=4)
+        self.assertEqual(UP, int(np.argmax(policies[0])))
+        search.close()
+        game.close()
+
+    def test_batched_evaluator_error(self):
+        game = BattleSnakeGame(duel_config())
+
+        def evaluator(obs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+            raise RuntimeError("evaluation failed")
+
+        search = MCTS(game, seed=5)
+        with self.assertRaises(RuntimeError):
+            search.search_batched(evaluator, iterations=16, batch_size=4)
+        # pending leaves are discarded and the tree stays usable
+        self.assertEqual(0, search.num_iterations)
+        search.search(iterations=20)
+        self.assertEqual(20, search.num_iterations)
+        search.close()
+        game.close()
@@ -0,0 +1,125 @@
+import unittest
+
+import numpy as np
+
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.config import BattleSnakeConfig, duel_config, standard_config
+from hisss.game.rewards import StandardBattleSnakeRewardConfig
+from hisss.game.rollout import RolloutPolicy
+from hisss.search.nash_search import nash_search, zero_sum_value_bounds
+
+
+def _duel_7x7(
+    init_snake_pos: dict[int, list[list[int]]], init_food_pos: list[list[int]]
+) -> BattleSnakeConfig:
+    cfg = duel_config()
+    cfg.w = 7
+    cfg.h = 7
+    cfg.init_snake_pos = init_snake_pos
+    cfg.init_food_pos = init_food_pos
+    return cfg
+
+
+class TestNashSearch(unittest.TestCase):
+    def test_pruning_keeps_values(self):
+        spawns = [
+            ({0: [[1, 1]], 1: [[5, 5]]}, [[3, 3]]),
+            ({0: [[1, 5]], 1: [[5, 1]]}, [[0, 3], [6, 3]]),
+            ({0: [[3, 1]], 1: [[3, 5]]}, [[1, 3]]),
+        ]
+        rng = np.random.default_rng(0)
+        for seed, (init_snake_pos, init_food_pos) in enumerate(spawns):
+            game = BattleSnakeGame(_duel_7x7(init_snake_pos, init_food_pos))
+            game.set_seed(seed)
+            while not game.is_terminal():
+                key = game.state_hash()
+                full = nash_search(game, depth=2, prune=False)
+                pruned = nash_search(game, depth=2, prune=True)
+                self.assertEqual(key, game.state_hash())
+                np.testing.assert_allclose(full.values, pruned.values, atol=1e-6)
+                self.assertLessEqual(pruned.num_nodes, full.num_nodes)
+                for result in [full, pruned]:
+                    self.assertAlmostEqual(0, result.values.sum())
+                    np.testing.assert_allclose(1, result.policies.sum(axis=1))
+                    for player in range(2):
+                        illegal = [
+                            a
+                            for a in range(4)
+                            if a not in game.available_actions(player)
+                        ]
+                        np.testing.assert_array_equal(
+                            0, result.policies[player, illegal]
+                        )
+                joint_actions = game.available_joint_actions()
+                game.step(joint_actions[rng.integers(len(joint_actions))])
+            game.close()
+
+    def test_degenerate_matrix(self):
+        # player 0 has two actions with the same outcomes, for which the solver returned
+        # a non-equilibrium. The value of the position is 0.5.
+        cfg = _duel_7x7(
+            init_snake_pos={
+                0: [[4, 5], [4, 4], [4, 3], [3, 3]],
+                1: [[3, 6], [2, 6], [1, 6]],
+            },
+            init_food_pos=[[2, 0], [0, 2], [4, 0], [0, 5]],
+        )
+        cfg.init_snake_health = [97, 95]
+        cfg.init_snake_len = [4, 3]
+        cfg.init_turns_played = 5
+        game = BattleSnakeGame(cfg)
+        game.set_seed(0)
+        for prune in [False, True]:
+            result = nash_search(game, depth=2, prune=prune)
+            np.testing.assert_allclose([0.5, -0.5], result.values, atol=1e-6)
+            self.assertEqual(0, result.num_nash_failures)
+        game.close()
+
+    def test_value_bounds_of_rewards(self):
+        cfg = _duel_7x7({0: [[1, 1]], 1: [[5, 5]]}, [[3, 3]])
+        cfg.reward_cfg = StandardBattleSnakeRewardConfig(terminal_reward=2)
+        game = BattleSnakeGame(cfg)
+        game.set_seed(0)
+        self.assertEqual((-2, 2), zero_sum_value_bounds(game))
+        rng = np.random.default_rng(0)
+        while not game.is_terminal():
+            full = nash_search(game, depth=2, prune=False)
+            pruned = nash_search(game, depth=2, prune=True)
+            np.testing.assert_allclose(full.values, pruned.values, atol=1e-6)
+            joint_actions = game.available_joint_actions()
+            game.step(joint_actions[rng.integers(len(joint_actions))])
+        game.reset()
+        with self.assertRaises(ValueError):
+            nash_search(game, depth=1, prune=True, value_bounds=(-1, 1))
+        nash_search(game, depth=1, prune=False, value_bounds=(-1, 1))
+        game.close()
+
+    def test_multiplayer(self):
+        game = BattleSnakeGame(standard_config())
+        result = nash_search(
+            game, depth=1, leaf_policy=RolloutPolicy.SAFE, num_leaf_rollouts=2, seed=3
+        )
+        self.assertEqual((4,), result.values.shape)
+        self.assertEqual((4, 4), result.policies.shape)
+        np.testing.assert_allclose(1, result.policies.sum(axis=1))
+        self.assertEqual(0, result.num_pruned)
+        # the search is reproducible with a seed
+        again = nash_search(
+            game, depth=1, leaf_policy=RolloutPolicy.SAFE, num_leaf_rollouts=2, seed=3
+        )
+        np.testing.assert_array_equal(result.values, again.values)
+        with self.assertRaises(ValueError):
+            nash_search(game, depth=1, prune=True)
+        game.close()
+
+    def test_terminal_state(self):
+        game = BattleSnakeGame(duel_config())
+        while not game.is_terminal():
+            game.step(game.available_joint_actions()[0])
+        result = nash_search(game, depth=2)
+        np.testing.assert_array_equal(np.zeros(2), result.values)
+        np.testing.assert_array_equal(np.zeros((2, 4)), result.policies)
+        self.assertEqual(1, result.num_nodes)
+        with self.assertRaises(ValueError):
+            nash_search(game, depth=-1)
+        game.close()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.config import duel_config, standard_config
+from hisss.game.rollout import RolloutPolicy
+from hisss.search.playouts import estimate_values
+
+
+class TestEstimateValues(unittest.TestCase):
+    def test_duel_values(self):
+        game = BattleSnakeGame(duel_config())
+        key = game.state_hash()
+        means, std_errors = estimate_values(game, num_playouts=200, num_threads=4)
+        # the game is not modified
+        self.assertEqual(key, game.state_hash())
+        self.assertEqual(0, game.turns_played)
+        # standard rewards of a duel are zero-sum
+        self.assertAlmostEqual(0, means.sum())
+        self.assertTrue(np.all(np.abs(means) <= 1))
+        self.assertTrue(np.all(std_errors > 0))
+        self.assertTrue(np.all(std_errors < 0.1))
+        game.close()
+
+    def test_reproducible(self):
+        game = BattleSnakeGame(standard_config())
+        results = [
+            estimate_values(
+                game,
+                num_playouts=64,
+                num_threads=num_threads,
+                policy=RolloutPolicy.SAFE,
+                seed=7,
+            )
+            for num_threads in [1, 4]
+        ]
+        np.testing.assert_array_equal(results[0][0], results[1][0])
+        np.testing.assert_array_equal(results[0][1], results[1][1])
+        game.close()
+
+    def test_terminal_state(self):
+        game = BattleSnakeGame(duel_config())
+        while not game.is_terminal():
+            game.step(game.available_joint_actions()[0])
+        means, std_errors = estimate_values(game, num_playouts=8)
+        np.testing.assert_array_equal(np.zeros(2), means)
+        np.testing.assert_array_equal(np.zeros(2), std_errors)
+        with self.assertRaises(ValueError):
+            estimate_values(game, num_playouts=0)
+        game.close()
@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+import numpy as np
+
+from hisss.game.battlesnake import BattleSnakeGame
+from hisss.game.config import duel_config
+from hisss.search.transposition import TranspositionTable
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_store_and_probe(self):
+        table = TranspositionTable(num_buckets=16, num_players=2)
+        game = BattleSnakeGame(duel_config())
+        key = game.state_hash()
+        self.assertIsNone(table.probe(key))
+        policy = np.asarray([[0.5, 0.5, 0, 0], [0, 0, 1, 0]])
+        slot = table.store(key, np.asarray([0.25, -0.25]), policy, depth=3, visits=7)
+        self.assertIsNotNone(slot)
+        values, stored_policy, depth, visits = table.probe(key)
+        np.testing.assert_allclose([0.25, -0.25], values)
+        np.testing.assert_allclose(policy, stored_policy)
+        self.assertEqual((3, 7), (depth, visits))
+        # the numpy views show the same entry
+        self.assertEqual(key, table.keys[slot])
+        np.testing.assert_allclose([0.25, -0.25], table.values[slot])
+        np.testing.assert_allclose(policy, table.policies[slot])
+        self.assertEqual(1, len(table))
+        self.assertEqual((1, 1), (table.num_hits, table.num_misses))
+        # a copy of the game hits the same entry
+        cpy = game.get_copy()
+        self.assertIsNotNone(table.probe(cpy.state_hash()))
+        table.clear()
+        self.assertIsNone(table.probe(key))
+        self.assertEqual(0, len(table))
+        game.close()
+        cpy.close()
+        table.close()
+
+    def test_replacement(self):
+        # a single bucket, all keys collide
+        table = TranspositionTable(num_buckets=1, num_players=1)
+        self.assertEqual(0, table.store(1, np.ones(1), depth=5))
+        # shallower results of the same key are ignored
+        self.assertIsNone(table.store(1, np.zeros(1), depth=2))
+        self.assertEqual(1, table.probe(1)[0][0])
+        # other shallow keys end up in the always-replace slot
+        self.assertEqual(1, table.store(2, np.ones(1), depth=1))
+        self.assertEqual(1, table.store(3, np.ones(1), depth=1))
+        self.assertIsNone(table.probe(2))
+        self.assertIsNotNone(table.probe(1))
+        # entries of older generations are replaced regardless of depth
+        table.new_generation()
+        self.assertEqual(0, table.store(4, np.ones(1), depth=0))
+        self.assertIsNone(table.probe(1))
+        table.close()
+
+    def test_threads(self):
+        table = TranspositionTable(num_buckets=1024, num_players=2, num_stripes=8)
+
+        def worker(offset: int):
+            for key in range(offset, offset + 200):
+                table.store(key, np.full(2, key, dtype=float), depth=1)
+
+        threads = [threading.Thread(target=worker, args=(i * 200,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for key in range(800):
+            values, _, _, _ = table.probe(key)
+            np.testing.assert_allclose([key, key], values)
+        table.close()
+
+    def test_closed(self):
+        table = TranspositionTable(num_buckets=4, num_players=2)
+        table.close()
+        with self.assertRaises(ValueError):
+            table.probe(0)